@@ -1,22 +1,47 @@
 import asyncio
+import csv
 import importlib.util
+import io
+import json
+import os
 import sys
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from importlib import import_module
+from itertools import islice
 from pathlib import Path
-from typing import Any, List, Optional, Type
+from types import ModuleType
+from typing import Annotated, Any, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Literal, Optional, Set, Tuple, Type, Union
 
-from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional representation
+    msgpack = None
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from inventory_owner import DEFAULT_AUTHKEY, connect as connect_owner  # noqa: E402
+from inventory_persistence import DurableInventory  # noqa: E402
+from inventory_schema import InventoryItem, InventoryView  # noqa: E402
+from inventory_snapshot import InventorySnapshot, load_snapshot  # noqa: E402
 
-def _load_inventory_manager() -> Type[Any]:
-    """Load the inventory core, preferring the compiled extension when available."""
 
+def _import_inventory_core() -> ModuleType:
     try:
         module = import_module("inventory_core")
         origin = getattr(module, "__file__", "compiled extension (binary)")
@@ -34,16 +59,82 @@ def _load_inventory_manager() -> Type[Any]:
         sys.modules["inventory_core"] = module
         spec.loader.exec_module(module)
         print(f"Falling back to pure-Python inventory core at {module_path}")
+    return module
+
+
+def _load_inventory_manager() -> Type[Any]:
+    """Load the inventory core, preferring the compiled extension when available.
+
+    ``INVENTORY_ENGINE=columnar`` selects the NumPy-backed columnar engine instead.
+    """
+
+    engine = os.environ.get("INVENTORY_ENGINE", "core").strip().lower()
+    if engine == "columnar":
+        module = import_module("inventory_columnar")
+        print(f"Using columnar inventory engine from {module.__file__}")
+    elif engine != "core":
+        raise ImportError(f"Unknown INVENTORY_ENGINE {engine!r}; expected 'core' or 'columnar'")
+    else:
+        module = _import_inventory_core()
 
     manager = getattr(module, "InventoryManager", None)
     if manager is None:
-        raise ImportError("inventory_core module does not expose InventoryManager")
+        raise ImportError(f"{module.__name__} module does not expose InventoryManager")
 
     return manager  # type: ignore[return-value]
 
 
 InventoryManager = _load_inventory_manager()
 
+# Unix socket of a shared inventory owner process (inventory_owner.py); enables INVENTORY_WORKERS > 1
+INVENTORY_OWNER = os.environ.get("INVENTORY_OWNER")
+
+
+def _open_inventory() -> Any:
+    """Create the inventory, wrapped in the write-ahead log when ``INVENTORY_DATA_DIR`` is set.
+
+    ``INVENTORY_SNAPSHOT`` names a binary snapshot (see ``inventory_snapshot``)
+    to start from; a data directory that already holds state takes precedence.
+    ``INVENTORY_FSYNC=always`` (default) acknowledges writes only once they are
+    on disk; ``interval`` syncs in the background and may lose the last few
+    milliseconds of writes on a crash.
+    """
+    global inventory_preloaded
+
+    if INVENTORY_OWNER:
+        authkey = os.environ.get("INVENTORY_OWNER_KEY", DEFAULT_AUTHKEY.decode()).encode()
+        print(f"Using shared inventory owner at {INVENTORY_OWNER}")
+        return connect_owner(INVENTORY_OWNER, authkey)
+
+    manager = InventoryManager()
+    snapshot_path = os.environ.get("INVENTORY_SNAPSHOT")
+    if snapshot_path:
+        snapshot = load_snapshot(manager, snapshot_path)
+        print(f"snapshot: loaded {snapshot.count} items from {snapshot_path}")
+        inventory_preloaded = True
+
+    data_dir = os.environ.get("INVENTORY_DATA_DIR")
+    if not data_dir:
+        return manager
+
+    policy = os.environ.get("INVENTORY_FSYNC", "always").strip().lower()
+    if policy not in ("always", "interval"):
+        raise ValueError(f"Unknown INVENTORY_FSYNC {policy!r}; expected 'always' or 'interval'")
+    # Request handlers await the fsync themselves so concurrent writes share it
+    durable = DurableInventory(manager, data_dir, fsync="manual" if policy == "always" else policy)
+    recovery = durable.recovery
+    print(
+        f"persistence: recovered {recovery['snapshot_items']} snapshot items and "
+        f"{recovery['replayed']} log records from {data_dir}"
+    )
+    if recovery["fresh"]:
+        if inventory_preloaded:
+            # Persist the imported snapshot so later restarts recover it from the data directory
+            durable.checkpoint()
+    else:
+        inventory_preloaded = True
+    return durable
+
 app = FastAPI(
     title="High-Performance Inventory API",
     description="BST-based Inventory Management System", 
@@ -56,13 +147,68 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# Initialize inventory manager
-inventory = InventoryManager()
+# Initialize inventory manager; the startup hook only seeds demo data when nothing was loaded
+inventory_preloaded = False
+inventory = _open_inventory()
+
+# Single writer path: every mutation (and every swap of ``inventory``) happens
+# under _write_lock and bumps _inventory_version when it completes. Readers that
+# work off the event loop take an immutable view instead of touching the engine.
+_write_lock = threading.Lock()
+_inventory_version = 0
+_cached_view: Optional[InventoryView[Any]] = None
+# Item-level changes of the write in progress, published on the change feed with its version
+_pending_changes: List[Dict[str, Any]] = []
+# ETags pair an epoch with the engine's version. The epoch changes whenever the
+# inventory is reseeded, because a new engine starts counting again; the pair is
+# swapped as one tuple so the event loop can read it without the writer lock.
+_etag_source: Tuple[str, Any] = (os.urandom(4).hex(), inventory)
+# Read views that raced a write are rebuilt this many times before one is
+# built under the writer lock instead
+READ_VIEW_ATTEMPTS = 3
 
 TARGET_ITEM_COUNT = 100
 
+MAX_PAGE_SIZE = 5000
+# A bulk insert holds the writer lock on the event loop for the whole batch
+MAX_BULK_ITEMS = 5000
+
+# Serialized bodies of the derived read endpoints are kept per inventory version
+RESPONSE_CACHE_BYTES = int(os.environ.get("INVENTORY_RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+RESPONSE_CACHE_PATH_PREFIXES = ("/statistics/", "/low-stock/", "/tree-info/", "/tree-visualization/", "/items/search/", "/items/query")
+
+EXPORT_FIELDS = ("id", "name", "category", "price", "quantity")
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Item lists can also be sent as blocks of columns, each with its own table of
+# distinct categories, so keys and repeated category strings are sent once per
+# block instead of once per row; JSON blocks form an array, msgpack blocks are
+# simply concatenated. Blocks hold EXPORT_CHUNK_ROWS rows.
+JSON_MEDIA_TYPE = "application/json"
+COLUMNS_MEDIA_TYPE = "application/vnd.inventory.columns+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ITEM_MEDIA_TYPES = {JSON_MEDIA_TYPE: "json", COLUMNS_MEDIA_TYPE: "columns", MSGPACK_MEDIA_TYPE: "msgpack"}
+ITEM_LIST_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {"content": {COLUMNS_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}}, "description": "Successful Response"}
+}
+
+# Write batches kept for change-feed clients to resume from; bursts of writes
+# are merged into one event per CHANGE_FEED_COALESCE_SECONDS
+CHANGE_FEED_PATH = "/changes/"
+CHANGE_FEED_HISTORY = 1024
+CHANGE_FEED_COALESCE_SECONDS = 0.05
+CHANGE_FEED_KEEPALIVE_SECONDS = 15.0
+CHANGE_FEED_RETRY_MS = 2000
+
+# Responses smaller than this are not worth compressing. Level 5 gets within
+# about 10% of level 9's size on item JSON at a tenth of the CPU time.
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 5
+
 DEMO_ITEMS = (
     {"name": "Atlas Hammer Pro", "category": "Hand Tools", "price": 24.99, "quantity": 18},
     {"name": "Nova Drill 18V", "category": "Power Tools", "price": 149.0, "quantity": 9},
@@ -111,38 +257,489 @@ def _generate_seed_items(desired_count: int) -> List[dict]:
     return items
 
 
+@contextmanager
+def _writing() -> Iterator[Any]:
+    """Hold the writer lock around a mutation and publish it when the block succeeds.
+
+    Changes recorded with ``_record_change`` inside the block go out on the
+    change feed under the new version; they are dropped if the block raises.
+    A block that records nothing and leaves the engine's version alone (say,
+    a DELETE of a missing id) publishes nothing, so views, ETags and cached
+    responses stay valid.
+    """
+    global _inventory_version
+    with _write_lock:
+        store = inventory
+        # A shared owner's version is a round trip away; every write to it records its change
+        before = None if INVENTORY_OWNER else store.version
+        try:
+            yield store
+        except BaseException:
+            _pending_changes.clear()
+            raise
+        if not _pending_changes and (INVENTORY_OWNER or store.version == before):
+            return
+        _inventory_version += 1
+        change_feed.publish(_inventory_version, list(_pending_changes))
+        _pending_changes.clear()
+
+
+def _record_change(change_type: str, **fields: Any) -> None:
+    """Note an ``added``/``updated`` item, a ``removed`` id or a ``reset``; only inside ``_writing()``."""
+    _pending_changes.append({"type": change_type, **fields})
+
+
+def _read_view() -> InventoryView[Any]:
+    """Return an immutable view of the inventory as of the last published write.
+
+    Engines with ``snapshot()`` build and cache the view themselves, sharing
+    their stored rows. The compiled core packs its items into columns
+    (``get_columns()``) under its own lock and without the GIL, and the view
+    decodes rows from them on demand; it is cached here per version. A shared
+    owner serializes reads itself and other workers write to it too, so that
+    view is never cached.
+
+    The writer lock is held only to pick up the engine and its version. Every
+    view is built without it, and kept only if no write was published in the
+    meantime, so a build that raced a write (and may have read it half-done)
+    is thrown away and retried.
+    """
+    global _cached_view
+    with _write_lock:
+        engine, version, cached = inventory, _inventory_version, _cached_view
+    if INVENTORY_OWNER:
+        return _items_view(engine, engine.get_all_items())
+
+    for _ in range(READ_VIEW_ATTEMPTS):
+        if cached is not None and cached.version == version:
+            return cached
+        try:
+            view: Optional[InventoryView[Any]] = _build_view(engine, version)
+        except Exception:
+            view = None  # torn by a concurrent write; the version check below sends us round again
+        with _write_lock:
+            if view is not None and _inventory_version == version:
+                if not hasattr(engine, "snapshot"):
+                    _cached_view = view
+                return view
+            engine, version, cached = inventory, _inventory_version, _cached_view
+    # Writes keep landing during every build; build one under the lock so readers still progress
+    with _write_lock:
+        view = _build_view(inventory, _inventory_version)
+        if not hasattr(inventory, "snapshot"):
+            _cached_view = view
+        return view
+
+
+def _build_view(engine: Any, version: int) -> InventoryView[Any]:
+    if hasattr(engine, "snapshot"):
+        return engine.snapshot()
+    if hasattr(engine, "get_columns"):
+        columns = InventorySnapshot.from_buffer(engine.get_columns())
+        return columns.as_view(version, engine.get_statistics())
+    return _items_view(engine, engine.get_all_items(), version)
+
+
+def _items_view(engine: Any, items: List[dict], version: int = 0) -> InventoryView[dict]:
+    # ``dict`` hands each reader its own copy, as the engines do
+    return InventoryView(version, items, [item["id"] for item in items], engine.get_statistics(), dict)
+
+
+def _inventory_etag() -> str:
+    """Entity tag for every read of the current inventory contents."""
+    if INVENTORY_OWNER:
+        epoch, version = inventory.get_version()
+    else:
+        # One tuple read, so a reseed cannot pair the old epoch with the new engine
+        epoch, engine = _etag_source
+        version = engine.version
+    # Weak: equal tags promise equal data, not byte-identical bodies
+    return f'W/"{epoch}-{version}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """LRU map from (path, query, ETag) to a ready-to-send response body.
+
+    The ETag names the inventory version, so entries never go stale; those of
+    older versions simply stop being asked for and age out. ``max_bytes`` caps
+    the stored bodies; a body larger than the cap is not stored at all. Only
+    touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[bytes, str]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple[Any, ...], body: bytes, media_type: str) -> None:
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous[0])
+        self._entries[key] = (body, media_type)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+
+
+class ChangeFeed:
+    """Bounded history of the change batches published by writes, for live clients.
+
+    Each batch holds the item-level changes of one write, keyed by the API's
+    inventory version. ``epoch`` is fresh for every process, so versions from an
+    earlier run are never mistaken for current ones. ``publish`` may be called
+    from any thread; waiters are woken on their own event loop.
+    """
+
+    def __init__(self, history: int) -> None:
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self._batches: Deque[Tuple[int, List[Dict[str, Any]]]] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def publish(self, version: int, changes: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._batches.append((version, changes))
+            self.version = version
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # pragma: no cover - the waiter's loop already closed
+                pass
+
+    def since(self, version: int) -> Tuple[int, Optional[List[List[Dict[str, Any]]]]]:
+        """Return the latest version and the batches published after ``version``.
+
+        The batches are ``None`` when some of them have already left the
+        history (or ``version`` is unknown), so the client must reload instead.
+        """
+        with self._lock:
+            if version == self.version:
+                return version, []
+            if version > self.version or not self._batches or self._batches[0][0] > version + 1:
+                return self.version, None
+            return self.version, [changes for published, changes in self._batches if published > version]
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        """Wait until a version newer than ``version`` is published; ``False`` on timeout."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self.version != version:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+change_feed = ChangeFeed(CHANGE_FEED_HISTORY)
+
+
+def _coalesce_changes(batches: Iterable[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """Merge write batches into at most one change per item, or ``None`` if the inventory was replaced."""
+    merged: Dict[int, Dict[str, Any]] = {}
+    for batch in batches:
+        for change in batch:
+            if change["type"] == "reset":
+                return None
+            item_id = change["id"] if change["type"] == "removed" else change["item"]["id"]
+            earlier = merged.pop(item_id, None)
+            if earlier is not None and earlier["type"] == "added":
+                # The client never saw the item, so it stays an addition or vanishes
+                if change["type"] == "removed":
+                    continue
+                change = {"type": "added", "item": change["item"]}
+            merged[item_id] = change
+    return list(merged.values())
+
+
+def _sse_message(event: str, version: int, data: Dict[str, Any]) -> bytes:
+    # Compact JSON never contains a newline, so the data fits on one line
+    return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (
+        change_feed.epoch.encode(), version, event.encode(), _encode_json(data)
+    )
+
+
+async def _change_events(version: int, first_event: str) -> AsyncIterator[bytes]:
+    """Yield server-sent events for the changes after ``version``, until the client goes away."""
+    yield b"retry: %d\n" % CHANGE_FEED_RETRY_MS + _sse_message(first_event, version, {"version": version})
+    while True:
+        if not await change_feed.wait(version, CHANGE_FEED_KEEPALIVE_SECONDS):
+            yield b": keepalive\n\n"
+            continue
+        # Let a burst of writes finish so it goes out as one event
+        await asyncio.sleep(CHANGE_FEED_COALESCE_SECONDS)
+        version, batches = change_feed.since(version)
+        changes = _coalesce_changes(batches) if batches is not None else None
+        if changes is None:
+            yield _sse_message("reset", version, {"version": version})
+        elif changes:
+            yield _sse_message("changes", version, {"version": version, "changes": changes})
+
+
 def rebuild_inventory(desired_count: int = TARGET_ITEM_COUNT) -> int:
-    """Reset the in-memory inventory to a controlled demo dataset."""
-    global inventory
+    """Reset the in-memory inventory to a controlled demo dataset.
+
+    The new dataset is built off to the side and published in one step, so
+    readers see either the old inventory or the new one, never a mix.
+    """
+    global inventory, _etag_source
+
+    rows = _generate_seed_items(desired_count)
+    if INVENTORY_OWNER:
+        with _writing() as owner:
+            _record_change("reset")
+            return owner.rebuild(rows)
 
     manager = InventoryManager()
-    seed_items = _generate_seed_items(desired_count)
+    result = manager.add_items(rows)
 
-    for payload in seed_items:
-        try:
-            manager.add_item(
-                payload["name"],
-                payload["category"],
-                payload["price"],
-                payload["quantity"],
-            )
-        except Exception as exc:  # pragma: no cover - defensive logging
-            print(f"seed: failed to insert {payload['name']}: {exc}")
+    for error in result["errors"]:  # pragma: no cover - defensive logging
+        print(f"seed: failed to insert row {error['index']}: {error['error']}")
+
+    with _writing() as current:
+        _record_change("reset")
+        if isinstance(current, DurableInventory):
+            # Persist the new dataset as a snapshot instead of logging every row
+            current.reset(manager)
+        else:
+            inventory = manager
+        # A new epoch even when the durable store swaps its engine in place: the
+        # version read without the lock may be briefly off while it does
+        _etag_source = (os.urandom(4).hex(), inventory)
+    return result["inserted"]
+
+
+async def _commit_writes() -> None:
+    """Wait until the preceding mutation is on disk when writes are acknowledged durably.
+
+    Must be awaited right after the mutation, before any other await, so the
+    log position read here is the request's own.
+    """
+    if isinstance(inventory, DurableInventory) and inventory.fsync_policy == "manual":
+        await asyncio.to_thread(inventory.sync, inventory.written_lsn)
+
+
+def _encode_json(content: Any) -> bytes:
+    """Encode plain lists and dicts as compact JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _item_media_type(accept: Optional[str]) -> str:
+    """Pick the representation of an item list from an ``Accept`` header.
+
+    The first supported type the client lists wins (quality values other than
+    ``q=0`` are not ranked); anything else gets JSON.
+    """
+    for entry in (accept or "").split(","):
+        media_type, *params = [part.strip().lower() for part in entry.split(";")]
+        if any(param.replace(" ", "") in ("q=0", "q=0.0") for param in params):
+            continue
+        if media_type == "application/x-msgpack":
+            media_type = MSGPACK_MEDIA_TYPE
+        if media_type == MSGPACK_MEDIA_TYPE and msgpack is None:
+            continue
+        if media_type in ITEM_MEDIA_TYPES:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def _column_block(rows: List[dict]) -> Dict[str, Any]:
+    categories: Dict[str, int] = {}
+    codes = [categories.setdefault(row["category"], len(categories)) for row in rows]
+    return {
+        "id": [row["id"] for row in rows],
+        "name": [row["name"] for row in rows],
+        "categories": list(categories),
+        "category": codes,
+        "price": [row["price"] for row in rows],
+        "quantity": [row["quantity"] for row in rows],
+    }
+
+
+def _packed_column_block(packed: InventorySnapshot, start: int, stop: int) -> Dict[str, Any]:
+    """``_column_block`` for rows ``start:stop`` of packed columns, read without building rows."""
+    categories: Dict[int, int] = {}
+    codes = [categories.setdefault(code, len(categories)) for code in packed.category_codes[start:stop]]
+    return {
+        "id": packed.ids[start:stop].tolist(),
+        "name": [packed.names[index] for index in range(start, stop)],
+        "categories": [packed.categories[code] for code in categories],
+        "category": codes,
+        "price": packed.prices[start:stop].tolist(),
+        "quantity": packed.quantities[start:stop].tolist(),
+    }
+
+
+# What an engine scan hands back: rows, or packed columns from a ``*_columns`` variant
+ScanResult = Union[List[dict], InventorySnapshot]
+
+
+def _scan(method: str, *args: Any, **kwargs: Any) -> ScanResult:
+    """Run an engine scan, through its ``<method>_columns`` variant when the engine has one.
+
+    The compiled core's variants return their rows as packed columns (see
+    ``InventorySnapshot.from_buffer``), so no dict is built per row: column
+    blocks are cut straight from them, and JSON rows only exist one chunk at
+    a time while they are encoded.
+    """
+    columnar = getattr(inventory, f"{method}_columns", None)
+    if columnar is None:
+        return getattr(inventory, method)(*args, **kwargs)
+    return InventorySnapshot.from_buffer(columnar(*args, **kwargs))
 
-    inventory = manager
-    return len(manager.get_all_items())
+
+def _scan_row(items: ScanResult, index: int) -> InventoryItem:
+    return items.item(index) if isinstance(items, InventorySnapshot) else items[index]
+
+
+def _item_chunks(
+    items: Union[Iterable[dict], InventorySnapshot], media_type: str = JSON_MEDIA_TYPE, limit: Optional[int] = None
+) -> Iterator[bytes]:
+    """Encode up to ``limit`` items in the given representation, one chunk per EXPORT_CHUNK_ROWS rows.
+
+    The engines already return exactly the ``ItemResponse`` fields with the
+    right types, so rows are encoded as they are, without a model per item.
+    """
+    if isinstance(items, InventorySnapshot):
+        packed = items
+        count = len(packed) if limit is None else min(limit, len(packed))
+        spans = [(start, min(start + EXPORT_CHUNK_ROWS, count)) for start in range(0, count, EXPORT_CHUNK_ROWS)]
+        row_blocks: Iterator[List[Any]] = ([packed.item(index) for index in range(*span)] for span in spans)
+        column_blocks = (_packed_column_block(packed, *span) for span in spans)
+    else:
+        rows = islice(items, limit)
+        row_blocks = iter(lambda: list(islice(rows, EXPORT_CHUNK_ROWS)), [])
+        column_blocks = map(_column_block, row_blocks)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        for block in column_blocks:
+            yield msgpack.packb(block)
+        return
+
+    yield b"["
+    separator = b""
+    if media_type == COLUMNS_MEDIA_TYPE:
+        encoded_blocks = map(_encode_json, column_blocks)
+    else:
+        encoded_blocks = (_encode_json(block)[1:-1] for block in row_blocks)
+    for encoded in encoded_blocks:
+        yield separator + encoded
+        separator = b","
+    yield b"]"
+
+
+def _items_response(
+    items: ScanResult,
+    media_type: str = JSON_MEDIA_TYPE,
+    headers: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+) -> Response:
+    """Send up to ``limit`` engine rows; the routes keep their ``response_model`` only for the OpenAPI schema."""
+    content = b"".join(_item_chunks(items, media_type, limit))
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def _export_chunks(items: Iterable[dict], export_format: str) -> Iterator[bytes]:
+    """Encode items as CSV or NDJSON, yielding one bytes chunk per EXPORT_CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+        # Flush the header on its own so the client receives the first byte immediately
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    rows = 0
+    for item in items:
+        if export_format == "csv":
+            writer.writerow([item[field] for field in EXPORT_FIELDS])
+        else:
+            buffer.write(json.dumps({field: item[field] for field in EXPORT_FIELDS}))
+            buffer.write("\n")
+        rows += 1
+        if rows == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    if rows:
+        yield buffer.getvalue().encode()
 
 # ... rest of your main.py code continues unchanged ...
 # Startup seeding: ensure we have at least N sample hardware items for the demo
 @app.on_event("startup")
 async def seed_sample_items():
+    if inventory_preloaded:
+        print("seed: keeping the loaded inventory")
+        return
     try:
         await asyncio.sleep(0.01)
-        total = rebuild_inventory(TARGET_ITEM_COUNT)
+        if INVENTORY_OWNER:
+            # Every worker asks; the owner seeds only once, and only if it started empty
+            total = inventory.rebuild(_generate_seed_items(TARGET_ITEM_COUNT), True)
+            if total is None:
+                print("seed: keeping the owner's inventory")
+                return
+        else:
+            total = rebuild_inventory(TARGET_ITEM_COUNT)
         print(f"seed: demo dataset prepared with {total} items")
     except Exception as e:  # pragma: no cover - startup resilience
         print(f"seed: failed: {e}")
 
+@app.on_event("shutdown")
+async def close_inventory():
+    if isinstance(inventory, DurableInventory):
+        inventory.close()
+
 # Pydantic models
 class ItemCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -163,30 +760,226 @@ class ItemResponse(BaseModel):
     price: float
     quantity: int
 
+class BulkItemError(BaseModel):
+    index: int
+    error: str
+
+class BulkCreateResponse(BaseModel):
+    inserted: int
+    first_id: Optional[int]
+    last_id: Optional[int]
+    errors: List[BulkItemError]
+
 class StatisticsResponse(BaseModel):
     total_items: int
     total_value: float
     tree_height: int
     unique_categories: int
 
+class QueryResponse(BaseModel):
+    total: int
+    items: List[ItemResponse]
+
+# Reads of the inventory are tagged with its version; a client that presents the
+# current tag gets an empty 304 instead of a re-serialized body
+ETAG_PATH_PREFIXES = ("/items", "/statistics/", "/low-stock/", "/tree-info/", "/tree-visualization/")
+# Lists that negotiate their representation (see _item_media_type)
+NEGOTIATED_PATHS = ("/items/", "/items/search/name/", "/items/search/category/")
+
+class ConditionalReadsMiddleware:
+    """Tag inventory reads, answer matching ``If-None-Match`` with 304 and serve cached bodies.
+
+    Plain ASGI rather than ``@app.middleware`` so responses pass through as
+    the endpoints sent them: a streamed body stays streamed, and a complete
+    body still arrives in one message, which GZipMiddleware's size threshold needs.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(ETAG_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        path = scope["path"]
+        # Taken before the read: if a write lands meanwhile, the tag is merely stale
+        # and the client's next request gets a fresh body instead of a wrong 304
+        etag = _inventory_etag()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if path in NEGOTIATED_PATHS:
+            representation = ITEM_MEDIA_TYPES[_item_media_type(request.headers.get("accept"))]
+            if representation != "json":
+                # Every representation needs its own tag
+                headers["ETag"] = etag = f'{etag[:-1]}-{representation}"'
+            headers["Vary"] = "Accept"
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        cacheable = path.startswith(RESPONSE_CACHE_PATH_PREFIXES)
+        key = (path, tuple(sorted(request.query_params.multi_items())), etag)
+        cached = response_cache.get(key) if cacheable else None
+        if cached is not None:
+            body, media_type = cached
+            await Response(content=body, media_type=media_type, headers=headers)(scope, receive, send)
+            return
+
+        # A cacheable 200 is held back until its body is complete
+        held: List[Dict[str, Any]] = []
+        chunks: List[bytes] = []
+
+        async def send_tagged(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                MutableHeaders(raw=message["headers"]).update(headers)
+                if cacheable:
+                    held.append(message)
+                else:
+                    await send(message)
+            elif message["type"] == "http.response.body" and held:
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                body = b"".join(chunks)
+                start = held.pop()
+                response_cache.put(key, body, MutableHeaders(raw=start["headers"]).get("content-type", JSON_MEDIA_TYPE))
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_tagged)
+
+app.add_middleware(ConditionalReadsMiddleware)
+class CompressionMiddleware(GZipMiddleware):
+    """GZip, except for the change feed: compressed events would sit in the encoder's buffer."""
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http" and scope["path"] == CHANGE_FEED_PATH:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Added last so it wraps everything above: compresses streamed bodies chunk by
+# chunk as they are sent, and leaves the cached bodies uncompressed
+app.add_middleware(CompressionMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
 # API Routes
 @app.post("/items/", response_model=dict)
 async def create_item(item: ItemCreate):
     """Add new item to inventory"""
     try:
-        item_id = inventory.add_item(
-            item.name, item.category, item.price, item.quantity
-        )
+        with _writing() as store:
+            item_id = store.add_item(item.name, item.category, item.price, item.quantity)
+            _record_change("added", item=store.get_item(item_id))
+        await _commit_writes()
         return {"message": "Item added successfully", "id": item_id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/items/", response_model=List[ItemResponse])
-async def get_all_items():
-    """Get all items from inventory"""
+@app.post("/items/bulk", response_model=BulkCreateResponse)
+async def create_items_bulk(items: List[Dict[str, Any]] = Body(...)):
+    """Add a batch of up to ``MAX_BULK_ITEMS`` items in one call; invalid rows are reported instead of failing the batch"""
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per batch; split larger imports"
+        )
+    try:
+        with _writing() as store:
+            result = store.add_items(items)
+            if result["inserted"]:
+                # The batch holds consecutive ids and nothing else can write meanwhile
+                for row in store.get_items_page(result["inserted"], result["first_id"] - 1):
+                    _record_change("added", item=row)
+        await _commit_writes()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/items/", response_model=List[ItemResponse], responses=ITEM_LIST_RESPONSES)
+async def get_all_items(
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    after_id: Annotated[int, Query(ge=0)] = 0,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    """Get all items from inventory, or one page of them when ``limit`` is given.
+
+    Paged responses carry the cursor for the following page in ``X-Next-Cursor``
+    (pass it back as ``after_id``); the header is absent on the last page.
+    ``Accept`` selects JSON rows, column blocks or msgpack column blocks.
+    """
+    media_type = _item_media_type(accept)
+    try:
+        if limit is None:
+            # Materializing every item is slow on large inventories, so the
+            # rows are encoded chunk by chunk in the thread pool as they are
+            # sent, from an immutable view of one version
+            view = await asyncio.to_thread(_read_view)
+            if len(view) <= EXPORT_CHUNK_ROWS:
+                # A single chunk anyway; sent whole, it keeps its Content-Length
+                # and small bodies stay below the compression threshold
+                return _items_response(view.get_all_items(), media_type)
+            return StreamingResponse(_item_chunks(view.iter_items(), media_type), media_type=media_type)
+
+        # Fetch one extra row to learn whether another page exists
+        page = _scan("get_items_page", limit + 1, after_id)
+        headers = {"X-Next-Cursor": str(_scan_row(page, limit - 1)["id"])} if len(page) > limit else {}
+        return _items_response(page, media_type, headers, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/items/export")
+async def export_items(export_format: Literal["csv", "ndjson"] = Query("csv", alias="format")):
+    """Stream the whole inventory as CSV or NDJSON in fixed-size chunks"""
+    # Stream one immutable version so concurrent writes or a reseed cannot tear the export
+    items = (await asyncio.to_thread(_read_view)).iter_items()
+    return StreamingResponse(
+        _export_chunks(items, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="inventory.{export_format}"'},
+    )
+
+@app.get("/items/query", response_model=QueryResponse)
+async def query_items(
+    name: Annotated[Optional[str], Query(min_length=1)] = None,
+    category: Annotated[Optional[str], Query(min_length=1)] = None,
+    min_price: Annotated[Optional[float], Query()] = None,
+    max_price: Annotated[Optional[float], Query()] = None,
+    min_quantity: Annotated[Optional[int], Query()] = None,
+    max_quantity: Annotated[Optional[int], Query()] = None,
+    sort: Annotated[Literal["id", "name", "price", "quantity"], Query()] = "id",
+    order: Annotated[Literal["asc", "desc"], Query()] = "asc",
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 100,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    """Get one page of the items matching every given filter, plus how many matched in all.
+
+    ``name`` matches a substring and ``category`` the whole category, both
+    ignoring case; price and quantity bounds are inclusive. The engine starts
+    from whichever filter its indexes say is most selective.
+    """
     try:
-        items = inventory.get_all_items()
-        return [ItemResponse(**item) for item in items]
+        # The compiled core's columnar variant returns the page as packed columns
+        columnar = getattr(inventory, "query_items_columns", None)
+        result = (columnar or inventory.query_items)(
+            name=name,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            offset=offset,
+        )
+        if columnar is None:
+            return Response(content=_encode_json(result), media_type=JSON_MEDIA_TYPE)
+        items = b"".join(_item_chunks(InventorySnapshot.from_buffer(result["items"])))
+        return Response(content=b'{"total":%d,"items":%s}' % (result["total"], items), media_type=JSON_MEDIA_TYPE)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -207,30 +1000,33 @@ async def get_item(item_id: int):
 async def update_item(item_id: int, item: ItemUpdate):
     """Update existing item"""
     try:
-        # Get current item
-        current = inventory.get_item(item_id)
-        if not current:
-            raise HTTPException(status_code=404, detail="Item not found")
-        
-        # Update only provided fields
-        update_data = {
-            "name": item.name or current["name"],
-            "category": item.category or current["category"],
-            "price": item.price or current["price"],
-            "quantity": item.quantity or current["quantity"]
-        }
-        
-        success = inventory.update_item(
-            item_id, 
-            update_data["name"],
-            update_data["category"],
-            update_data["price"],
-            update_data["quantity"]
-        )
-        
-        if not success:
-            raise HTTPException(status_code=400, detail="Failed to update item")
-            
+        # Read and write under one lock so the merge cannot lose a concurrent update
+        with _writing() as store:
+            current = store.get_item(item_id)
+            if not current:
+                raise HTTPException(status_code=404, detail="Item not found")
+
+            # Update only provided fields
+            update_data = {
+                "name": item.name or current["name"],
+                "category": item.category or current["category"],
+                "price": item.price or current["price"],
+                "quantity": item.quantity or current["quantity"]
+            }
+
+            success = store.update_item(
+                item_id,
+                update_data["name"],
+                update_data["category"],
+                update_data["price"],
+                update_data["quantity"]
+            )
+
+            if not success:
+                raise HTTPException(status_code=400, detail="Failed to update item")
+            _record_change("updated", item=store.get_item(item_id))
+        await _commit_writes()
+
         return {"message": "Item updated successfully"}
     except HTTPException:
         raise
@@ -241,32 +1037,95 @@ async def update_item(item_id: int, item: ItemUpdate):
 async def delete_item(item_id: int):
     """Delete item from inventory"""
     try:
-        success = inventory.remove_item(item_id)
+        with _writing() as store:
+            success = store.remove_item(item_id)
+            if success:
+                _record_change("removed", id=item_id)
         if not success:
             raise HTTPException(status_code=404, detail="Item not found")
+        await _commit_writes()
         return {"message": "Item deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/items/search/name/")
-async def search_by_name(name: str = Query(..., min_length=1)):
+@app.get("/items/search/name/", responses=ITEM_LIST_RESPONSES)
+async def search_by_name(
+    name: str = Query(..., min_length=1), accept: Annotated[Optional[str], Header()] = None
+):
     """Search items by name"""
     try:
-        items = inventory.search_by_name(name)
-        return [ItemResponse(**item) for item in items]
+        return _items_response(_scan("search_by_name", name), _item_media_type(accept))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/items/search/category/")
-async def search_by_category(category: str = Query(..., min_length=1)):
+@app.get("/items/search/category/", responses=ITEM_LIST_RESPONSES)
+async def search_by_category(
+    category: str = Query(..., min_length=1), accept: Annotated[Optional[str], Header()] = None
+):
     """Search items by category"""
     try:
-        items = inventory.search_by_category(category)
-        return [ItemResponse(**item) for item in items]
+        return _items_response(_scan("search_by_category", category), _item_media_type(accept))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _parse_range_cursor(cursor: str) -> Tuple[float, int]:
+    value, _, item_id = cursor.rpartition(":")
+    try:
+        return float(value), int(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+@app.get("/items/range/", response_model=List[ItemResponse])
+async def get_items_in_range(
+    field: Annotated[Literal["id", "price", "quantity"], Query()] = "id",
+    min_value: Annotated[Optional[float], Query(alias="min")] = None,
+    max_value: Annotated[Optional[float], Query(alias="max")] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 100,
+    cursor: Annotated[Optional[str], Query()] = None,
+):
+    """Get items whose id, price or quantity lies in ``[min, max]``, ordered by that field then id.
+
+    Like ``GET /items/?limit=``, responses carry ``X-Next-Cursor`` while more
+    items match; pass it back as ``cursor``.
+    """
+    after = _parse_range_cursor(cursor) if cursor else None
+    try:
+        page = _scan("get_items_in_range", field, min_value, max_value, limit + 1, after)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    headers = {}
+    if len(page) > limit:
+        last = _scan_row(page, limit - 1)
+        headers["X-Next-Cursor"] = f"{last[field]!r}:{last['id']}"
+    return _items_response(page, headers=headers, limit=limit)
+
+@app.get(CHANGE_FEED_PATH)
+async def stream_changes(last_event_id: Annotated[Optional[str], Header()] = None):
+    """Stream item changes as server-sent events.
+
+    A ``ready`` event marks where the stream starts; each ``changes`` event
+    carries the new version and the merged ``added``/``updated`` items and
+    ``removed`` ids since the previous event. ``reset`` means the inventory was
+    replaced or the client fell too far behind, so it must reload everything.
+    Reconnecting clients resume from ``Last-Event-ID`` (``EventSource`` sends it
+    automatically).
+    """
+    if INVENTORY_OWNER:
+        raise HTTPException(status_code=501, detail="The change feed only sees this worker's writes; unavailable with INVENTORY_OWNER")
+    version, first_event = change_feed.version, "ready"
+    if last_event_id:
+        epoch, _, last_version = last_event_id.partition("-")
+        if epoch == change_feed.epoch and last_version.isdigit():
+            version = int(last_version)
+        else:
+            first_event = "reset"
+    return StreamingResponse(
+        _change_events(version, first_event),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/statistics/", response_model=StatisticsResponse)
 async def get_statistics():
@@ -281,288 +1140,24 @@ async def get_statistics():
 async def get_low_stock(threshold: int = Query(5, ge=0)):
     """Get low stock items"""
     try:
-        items = inventory.get_low_stock(threshold)
-        return [ItemResponse(**item) for item in items]
+        return _items_response(_scan("get_low_stock", threshold))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/tree-info/")
 async def get_tree_info():
-    """Get BST structure information"""
+    """Get BST structure information (per-node balance and depth plus balance metrics)"""
     try:
-        # Try to use the core's get_tree_info if it returns rich data
-        tree_info = inventory.get_tree_info()
-
-        # Detect whether the returned structure contains AVL metrics (balance/depth)
-        nodes = tree_info.get('nodes') if isinstance(tree_info, dict) else None
-        has_balance = False
-        if nodes and isinstance(nodes, list) and len(nodes) > 0:
-            # nodes may be dicts coming from C++ wrapper with 'balance' key
-            first = nodes[0]
-            if isinstance(first, dict) and 'balance' in first:
-                has_balance = True
-
-        if has_balance:
-            return tree_info
-
-        # Fall back: build an AVL-like structure from the item list and compute metrics
-        items = inventory.get_all_items()
-
-        # Simple AVL node class for python-side analysis
-        class Node:
-            __slots__ = ("item", "left", "right", "height")
-            def __init__(self, item):
-                self.item = item
-                self.left = None
-                self.right = None
-                self.height = 1
-
-        def height(n):
-            return n.height if n else 0
-
-        def update_height(n):
-            if n:
-                n.height = 1 + max(height(n.left), height(n.right))
-
-        def get_balance(n):
-            return (height(n.left) - height(n.right)) if n else 0
-
-        def right_rotate(y):
-            x = y.left
-            T2 = x.right
-            x.right = y
-            y.left = T2
-            update_height(y)
-            update_height(x)
-            return x
-
-        def left_rotate(x):
-            y = x.right
-            T2 = y.left
-            y.left = x
-            x.right = T2
-            update_height(x)
-            update_height(y)
-            return y
-
-        def avl_insert(node, item):
-            if not node:
-                return Node(item)
-            # Use id as key to reproduce the BST ordering used elsewhere
-            if item['id'] < node.item['id']:
-                node.left = avl_insert(node.left, item)
-            elif item['id'] > node.item['id']:
-                node.right = avl_insert(node.right, item)
-            else:
-                # replace
-                node.item = item
-                return node
-
-            update_height(node)
-            bal = get_balance(node)
-
-            # LL
-            if bal > 1 and item['id'] < node.left.item['id']:
-                return right_rotate(node)
-            # RR
-            if bal < -1 and item['id'] > node.right.item['id']:
-                return left_rotate(node)
-            # LR
-            if bal > 1 and item['id'] > node.left.item['id']:
-                node.left = left_rotate(node.left)
-                return right_rotate(node)
-            # RL
-            if bal < -1 and item['id'] < node.right.item['id']:
-                node.right = right_rotate(node.right)
-                return left_rotate(node)
-
-            return node
-
-        # Build AVL from items in the order returned by inventory.get_all_items()
-        root = None
-        for it in items:
-            root = avl_insert(root, it)
-
-        # Collect node info via in-order traversal with depth
-        nodes_out = []
-        def inorder(n, depth=0):
-            if not n: return
-            inorder(n.left, depth+1)
-            nodes_out.append({
-                'id': n.item['id'],
-                'name': n.item['name'],
-                'category': n.item['category'],
-                'price': n.item.get('price', 0.0),
-                'quantity': n.item.get('quantity', 0),
-                'balance': get_balance(n),
-                'depth': depth,
-                'height': n.height
-            })
-            inorder(n.right, depth+1)
-
-        inorder(root, 0)
-
-        # metrics
-        count = len(nodes_out)
-        total_value = sum(n['price'] * n['quantity'] for n in nodes_out)
-        tree_height = root.height if root else 0
-        well_balanced = sum(1 for n in nodes_out if abs(n['balance']) <= 1)
-        total_balance = sum(abs(n['balance']) for n in nodes_out)
-        balance_quality = (well_balanced * 100.0 / count) if count else 100.0
-        avg_balance = (total_balance / count) if count else 0.0
-
-        return {
-            'nodes': nodes_out,
-            'count': count,
-            'height': tree_height,
-            'balance_quality': balance_quality,
-            'avg_balance': avg_balance,
-            'well_balanced_nodes': well_balanced,
-            'is_avl_balanced': (balance_quality > 95.0),
-            'total_value': total_value
-        }
+        return inventory.get_tree_info()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get('/tree-visualization/')
 async def tree_visualization():
-    """Return a simple text visualization (list of lines) of the tree used to store items.
-    This will use the core's visualization if available; otherwise build a level-order visualization
-    from a python-side AVL constructed from items.
-    """
+    """Return a text visualization (list of lines) of the AVL tree the core maintains."""
     try:
-        # try core visualization
-        if hasattr(inventory, 'get_tree_visualization'):
-            try:
-                viz = inventory.get_tree_visualization()
-                # If C++ returns a list of strings, wrap them
-                if isinstance(viz, list):
-                    return {'visualization': viz}
-                if isinstance(viz, dict) and 'levels' in viz:
-                    # convert hierarchy dict to flattened lines
-                    lines = []
-                    levels = viz.get('levels', [])
-                    lvlnum = 0
-                    for lvl in levels:
-                        line = f"Level {lvlnum}: "
-                        entries = []
-                        for node in lvl:
-                            if isinstance(node, dict) and node.get('id') is not None:
-                                entries.append(f"[{node.get('id')}]({node.get('balance')})")
-                            else:
-                                entries.append("[.]")
-                        lines.append(line + ' '.join(entries))
-                        lvlnum += 1
-                    return {'visualization': lines}
-            except Exception:
-                # fall through to python-side visualization
-                pass
-
-        # Build python-side AVL and produce level-order lines
-        items = inventory.get_all_items()
-        # reuse local AVL builder from get_tree_info
-        class Node:
-            __slots__ = ("item", "left", "right", "height")
-            def __init__(self, item):
-                self.item = item
-                self.left = None
-                self.right = None
-                self.height = 1
-
-        def height(n):
-            return n.height if n else 0
-
-        def update_height(n):
-            if n:
-                n.height = 1 + max(height(n.left), height(n.right))
-
-        def get_balance(n):
-            return (height(n.left) - height(n.right)) if n else 0
-
-        def right_rotate(y):
-            x = y.left
-            T2 = x.right
-            x.right = y
-            y.left = T2
-            update_height(y)
-            update_height(x)
-            return x
-
-        def left_rotate(x):
-            y = x.right
-            T2 = y.left
-            y.left = x
-            x.right = T2
-            update_height(x)
-            update_height(y)
-            return y
-
-        def avl_insert(node, item):
-            if not node:
-                return Node(item)
-            if item['id'] < node.item['id']:
-                node.left = avl_insert(node.left, item)
-            elif item['id'] > node.item['id']:
-                node.right = avl_insert(node.right, item)
-            else:
-                node.item = item
-                return node
-            update_height(node)
-            bal = get_balance(node)
-            if bal > 1 and item['id'] < node.left.item['id']:
-                return right_rotate(node)
-            if bal < -1 and item['id'] > node.right.item['id']:
-                return left_rotate(node)
-            if bal > 1 and item['id'] > node.left.item['id']:
-                node.left = left_rotate(node.left)
-                return right_rotate(node)
-            if bal < -1 and item['id'] < node.right.item['id']:
-                node.right = right_rotate(node.right)
-                return left_rotate(node)
-            return node
-
-        root = None
-        for it in items:
-            root = avl_insert(root, it)
-
-        # Build a pretty ASCII top-down tree for visualization
-        def ascii_lines(n):
-            """Return list of lines representing the tree rooted at n."""
-            if not n:
-                return []
-
-            lines = []
-
-            def _helper(node, prefix='', is_left=True, is_root=False):
-                if node is None:
-                    return
-
-                # node line
-                bal = get_balance(node)
-                node_label = f"[{node.item['id']}] {node.item['name']} (H:{node.height}, B:{bal})"
-                if is_root:
-                    lines.append(node_label)
-                else:
-                    branch = '├── ' if is_left else '└── '
-                    lines.append(prefix + branch + node_label)
-
-                # compute prefix for children
-                if is_root:
-                    child_prefix = ''
-                else:
-                    child_prefix = prefix + ('│   ' if is_left else '    ')
-
-                # traverse left then right to keep a natural top-down order
-                if node.left:
-                    _helper(node.left, child_prefix, True, False)
-                if node.right:
-                    _helper(node.right, child_prefix, False, False)
-
-            _helper(root, '', True, True)
-            return lines
-
-        return {'visualization': ascii_lines(root)}
+        return {'visualization': inventory.get_tree_visualization()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -577,6 +1172,11 @@ async def seed_endpoint(target: Optional[int] = None):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/admin/cache")
+async def response_cache_stats():
+    """Report the response cache's size and hit/miss counters."""
+    return response_cache.stats()
+
 # Health check
 @app.get("/health")
 async def health_check():
@@ -599,10 +1199,13 @@ async def favicon():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=8000,
-        workers=1  # Since we have global state, use 1 worker
-    )
+
+    # The inventory is process state, so extra workers need a shared owner process
+    workers = int(os.environ.get("INVENTORY_WORKERS", "1"))
+    if workers > 1 and not INVENTORY_OWNER:
+        raise SystemExit("INVENTORY_WORKERS > 1 requires INVENTORY_OWNER (see inventory_owner.py)")
+    if workers > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers, app_dir=str(Path(__file__).parent))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, workers=1)
 
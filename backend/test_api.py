@@ -1,9 +1,30 @@
-from typing import Dict, Iterator, List
+import asyncio
+import csv
+import io
+import json
+import threading
+from typing import Any, Dict, Iterator, List
 
 import pytest
 from fastapi.testclient import TestClient
 
-from backend.main import app, rebuild_inventory
+from backend.main import (
+    COLUMNS_MEDIA_TYPE,
+    EXPORT_CHUNK_ROWS,
+    MAX_BULK_ITEMS,
+    MSGPACK_MEDIA_TYPE,
+    ChangeFeed,
+    ItemCreate,
+    ItemUpdate,
+    ResponseCache,
+    app,
+    change_feed,
+    create_item,
+    delete_item,
+    rebuild_inventory,
+    stream_changes,
+    update_item,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -19,6 +40,22 @@ def client() -> TestClient:
     return TestClient(app)
 
 
+def _rows_from_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"id": item_id, "name": name, "category": block["categories"][code], "price": price, "quantity": quantity}
+        for block in blocks
+        for item_id, name, code, price, quantity in zip(
+            block["id"], block["name"], block["category"], block["price"], block["quantity"]
+        )
+    ]
+
+
+async def _next_event(events: Any) -> Dict[str, Any]:
+    message = (await asyncio.wait_for(events.__anext__(), timeout=5)).decode()
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines() if ": " in line)
+    return {"id": fields["id"], "event": fields["event"], "data": json.loads(fields["data"])}
+
+
 def _assert_items_equal(items: List[Dict[str, object]], expected_names: List[str]) -> None:
     assert [item["name"] for item in items] == expected_names
 
@@ -112,3 +149,379 @@ def test_tree_info_and_visualization(client: TestClient) -> None:
     if visualization is not None:
         assert isinstance(visualization, list)
         assert len(visualization) >= 1
+
+
+def test_bulk_create_reports_id_range_and_row_errors(client: TestClient) -> None:
+    response = client.post(
+        "/items/bulk",
+        json=[
+            {"name": "Keyboard", "category": "Electronics", "price": 49.99, "quantity": 20},
+            {"name": "Broken", "category": "Electronics", "price": -1, "quantity": 1},
+            {"name": "Office Chair", "category": "Furniture", "price": 89.99, "quantity": 5},
+        ],
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["inserted"] == 2
+    assert payload["last_id"] - payload["first_id"] == 1
+    assert [error["index"] for error in payload["errors"]] == [1]
+
+    listing = client.get("/items/")
+    _assert_items_equal(listing.json(), ["Keyboard", "Office Chair"])
+
+    row = {"name": "Cable", "category": "Electronics", "price": 4.0, "quantity": 1}
+    too_many = client.post("/items/bulk", json=[row] * (MAX_BULK_ITEMS + 1))
+    assert too_many.status_code == 413
+    assert client.get("/statistics/").json()["total_items"] == 2
+
+
+def test_export_streams_csv_and_ndjson(client: TestClient) -> None:
+    for name, quantity in (("Keyboard", 20), ("Office Chair, Mesh", 5)):
+        client.post(
+            "/items/",
+            json={"name": name, "category": "Office", "price": 49.5, "quantity": quantity},
+        )
+
+    csv_response = client.get("/items/export", params={"format": "csv"})
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(csv_response.text)))
+    assert rows[0] == ["id", "name", "category", "price", "quantity"]
+    assert [row[1] for row in rows[1:]] == ["Keyboard", "Office Chair, Mesh"]
+
+    ndjson_response = client.get("/items/export", params={"format": "ndjson"})
+    assert ndjson_response.status_code == 200
+    records = [json.loads(line) for line in ndjson_response.text.splitlines()]
+    assert [record["quantity"] for record in records] == [20, 5]
+
+    assert client.get("/items/export", params={"format": "xml"}).status_code == 422
+
+
+def test_items_cursor_pagination(client: TestClient) -> None:
+    rebuild_inventory(5)
+    client.delete("/items/2")
+
+    first = client.get("/items/", params={"limit": 2})
+    assert first.status_code == 200
+    assert [item["id"] for item in first.json()] == [1, 3]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/items/", params={"limit": 2, "after_id": cursor})
+    assert [item["id"] for item in second.json()] == [4, 5]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/items/", params={"limit": 0}).status_code == 422
+
+
+def test_ids_beyond_the_stored_range_are_simply_absent(client: TestClient) -> None:
+    rebuild_inventory(3)
+
+    for item_id in (2**31, 2**63, 10**30, -(2**63)):
+        assert client.get(f"/items/{item_id}").status_code == 404
+        assert client.put(f"/items/{item_id}", json={"quantity": 1}).status_code == 404
+        assert client.delete(f"/items/{item_id}").status_code == 404
+    assert client.get("/items/", params={"limit": 2, "after_id": 2**40}).json() == []
+    assert len(client.get("/low-stock/", params={"threshold": 10**30}).json()) == 3
+
+
+def test_range_pagination_follows_price_then_id(client: TestClient) -> None:
+    for name, price in (("Cable", 4.0), ("Mouse", 25.0), ("Hub", 25.0), ("Desk", 180.0), ("Lamp", 30.0)):
+        client.post("/items/", json={"name": name, "category": "Office", "price": price, "quantity": 1})
+
+    first = client.get("/items/range/", params={"field": "price", "min": 5, "max": 100, "limit": 2})
+    assert first.status_code == 200
+    assert [item["name"] for item in first.json()] == ["Mouse", "Hub"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/items/range/", params={"field": "price", "min": 5, "max": 100, "limit": 2, "cursor": cursor})
+    assert [item["name"] for item in second.json()] == ["Lamp"]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/items/range/", params={"field": "name"}).status_code == 422
+    assert client.get("/items/range/", params={"cursor": "oops"}).status_code == 400
+
+
+def test_query_filters_sorts_and_counts(client: TestClient) -> None:
+    for name, category, price, quantity in (
+        ("Claw Hammer", "Hand Tools", 24.99, 18),
+        ("Sledge Hammer", "Hand Tools", 59.0, 2),
+        ("Hammer Drill", "Power Tools", 149.0, 9),
+        ("Tack Hammer", "hand tools", 12.5, 30),
+        ("Wrench", "Hand Tools", 15.0, 40),
+    ):
+        client.post("/items/", json={"name": name, "category": category, "price": price, "quantity": quantity})
+
+    response = client.get(
+        "/items/query",
+        params={"name": "hammer", "category": "Hand Tools", "min_quantity": 5, "sort": "price", "order": "desc", "limit": 1},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert [item["name"] for item in body["items"]] == ["Claw Hammer"]
+
+    second = client.get(
+        "/items/query",
+        params={"name": "hammer", "category": "Hand Tools", "min_quantity": 5, "sort": "price", "order": "desc", "offset": 1},
+    )
+    assert [item["name"] for item in second.json()["items"]] == ["Tack Hammer"]
+    assert client.get("/items/query", params={"max_price": 20}).json()["total"] == 2
+    assert client.get("/items/query", params={"sort": "category"}).status_code == 422
+
+
+def test_reads_answer_304_until_the_inventory_changes(client: TestClient) -> None:
+    client.post("/items/", json={"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18})
+
+    first = client.get("/items/")
+    etag = first.headers["ETag"]
+    assert client.get("/statistics/").headers["ETag"] == etag
+
+    cached = client.get("/items/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get("/statistics/", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+
+    client.post("/items/", json={"name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 9})
+    changed = client.get("/items/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 2
+    assert changed.headers["ETag"] != etag
+
+    # A reseed starts a new engine whose version counts from zero again
+    etag = changed.headers["ETag"]
+    rebuild_inventory(2)
+    assert client.get("/items/", headers={"If-None-Match": etag}).status_code == 200
+    assert "ETag" not in client.get("/items/999").headers
+
+
+def test_failed_writes_keep_the_etag_and_the_change_feed_quiet(client: TestClient) -> None:
+    etag = client.get("/items/").headers["ETag"]
+    version = change_feed.version
+
+    assert client.delete("/items/999").status_code == 404
+    assert client.put("/items/999", json={"quantity": 1}).status_code == 404
+    assert client.get("/items/", headers={"If-None-Match": etag}).status_code == 304
+    assert change_feed.version == version
+
+
+def test_revalidation_does_not_wait_for_the_writer_lock(client: TestClient) -> None:
+    import backend.main as main
+
+    etag = client.get("/items/").headers["ETag"]
+    # A long write (or a view being built) holds the lock; 304s keep flowing meanwhile
+    with main._write_lock:
+        assert client.get("/items/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_read_views_are_built_outside_the_writer_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    import backend.main as main
+
+    rebuild_inventory(30)
+    engine = main.inventory
+    if not hasattr(engine, "snapshot"):
+        pytest.skip("engine has no snapshot(); its view is built from get_columns()")
+    held: List[bool] = []
+
+    class Watched:
+        def __getattr__(self, name: str) -> Any:
+            return getattr(engine, name)
+
+        def snapshot(self) -> Any:
+            held.append(main._write_lock.locked())
+            return engine.snapshot()
+
+    monkeypatch.setattr(main, "inventory", Watched())
+    assert len(main._read_view()) == 30
+    assert held == [False]
+
+
+def test_derived_reads_are_served_from_the_response_cache(client: TestClient) -> None:
+    client.post("/items/", json={"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 3})
+    before = client.get("/admin/cache").json()
+
+    first = client.get("/low-stock/", params={"threshold": 5})
+    again = client.get("/low-stock/", params={"threshold": 5})
+    assert again.content == first.content
+    assert again.headers["ETag"] == first.headers["ETag"]
+    client.get("/low-stock/", params={"threshold": 1})
+
+    stats = client.get("/admin/cache").json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+
+    client.post("/items/", json={"name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 2})
+    assert [item["name"] for item in client.get("/low-stock/", params={"threshold": 5}).json()] == ["Hammer", "Drill"]
+
+
+def test_response_cache_evicts_least_recently_used_bodies() -> None:
+    cache = ResponseCache(max_bytes=10)
+    cache.put(("a",), b"1234", "application/json")
+    cache.put(("b",), b"1234", "application/json")
+    assert cache.get(("a",)) is not None
+    cache.put(("c",), b"1234", "application/json")
+    cache.put(("huge",), b"x" * 11, "application/json")
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("huge",)) is None
+    assert cache.get(("c",)) == (b"1234", "application/json")
+    assert cache.stats() == {"entries": 2, "bytes": 8, "max_bytes": 10, "hits": 2, "misses": 2, "evictions": 1}
+
+
+def test_list_endpoints_send_plain_rows_under_the_same_schema(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import backend.main as main
+
+    client.post("/items/", json={"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 3})
+    expected = [{"id": 1, "name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 3}]
+    paths = ("/items/", "/items/?limit=5", "/items/search/name/?name=ham", "/low-stock/", "/items/range/?field=price")
+    for path in paths:
+        assert client.get(path).json() == expected
+
+    # Without orjson the standard library encoder produces the same documents
+    monkeypatch.setattr(main, "orjson", None)
+    for path in paths:
+        response = client.get(path)
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == expected
+
+    schema = client.get("/openapi.json").json()["paths"]["/items/"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"]["items"]["$ref"] == "#/components/schemas/ItemResponse"
+
+
+def test_large_listings_are_gzipped_while_streaming(client: TestClient) -> None:
+    rebuild_inventory(EXPORT_CHUNK_ROWS + 1)
+
+    response = client.get("/items/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.json()) == EXPORT_CHUNK_ROWS + 1
+
+    assert "content-encoding" not in client.get("/items/", params={"limit": 1}, headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/items/", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_item_lists_negotiate_column_blocks(client: TestClient) -> None:
+    rebuild_inventory(EXPORT_CHUNK_ROWS * 2 + 5)
+    rows = client.get("/items/").json()
+
+    response = client.get("/items/", headers={"Accept": f"{COLUMNS_MEDIA_TYPE}, application/json;q=0.5"})
+    assert response.headers["content-type"] == COLUMNS_MEDIA_TYPE
+    assert response.headers["vary"].startswith("Accept")
+    blocks = response.json()
+    assert [len(block["id"]) for block in blocks] == [EXPORT_CHUNK_ROWS, EXPORT_CHUNK_ROWS, 5]
+    assert len(blocks[0]["categories"]) < len(blocks[0]["category"])
+    assert _rows_from_blocks(blocks) == rows
+
+    etag = response.headers["ETag"]
+    assert etag != client.get("/items/").headers["ETag"]
+    assert client.get("/items/", headers={"Accept": COLUMNS_MEDIA_TYPE, "If-None-Match": etag}).status_code == 304
+
+    category = rows[0]["category"]
+    searched = client.get("/items/search/category/", params={"category": category}, headers={"Accept": COLUMNS_MEDIA_TYPE})
+    assert _rows_from_blocks(searched.json()) == [row for row in rows if row["category"] == category]
+    # The cache keeps the two representations apart
+    assert client.get("/items/search/category/", params={"category": category}).json()[0] == rows[0]
+
+    unsupported = client.get("/items/", params={"limit": 1}, headers={"Accept": "text/html"})
+    assert unsupported.headers["content-type"] == "application/json"
+
+
+def test_item_lists_negotiate_msgpack_blocks(client: TestClient) -> None:
+    msgpack = pytest.importorskip("msgpack")
+    rebuild_inventory(EXPORT_CHUNK_ROWS + 1)
+    rows = client.get("/items/").json()
+
+    response = client.get("/items/", headers={"Accept": MSGPACK_MEDIA_TYPE})
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    blocks = list(msgpack.Unpacker(io.BytesIO(response.content)))
+    assert _rows_from_blocks(blocks) == rows
+
+
+@pytest.mark.asyncio
+async def test_change_feed_streams_coalesced_deltas() -> None:
+    events = (await stream_changes()).body_iterator
+    try:
+        ready = await _next_event(events)
+        assert ready["event"] == "ready"
+        assert ready["data"] == {"version": change_feed.version}
+
+        # One burst: the client only needs to learn about the surviving item
+        kept = (await create_item(ItemCreate(name="Hammer", category="Hand Tools", price=24.99, quantity=18)))["id"]
+        dropped = (await create_item(ItemCreate(name="Drill", category="Power Tools", price=149.0, quantity=9)))["id"]
+        await update_item(kept, ItemUpdate(quantity=3))
+        await delete_item(dropped)
+        burst = await _next_event(events)
+        assert burst["event"] == "changes"
+        assert burst["data"] == {
+            "version": change_feed.version,
+            "changes": [
+                {"type": "added", "item": {"id": kept, "name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 3}}
+            ],
+        }
+        assert burst["id"] == f"{change_feed.epoch}-{change_feed.version}"
+
+        await delete_item(kept)
+        assert (await _next_event(events))["data"]["changes"] == [{"type": "removed", "id": kept}]
+
+        rebuild_inventory(3)
+        assert (await _next_event(events))["event"] == "reset"
+    finally:
+        await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_change_feed_resumes_from_last_event_id() -> None:
+    start = change_feed.version
+    item_id = (await create_item(ItemCreate(name="Saw", category="Hand Tools", price=19.0, quantity=4)))["id"]
+
+    events = (await stream_changes(last_event_id=f"{change_feed.epoch}-{start}")).body_iterator
+    try:
+        assert (await _next_event(events))["event"] == "ready"
+        assert [change["item"]["id"] for change in (await _next_event(events))["data"]["changes"]] == [item_id]
+    finally:
+        await events.aclose()
+
+    # A version from another server run cannot be resumed
+    events = (await stream_changes(last_event_id=f"other-{start}")).body_iterator
+    try:
+        assert (await _next_event(events))["event"] == "reset"
+    finally:
+        await events.aclose()
+
+
+def test_change_feed_history_is_bounded() -> None:
+    feed = ChangeFeed(history=2)
+    for version in (1, 2, 3):
+        feed.publish(version, [{"type": "removed", "id": version}])
+
+    assert feed.since(3) == (3, [])
+    assert feed.since(1) == (3, [[{"type": "removed", "id": 2}], [{"type": "removed", "id": 3}]])
+    # Batch 1 has left the history, and version 9 was never published
+    assert feed.since(0) == (3, None)
+    assert feed.since(9) == (3, None)
+
+
+def test_full_listing_never_mixes_versions_during_reseeds(client: TestClient) -> None:
+    rebuild_inventory(40)
+    stop = threading.Event()
+
+    def reseed() -> None:
+        sizes = (40, 60)
+        index = 0
+        while not stop.is_set():
+            index += 1
+            rebuild_inventory(sizes[index % 2])
+
+    writer = threading.Thread(target=reseed)
+    writer.start()
+    try:
+        for _ in range(20):
+            items = client.get("/items/").json()
+            assert [item["id"] for item in items] == list(range(1, len(items) + 1))
+            assert len(items) in (40, 60)
+            lines = client.get("/items/export", params={"format": "ndjson"}).text.splitlines()
+            assert len(lines) in (40, 60)
+    finally:
+        stop.set()
+        writer.join()
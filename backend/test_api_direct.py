@@ -1,6 +1,9 @@
-from typing import Dict, Iterator, List
+import json
+from typing import Any, Dict, Iterator, List
 
 import pytest
+from fastapi import Response
+from fastapi.responses import StreamingResponse
 
 from backend.main import (
     ItemCreate,
@@ -25,6 +28,13 @@ def reset_inventory() -> Iterator[None]:
     rebuild_inventory(0)
 
 
+async def _rows(response: Response) -> List[Dict[str, Any]]:
+    # List endpoints hand back ready-encoded (or streamed) JSON rather than models
+    if isinstance(response, StreamingResponse):
+        return json.loads(b"".join([chunk async for chunk in response.body_iterator]))
+    return json.loads(response.body)
+
+
 @pytest.mark.asyncio
 async def test_async_service_layer_flows() -> None:
     first = await create_item(
@@ -39,20 +49,20 @@ async def test_async_service_layer_flows() -> None:
     first_id = first["id"]
     second_id = second["id"]
 
-    all_items = await get_all_items()
+    all_items = await _rows(await get_all_items())
     assert len(all_items) == 2
 
     stats = await get_statistics()
     stats_payload = stats.model_dump() if hasattr(stats, "model_dump") else stats
     assert stats_payload["total_items"] == 2
 
-    name_search = await search_by_name(name="Key")
+    name_search = await _rows(await search_by_name(name="Key"))
     assert len(name_search) == 1
 
-    category_search = await search_by_category(category="Electronics")
+    category_search = await _rows(await search_by_category(category="Electronics"))
     assert len(category_search) == 1
 
-    low_stock = await get_low_stock(threshold=10)
+    low_stock = await _rows(await get_low_stock(threshold=10))
     assert len(low_stock) == 1
 
     tree = await get_tree_info()
@@ -64,5 +74,5 @@ async def test_async_service_layer_flows() -> None:
     delete_result = await delete_item(second_id)
     assert delete_result["message"] == "Item deleted successfully"
 
-    final_items = await get_all_items()
+    final_items = await _rows(await get_all_items())
     assert len(final_items) == 1
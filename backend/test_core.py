@@ -1,10 +1,38 @@
-from typing import Any, Dict, List, cast
+import importlib.util
+import random
+from importlib import import_module
+from typing import Any, Dict, List, Type, cast
 
-from inventory_core import InventoryManager
+import pytest
 
+ENGINES = [
+    pytest.param("inventory_core", id="core"),
+    pytest.param(
+        "inventory_columnar",
+        id="columnar",
+        marks=pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="numpy not installed"),
+    ),
+]
 
-def test_inventory_crud_and_stats():
-    inventory = InventoryManager()
+
+@pytest.fixture(params=ENGINES)
+def manager_cls(request: pytest.FixtureRequest) -> Type[Any]:
+    """Run every contract test against each inventory engine."""
+    return import_module(request.param).InventoryManager
+
+
+def _checked(manager_cls: Type[Any]) -> Any:
+    """A fresh inventory that re-verifies its aggregates after every mutation when the engine can.
+
+    The compiled core has no consistency checks, so it is built plainly.
+    """
+    if hasattr(manager_cls, "verify_consistency"):
+        return manager_cls(check_consistency=True)
+    return manager_cls()
+
+
+def test_inventory_crud_and_stats(manager_cls: Type[Any]) -> None:
+    inventory = manager_cls()
 
     laptop_id = inventory.add_item("Laptop", "Electronics", 999.99, 10)
     mouse_id = inventory.add_item("Mouse", "Electronics", 29.99, 50)
@@ -25,7 +53,7 @@ def test_inventory_crud_and_stats():
 
     removed = inventory.remove_item(mouse_id)
     assert removed is True
-    assert inventory.get_item(mouse_id) is None
+    assert not inventory.get_item(mouse_id)
 
     stats = cast(Dict[str, Any], inventory.get_statistics())
     assert stats["total_items"] == 2
@@ -33,8 +61,8 @@ def test_inventory_crud_and_stats():
     assert stats["tree_height"] >= 1
 
 
-def test_search_and_low_stock_helpers():
-    inventory = InventoryManager()
+def test_search_and_low_stock_helpers(manager_cls: Type[Any]) -> None:
+    inventory = manager_cls()
     inventory.add_item("Laptop", "Electronics", 999.99, 10)
     inventory.add_item("Lamp", "Lighting", 49.99, 3)
     inventory.add_item("Desk Lamp", "Lighting", 59.99, 2)
@@ -48,4 +76,483 @@ def test_search_and_low_stock_helpers():
 
     low_stock = cast(List[Dict[str, Any]], inventory.get_low_stock(3))
     assert len(low_stock) == 2
-    assert all(item["quantity"] <= 3 for item in low_stock)
\ No newline at end of file
+    assert all(item["quantity"] <= 3 for item in low_stock)
+
+def test_statistics_are_maintained_incrementally(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    drill_id = inventory.add_item("Drill", "Power Tools", 149.0, 9)
+    saw_id = inventory.add_item("Saw", "Power Tools", 89.5, 4)
+    inventory.add_item("Gloves", "Safety", 12.25, 60)
+
+    inventory.update_item(saw_id, "Saw", "Hand Tools", 79.5, 3)
+    inventory.remove_item(drill_id)
+    if hasattr(inventory, "verify_consistency"):
+        inventory.verify_consistency()
+
+    stats = cast(Dict[str, Any], inventory.get_statistics())
+    assert stats["total_items"] == 2
+    assert stats["total_value"] == 79.5 * 3 + 12.25 * 60
+    assert stats["unique_categories"] == 2
+
+    inventory.remove_item(saw_id)
+    assert inventory.get_statistics()["unique_categories"] == 1
+
+    # Categories are counted as spelled, even though lookups fold case
+    safety_id = inventory.add_item("Goggles", "SAFETY", 8.0, 5)
+    assert inventory.get_statistics()["unique_categories"] == 2
+    inventory.remove_item(safety_id)
+    assert inventory.get_statistics()["unique_categories"] == 1
+
+
+def test_category_index_follows_mutations(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    hammer_id = inventory.add_item("Hammer", "Hand Tools", 24.99, 18)
+    drill_id = inventory.add_item("Drill", "Power Tools", 149.0, 9)
+    wrench_id = inventory.add_item("Wrench", "hand tools", 14.5, 30)
+
+    assert [item["id"] for item in inventory.search_by_category("HAND TOOLS")] == [hammer_id, wrench_id]
+
+    inventory.update_item(drill_id, "Drill", "Hand Tools", 149.0, 9)
+    inventory.remove_item(hammer_id)
+    assert [item["id"] for item in inventory.search_by_category("hand tools")] == [drill_id, wrench_id]
+    assert inventory.search_by_category("Power Tools") == []
+
+
+def test_non_ascii_text_folds_like_str_lower(manager_cls: Type[Any]) -> None:
+    # Every engine folds with str.lower(), so these match identically in all of them
+    inventory = _checked(manager_cls)
+    outils_id = inventory.add_item("Σας Tool", "Outils Électriques", 10.0, 1)
+    upper_id = inventory.add_item("İstanbul Saw", "OUTILS ÉLECTRIQUES", 12.0, 2)
+    inventory.add_item("Plain Saw", "Outils electriques", 8.0, 3)
+
+    expected = [outils_id, upper_id]
+    assert [item["id"] for item in inventory.search_by_category("outils électriques")] == expected
+    assert [item["id"] for item in inventory.search_by_name("ΣΑΣ")] == [outils_id]
+    assert [item["id"] for item in inventory.search_by_name("İST")] == [upper_id]
+    assert [item["id"] for item in inventory.search_by_name("é")] == []
+    result = inventory.query_items(category="OUTILS éLECTRIQUES", sort="name")
+    assert [item["id"] for item in result["items"]] == [upper_id, outils_id]
+
+
+def test_name_index_matches_substrings_after_mutations(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    lamp_id = inventory.add_item("Lamp", "Lighting", 49.99, 3)
+    desk_id = inventory.add_item("Desk Lamp", "Lighting", 59.99, 2)
+    drill_id = inventory.add_item("Nova Drill 18V", "Power Tools", 149.0, 9)
+
+    assert [item["id"] for item in inventory.search_by_name("LAMP")] == [lamp_id, desk_id]
+    assert [item["id"] for item in inventory.search_by_name("l")] == [lamp_id, desk_id, drill_id]
+    assert [item["id"] for item in inventory.search_by_name("drill 18")] == [drill_id]
+
+    inventory.update_item(lamp_id, "Floor Light", "Lighting", 49.99, 3)
+    inventory.remove_item(desk_id)
+    assert inventory.search_by_name("lamp") == []
+    assert [item["id"] for item in inventory.search_by_name("light")] == [lamp_id]
+
+
+def test_low_stock_uses_quantity_order(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    bolts_id = inventory.add_item("Bolts", "Fasteners", 4.5, 0)
+    saw_id = inventory.add_item("Saw", "Hand Tools", 29.0, 12)
+    tape_id = inventory.add_item("Tape", "Adhesives", 3.25, 5)
+
+    assert [item["id"] for item in inventory.get_low_stock(5)] == [bolts_id, tape_id]
+
+    inventory.update_item(saw_id, "Saw", "Hand Tools", 29.0, 1)
+    inventory.update_item(bolts_id, "Bolts", "Fasteners", 4.5, 200)
+    assert [item["id"] for item in inventory.get_low_stock(5)] == [saw_id, tape_id]
+    assert inventory.get_low_stock(0) == []
+
+    # Ids from several quantity levels interleave; results still come in id order
+    more = [inventory.add_item(f"Part {quantity}", "Misc", 1.0, quantity) for quantity in (3, 1, 3, 0, 2, 1)]
+    assert [item["id"] for item in inventory.get_low_stock(3)] == [saw_id, *more]
+
+
+def test_add_items_assigns_id_range_and_reports_bad_rows(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    inventory.add_item("Existing", "Misc", 1.0, 1)
+
+    result = inventory.add_items(
+        [
+            {"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18},
+            {"name": "", "category": "Hand Tools", "price": 5.0, "quantity": 1},
+            {"name": "Drill", "category": "Power Tools", "price": 149, "quantity": 9},
+            {"name": "Gloves", "category": "Safety", "price": 0, "quantity": 60},
+            {"name": "Tape", "category": "Adhesives", "price": 3.25, "quantity": -1},
+        ]
+    )
+
+    assert result["inserted"] == 2
+    assert (result["first_id"], result["last_id"]) == (2, 3)
+    assert [error["index"] for error in result["errors"]] == [1, 3, 4]
+    assert [item["name"] for item in inventory.get_all_items()] == ["Existing", "Hammer", "Drill"]
+
+    empty = inventory.add_items([])
+    assert empty == {"inserted": 0, "first_id": None, "last_id": None, "errors": []}
+
+
+def test_add_items_reports_out_of_range_numbers_per_row(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    row = {"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18}
+
+    result = inventory.add_items([row, {**row, "quantity": 2**70}, {**row, "price": 10**400}, row])
+
+    assert (result["inserted"], result["first_id"], result["last_id"]) == (2, 1, 2)
+    assert [(error["index"], error["error"].split()[0]) for error in result["errors"]] == [
+        (1, "quantity"),
+        (2, "price"),
+    ]
+    assert len(inventory.get_all_items()) == 2
+
+
+def test_items_page_walks_from_cursor(manager_cls: Type[Any]) -> None:
+    inventory = manager_cls()
+    ids = [inventory.add_item(f"Item {i}", "Misc", 1.0, i) for i in range(6)]
+    inventory.remove_item(ids[2])
+
+    assert [item["id"] for item in inventory.get_items_page(2)] == ids[:2]
+    assert [item["id"] for item in inventory.get_items_page(2, after_id=ids[1])] == [ids[3], ids[4]]
+    assert [item["id"] for item in inventory.get_items_page(10, after_id=ids[4])] == [ids[5]]
+    assert inventory.get_items_page(10, after_id=ids[5]) == []
+
+    # Cursor walks cost the page size, not the gap between ids
+    far = {"id": 2_000_000_000, "name": "Far", "category": "Misc", "price": 1.0, "quantity": 1}
+    inventory.restore([{**far, "id": 1, "name": "Near"}, far], next_id=1)
+    assert [item["id"] for item in inventory.get_items_page(5, after_id=1)] == [far["id"]]
+    if hasattr(inventory, "iter_items"):
+        assert [item["id"] for item in inventory.iter_items()] == [1, far["id"]]
+
+
+def test_listings_follow_mutations_and_do_not_alias_storage(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    first_id = inventory.add_item("Hammer", "Hand Tools", 24.99, 18)
+    second_id = inventory.add_item("Drill", "Power Tools", 149.0, 9)
+
+    snapshot = inventory.get_all_items()
+    snapshot[0]["name"] = "Scribbled"
+    assert inventory.get_all_items()[0]["name"] == "Hammer"
+    fetched = inventory.get_item(first_id)
+    assert fetched is not None and fetched["name"] == "Hammer"
+    fetched["quantity"] = -1
+    assert inventory.get_item(first_id)["quantity"] == 18
+
+    inventory.update_item(first_id, "Claw Hammer", "Hand Tools", 26.5, 18)
+    refreshed = inventory.get_all_items()
+    assert [item["name"] for item in refreshed] == ["Claw Hammer", "Drill"]
+
+    inventory.remove_item(second_id)
+    assert [item["id"] for item in inventory.get_all_items()] == [first_id]
+
+
+def test_snapshot_is_immutable_and_cached_per_version(manager_cls: Type[Any]) -> None:
+    if not hasattr(manager_cls, "snapshot"):
+        pytest.skip("engine does not build read views (the API assembles them instead)")
+    inventory = _checked(manager_cls)
+    first_id = inventory.add_item("Hammer", "Hand Tools", 24.99, 18)
+    second_id = inventory.add_item("Drill", "Power Tools", 149.0, 9)
+
+    view = inventory.snapshot()
+    assert inventory.snapshot() is view
+
+    inventory.update_item(first_id, "Claw Hammer", "Hand Tools", 26.5, 3)
+    inventory.remove_item(second_id)
+    inventory.add_item("Saw", "Hand Tools", 19.0, 4)
+
+    assert [item["name"] for item in view.get_all_items()] == ["Hammer", "Drill"]
+    assert view.get_item(second_id)["quantity"] == 9
+    assert [item["id"] for item in view.get_items_page(5, after_id=first_id)] == [second_id]
+    assert view.get_statistics()["total_items"] == 2
+    view.get_all_items()[0]["name"] = "Scribbled"
+    assert next(view.iter_items())["name"] == "Hammer"
+
+    latest = inventory.snapshot()
+    assert latest is not view
+    assert [item["name"] for item in latest.iter_items()] == ["Claw Hammer", "Saw"]
+
+
+def test_version_grows_with_every_change_only(manager_cls: Type[Any]) -> None:
+    inventory = manager_cls()
+    versions = [inventory.version]
+
+    item_id = inventory.add_item("Hammer", "Hand Tools", 24.99, 18)
+    versions.append(inventory.version)
+    inventory.add_items([{"name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 9}])
+    versions.append(inventory.version)
+    inventory.update_item(item_id, "Claw Hammer", "Hand Tools", 26.5, 18)
+    versions.append(inventory.version)
+    inventory.remove_item(item_id)
+    versions.append(inventory.version)
+    inventory.restore([], 1)
+    versions.append(inventory.version)
+    assert versions == sorted(set(versions))
+
+    # Calls that change nothing keep the version
+    assert not inventory.update_item(item_id, "Gone", "Hand Tools", 1.0, 1)
+    assert not inventory.remove_item(item_id)
+    inventory.add_items([{"name": "", "category": "Broken", "price": 1.0, "quantity": 1}])
+    inventory.get_all_items()
+    assert inventory.version == versions[-1]
+
+
+def test_equal_categories_share_one_string(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    # Build equal category strings that are distinct objects, as a CSV parser would
+    first = inventory.add_item("Hammer", "".join(["Hand", " Tools"]), 24.99, 18)
+    second = inventory.add_item("Saw", "".join(["Hand ", "Tools"]), 19.5, 4)
+    assert inventory.get_item(first)["category"] == inventory.get_item(second)["category"] == "Hand Tools"
+    if hasattr(inventory, "verify_consistency"):
+        # The pure-Python engines intern categories; the compiled core copies them into Python
+        assert inventory.get_item(first)["category"] is inventory.get_item(second)["category"]
+
+
+def test_range_queries_page_through_each_field(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    rng = random.Random(5)
+    inventory.add_items(
+        [
+            {"name": f"Part {i}", "category": "Misc", "price": rng.choice([2.5, 4.0, 9.99, 12.0]), "quantity": i % 6}
+            for i in range(60)
+        ]
+    )
+    for item_id in range(3, 60, 7):
+        inventory.remove_item(item_id)
+    inventory.update_item(10, "Part 10", "Misc", 4.0, 2)
+    everything = inventory.get_all_items()
+
+    for field, low, high in (("id", 5, 41.5), ("price", 3, 10), ("quantity", 2, None), ("price", None, None)):
+        expected = sorted(
+            (item for item in everything if (low is None or item[field] >= low) and (high is None or item[field] <= high)),
+            key=lambda item: (item[field], item["id"]),
+        )
+        collected: List[Dict[str, Any]] = []
+        after = None
+        while True:
+            page = inventory.get_items_in_range(field, low, high, limit=4, after=after)
+            collected.extend(page)
+            if len(page) < 4:
+                break
+            after = (page[-1][field], page[-1]["id"])
+        assert collected == expected, field
+
+    assert inventory.get_items_in_range("price", 100, None) == []
+    assert inventory.get_items_in_range("id", 20, 10) == []
+    with pytest.raises(ValueError):
+        inventory.get_items_in_range("name", 1, 2)
+
+
+def test_query_combines_predicates_like_a_filter_over_all_items(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    rng = random.Random(11)
+    inventory.add_items(
+        [
+            {
+                "name": f"{rng.choice(['Steel', 'Brass', 'Oak'])} {rng.choice(['Bolt', 'Hinge', 'Shelf'])} {i}",
+                "category": rng.choice(["Hardware", "hardware", "Wood"]),
+                "price": rng.choice([1.5, 3.0, 7.25, 20.0]),
+                "quantity": rng.randrange(12),
+            }
+            for i in range(300)
+        ]
+    )
+    for item_id in range(4, 300, 9):
+        inventory.remove_item(item_id)
+    inventory.update_item(20, "Oak Hinge 20", "Wood", 3.0, 5)
+    everything = inventory.get_all_items()
+
+    def expected(name=None, category=None, min_price=None, max_price=None, min_quantity=None, max_quantity=None,
+                 sort="id", descending=False, limit=100, offset=0):  # type: ignore[no-untyped-def]
+        matches = [
+            item
+            for item in everything
+            if (name is None or name.lower() in item["name"].lower())
+            and (category is None or category.lower() == item["category"].lower())
+            and (min_price is None or item["price"] >= min_price)
+            and (max_price is None or item["price"] <= max_price)
+            and (min_quantity is None or item["quantity"] >= min_quantity)
+            and (max_quantity is None or item["quantity"] <= max_quantity)
+        ]
+        key = (lambda item: item["name"].lower()) if sort == "name" else (lambda item: item[sort])
+        matches.sort(key=lambda item: (key(item), item["id"]), reverse=descending)
+        return {"total": len(matches), "items": matches[offset : offset + limit]}
+
+    for predicates in (
+        {},
+        {"name": "hinge"},
+        {"name": "oa", "category": "WOOD"},
+        {"category": "hardware", "min_quantity": 10},
+        {"name": "steel bolt", "min_price": 2, "max_price": 8, "sort": "price", "descending": True},
+        {"min_price": 20.0, "max_quantity": 3, "sort": "quantity", "limit": 7, "offset": 2},
+        {"category": "Wood", "sort": "name", "limit": 5, "offset": 5},
+        {"name": "zinc"},
+        {"category": "Plastic"},
+        {"min_quantity": 8, "max_quantity": 2},
+    ):
+        assert inventory.query_items(**predicates) == expected(**predicates), predicates
+
+    assert inventory.query_items(limit=0)["total"] == len(everything)
+    with pytest.raises(ValueError):
+        inventory.query_items(sort="category")
+
+
+def test_avl_tree_is_maintained_across_mutations(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    ids = [inventory.add_item(f"Item {i}", "Misc", 2.0, i) for i in range(31)]
+    for item_id in ids[::3]:
+        inventory.remove_item(item_id)
+    inventory.update_item(ids[1], "Renamed", "Misc", 2.0, 1)
+
+    info = inventory.get_tree_info()
+    assert info["count"] == len(ids) - len(ids[::3])
+    assert [node["id"] for node in info["nodes"]] == [item["id"] for item in inventory.get_all_items()]
+    assert info["is_avl_balanced"] is True
+    assert all(abs(node["balance"]) <= 1 for node in info["nodes"])
+    assert inventory.get_statistics()["tree_height"] == info["height"]
+
+    root = inventory.get_tree_hierarchy()["levels"][0][0]
+    assert f"[{root['id']}]" in inventory.get_tree_visualization()[0]
+    assert any("Renamed" in line for line in inventory.get_tree_visualization())
+
+
+def test_compiled_core_order_statistics_follow_mutations() -> None:
+    manager_cls = import_module("inventory_core").InventoryManager
+    if not hasattr(manager_cls, "rank"):
+        pytest.skip("order statistics are maintained by the compiled core only")
+    inventory = manager_cls()
+    rng = random.Random(17)
+    live: Dict[int, float] = {}
+    for step in range(600):
+        if live and rng.random() < 0.3:
+            item_id = rng.choice(sorted(live))
+            if rng.random() < 0.5:
+                assert inventory.remove_item(item_id)
+                del live[item_id]
+            else:
+                quantity = rng.randrange(20)
+                inventory.update_item(item_id, f"Item {step}", "Misc", 1.25, quantity)
+                live[item_id] = 1.25 * quantity
+        else:
+            quantity = rng.randrange(20)
+            live[inventory.add_item(f"Item {step}", "Misc", 0.5, quantity)] = 0.5 * quantity
+
+    ids = sorted(live)
+    stats = inventory.get_statistics()
+    assert stats["total_items"] == len(ids)
+    assert stats["total_value"] == pytest.approx(sum(live.values()))
+    for probe in range(0, ids[-1] + 2, 7):
+        assert inventory.rank(probe) == sum(1 for item_id in ids if item_id < probe)
+    assert [inventory.select(index)["id"] for index in range(len(ids))] == ids
+    assert inventory.select(len(ids)) is None and inventory.select(-1) is None
+    for low, high in ((1, ids[-1]), (ids[3], ids[40]), (50, 49), (ids[-1] + 1, ids[-1] + 9)):
+        in_range = [item_id for item_id in ids if low <= item_id <= high]
+        totals = inventory.range_totals(low, high)
+        assert totals["count"] == len(in_range)
+        assert totals["total_value"] == pytest.approx(sum(live[item_id] for item_id in in_range))
+
+
+def test_compiled_core_parallel_scans_match_serial_ones() -> None:
+    inventory_core = import_module("inventory_core")
+    if not hasattr(inventory_core, "set_scan_threads"):
+        pytest.skip("parallel scans are a compiled core feature")
+    inventory = inventory_core.InventoryManager()
+    count = inventory_core.PARALLEL_SCAN_MIN_ITEMS + 5000
+    inventory.add_items(
+        [{"name": f"Item {i}", "category": "Misc", "price": 1.0, "quantity": i % 97} for i in range(count)]
+    )
+    for item_id in range(1, count, 5):
+        inventory.remove_item(item_id)
+
+    default_threads = inventory_core.scan_threads()
+    try:
+        inventory_core.set_scan_threads(1)
+        serial = (inventory.get_low_stock(2), inventory.search_by_name("m 9"), inventory.search_by_name("99"))
+        inventory_core.set_scan_threads(4)
+        assert inventory_core.scan_threads() == 4
+        parallel = (inventory.get_low_stock(2), inventory.search_by_name("m 9"), inventory.search_by_name("99"))
+    finally:
+        inventory_core.set_scan_threads(default_threads)
+    assert parallel == serial
+    assert [item["id"] for item in parallel[0]] == sorted(item["id"] for item in parallel[0])
+
+
+def test_columnar_engine_compacts_deleted_rows() -> None:
+    inventory_columnar = pytest.importorskip("inventory_columnar")
+    inventory = inventory_columnar.InventoryManager(check_consistency=True)
+    result = inventory.add_items(
+        {"name": f"Bolt {i}", "category": "Fasteners" if i % 2 else "Hardware", "price": 0.5, "quantity": i}
+        for i in range(3000)
+    )
+    for item_id in range(result["first_id"], result["last_id"] - 99):
+        inventory.remove_item(item_id)
+
+    remaining = inventory.get_all_items()
+    assert [item["quantity"] for item in remaining] == list(range(2900, 3000))
+    assert inventory.get_items_page(2, after_id=remaining[0]["id"])[0]["quantity"] == 2901
+    assert inventory.get_statistics()["total_value"] == 0.5 * sum(range(2900, 3000))
+    assert len(inventory.search_by_category("hardware")) == 50
+
+
+def test_restore_keeps_ids_and_continues_numbering(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    inventory.add_item("Placeholder", "Misc", 1.0, 1)
+    inventory.restore(
+        [
+            {"id": 7, "name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 9},
+            {"id": 3, "name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18},
+        ],
+        next_id=10,
+    )
+
+    assert [item["id"] for item in inventory.get_all_items()] == [3, 7]
+    assert not inventory.get_item(1)
+    assert inventory.next_id == 10
+    assert inventory.add_item("Saw", "Hand Tools", 19.5, 4) == 10
+    assert [item["id"] for item in inventory.search_by_category("hand tools")] == [3, 10]
+
+    with pytest.raises(ValueError):
+        inventory.restore([{"id": 1, "name": "A", "category": "B", "price": 1.0, "quantity": 1}] * 2, next_id=2)
+    with pytest.raises(ValueError):
+        inventory.restore([{"name": "No id", "category": "B", "price": 1.0, "quantity": 1}], next_id=2)
+
+
+def test_restore_rejects_ids_beyond_the_id_range_up_front(manager_cls: Type[Any]) -> None:
+    inventory = _checked(manager_cls)
+    inventory.add_item("Hammer", "Hand Tools", 24.99, 18)
+    row = {"id": 1, "name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 9}
+
+    with pytest.raises(ValueError):
+        inventory.restore([row, {**row, "id": 2**32}], next_id=2)
+    with pytest.raises(ValueError):
+        inventory.restore([row], next_id=2**40)
+
+    # Nothing was half-restored: the old inventory is intact and keeps numbering
+    assert [item["name"] for item in inventory.get_all_items()] == ["Hammer"]
+    assert inventory.add_item("Saw", "Hand Tools", 19.5, 4) == 2
+
+
+def test_compiled_core_scans_have_columnar_variants() -> None:
+    from inventory_snapshot import InventorySnapshot
+
+    manager_cls = import_module("inventory_core").InventoryManager
+    if not hasattr(manager_cls, "search_by_name_columns"):
+        pytest.skip("columnar scan results are a compiled core feature")
+    inventory = manager_cls()
+    categories = ("Hand Tools", "Paint", "Garden")
+    inventory.add_items(
+        [{"name": f"Item {i}", "category": categories[i % 3], "price": 1.5 + i, "quantity": i % 9} for i in range(300)]
+    )
+    scans = [
+        ("search_by_name", ("m 1",), {}),
+        ("search_by_category", ("paint",), {}),
+        ("get_low_stock", (2,), {}),
+        ("get_items_page", (40, 17), {}),
+        ("get_items_in_range", ("price", 20.0, 80.0), {"limit": 25, "after": (30.5, 29)}),
+    ]
+    for method, args, kwargs in scans:
+        packed = InventorySnapshot.from_buffer(getattr(inventory, f"{method}_columns")(*args, **kwargs))
+        assert list(packed.iter_items()) == getattr(inventory, method)(*args, **kwargs)
+
+    query = {"name": "item", "sort": "price", "descending": True, "limit": 10, "offset": 5}
+    columns = inventory.query_items_columns(**query)
+    expected = inventory.query_items(**query)
+    assert columns["total"] == expected["total"]
+    assert list(InventorySnapshot.from_buffer(columns["items"]).iter_items()) == expected["items"]
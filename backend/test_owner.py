@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from inventory_owner import connect, open_owned_inventory, serve
+
+
+def _run_owner(address: str) -> None:
+    serve(open_owned_inventory("core"), address)
+
+
+def _add_items(address: str, worker: int, results: Any) -> None:
+    inventory = connect(address)
+    for i in range(20):
+        results.put(inventory.add_item(f"Worker {worker} item {i}", "Misc", 1.0, i))
+
+
+@pytest.fixture
+def owner_address(tmp_path: Path) -> Iterator[str]:
+    address = str(tmp_path / "inventory.sock")
+    process = multiprocessing.Process(target=_run_owner, args=(address,), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while not Path(address).exists():
+        assert time.monotonic() < deadline, "inventory owner did not start"
+        time.sleep(0.02)
+    yield address
+    process.terminate()
+    process.join()
+
+
+def test_workers_share_one_consistent_inventory(owner_address: str) -> None:
+    results: Any = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_add_items, args=(owner_address, worker, results)) for worker in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    ids: List[int] = [results.get() for _ in range(60)]
+
+    inventory = connect(owner_address)
+    assert sorted(ids) == list(range(1, 61))
+    assert inventory.get_statistics()["total_items"] == 60
+    assert [item["id"] for item in inventory.get_items_page(3, 57)] == [58, 59, 60]
+
+
+def test_only_the_first_startup_seed_applies(owner_address: str) -> None:
+    inventory = connect(owner_address)
+    rows = [{"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18}]
+    assert inventory.rebuild(rows, True) == 1
+    assert inventory.rebuild(rows * 2, True) is None
+    assert inventory.rebuild(rows * 2) == 2
+
+
+def test_api_serves_from_the_owner(owner_address: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    import backend.main as main
+
+    monkeypatch.setattr(main, "INVENTORY_OWNER", owner_address)
+    monkeypatch.setattr(main, "inventory", connect(owner_address))
+    client = TestClient(main.app)
+
+    assert client.post("/admin/seed", params={"target": 3}).json()["total"] == 3
+    item_id = client.post(
+        "/items/", json={"name": "Level", "category": "Measuring", "price": 12.0, "quantity": 6}
+    ).json()["id"]
+    assert client.get(f"/items/{item_id}").json()["name"] == "Level"
+    export = client.get("/items/export", params={"format": "ndjson"})
+    assert len(export.text.splitlines()) == 4
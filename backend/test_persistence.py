@@ -0,0 +1,200 @@
+import importlib.util
+import threading
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Type
+
+import pytest
+from fastapi.testclient import TestClient
+
+from inventory_persistence import LOG_FILE, SNAPSHOT_FILE, DurableInventory
+from inventory_snapshot import InventorySnapshot
+
+ENGINES = [
+    pytest.param("inventory_core", id="core"),
+    pytest.param(
+        "inventory_columnar",
+        id="columnar",
+        marks=pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="numpy not installed"),
+    ),
+]
+
+
+@pytest.fixture(params=ENGINES)
+def manager_cls(request: pytest.FixtureRequest) -> Type[Any]:
+    return import_module(request.param).InventoryManager
+
+
+def _reopen(manager_cls: Type[Any], data_dir: Path, **options: Any) -> DurableInventory:
+    # The compiled core has no consistency checks to turn on
+    checked = {"check_consistency": True} if hasattr(manager_cls, "verify_consistency") else {}
+    return DurableInventory(manager_cls(**checked), data_dir, **options)
+
+
+def test_log_replay_recovers_every_mutation(manager_cls: Type[Any], tmp_path: Path) -> None:
+    store = _reopen(manager_cls, tmp_path)
+    assert store.recovery["fresh"] is True
+    hammer = store.add_item("Hammer", "Hand Tools", 24.99, 18)
+    result = store.add_items(
+        [
+            {"name": "Drill", "category": "Power Tools", "price": 149.0, "quantity": 9},
+            {"name": "", "category": "Broken", "price": 1.0, "quantity": 1},
+            {"name": "Saw", "category": "Hand Tools", "price": 19.5, "quantity": 4},
+        ]
+    )
+    store.update_item(hammer, "Claw Hammer", "Hand Tools", 26.5, 17)
+    store.remove_item(result["last_id"])
+    expected = store.get_all_items()
+    store.close()
+
+    recovered = _reopen(manager_cls, tmp_path)
+    assert recovered.recovery == {"fresh": False, "snapshot_items": 0, "replayed": 4, "truncated_bytes": 0}
+    assert recovered.get_all_items() == expected
+    # Numbering continues after the removed item instead of reusing its id
+    assert recovered.add_item("Level", "Hand Tools", 12.0, 6) == result["last_id"] + 1
+    recovered.close()
+
+
+def test_snapshot_compacts_the_log(manager_cls: Type[Any], tmp_path: Path) -> None:
+    store = _reopen(manager_cls, tmp_path, snapshot_every=3)
+    ids = [store.add_item(f"Item {i}", "Misc", 2.0, i) for i in range(4)]
+    store.remove_item(ids[0])
+    expected = store.get_all_items()
+    store.close()
+
+    # The snapshot is written in the background, so it covers however many
+    # operations had landed by then; the log holds exactly the rest
+    snapshot_path = tmp_path / SNAPSHOT_FILE
+    snapshot_lsn = InventorySnapshot(snapshot_path).lsn if snapshot_path.exists() else 0
+    recovered = _reopen(manager_cls, tmp_path)
+    assert recovered.recovery["replayed"] == 5 - snapshot_lsn
+    assert recovered.get_all_items() == expected
+
+    recovered.checkpoint()
+    assert (tmp_path / LOG_FILE).stat().st_size == 0
+    snapshot = InventorySnapshot(snapshot_path)
+    assert list(snapshot.iter_items()) == expected
+    assert snapshot.lsn == 5
+    recovered.close()
+
+
+def test_background_checkpoint_keeps_later_writes(manager_cls: Type[Any], tmp_path: Path) -> None:
+    store = _reopen(manager_cls, tmp_path, snapshot_every=2)
+    for i in range(50):
+        store.add_item(f"Item {i}", "Misc", 2.0, i)
+    expected = store.get_all_items()
+    store.close()
+    assert store.checkpoint_error is None
+
+    recovered = _reopen(manager_cls, tmp_path)
+    assert recovered.recovery["snapshot_items"] + recovered.recovery["replayed"] == 50
+    assert recovered.get_all_items() == expected
+    recovered.close()
+
+
+class _Refusing:
+    """Wraps an engine whose ``add_item`` can be made to fail after the record was logged."""
+
+    def __init__(self, manager: Any) -> None:
+        self._manager = manager
+        self.refuse = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._manager, name)
+
+    def add_item(self, *args: Any) -> int:
+        if self.refuse:
+            raise MemoryError("engine refused the item")
+        return self._manager.add_item(*args)
+
+
+def test_refused_mutation_is_cut_off_the_log(manager_cls: Type[Any], tmp_path: Path) -> None:
+    engine = _Refusing(manager_cls())
+    store = DurableInventory(engine, tmp_path)
+    store.add_item("Hammer", "Hand Tools", 24.99, 18)
+    engine.refuse = True
+    with pytest.raises(MemoryError):
+        store.add_item("Drill", "Power Tools", 149.0, 9)
+    engine.refuse = False
+    saw = store.add_item("Saw", "Hand Tools", 19.5, 4)
+    store.close()
+
+    recovered = _reopen(manager_cls, tmp_path)
+    assert recovered.recovery["replayed"] == 2
+    assert recovered.get_all_items() == [
+        {"id": 1, "name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18},
+        {"id": saw, "name": "Saw", "category": "Hand Tools", "price": 19.5, "quantity": 4},
+    ]
+    recovered.close()
+
+
+def test_version_keeps_growing_across_reset(manager_cls: Type[Any], tmp_path: Path) -> None:
+    store = _reopen(manager_cls, tmp_path)
+    for i in range(3):
+        store.add_item(f"Item {i}", "Misc", 2.0, i)
+    before = store.version
+
+    store.reset(manager_cls())
+    assert store.version > before
+    reset = store.version
+    store.add_item("Level", "Hand Tools", 12.0, 6)
+    assert store.version > reset
+    store.close()
+
+
+def test_torn_log_tail_is_truncated(manager_cls: Type[Any], tmp_path: Path) -> None:
+    store = _reopen(manager_cls, tmp_path)
+    store.add_item("Hammer", "Hand Tools", 24.99, 18)
+    store.add_item("Drill", "Power Tools", 149.0, 9)
+    store.close()
+
+    log_path = tmp_path / LOG_FILE
+    intact = log_path.read_bytes()
+    log_path.write_bytes(intact[:-7])
+
+    recovered = _reopen(manager_cls, tmp_path)
+    assert [item["name"] for item in recovered.get_all_items()] == ["Hammer"]
+    assert recovered.recovery["truncated_bytes"] > 0
+    # The next write lands where the torn record was, so the log stays replayable
+    recovered.add_item("Saw", "Hand Tools", 19.5, 4)
+    recovered.close()
+    assert [item["name"] for item in _reopen(manager_cls, tmp_path).get_all_items()] == ["Hammer", "Saw"]
+
+
+def test_concurrent_writers_share_fsyncs(tmp_path: Path) -> None:
+    from inventory_core import InventoryManager
+
+    store = DurableInventory(InventoryManager(), tmp_path, fsync="always")
+
+    def writer(worker: int) -> None:
+        for i in range(25):
+            store.add_item(f"Worker {worker} item {i}", "Misc", 1.0, i)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.written_lsn == store.durable_lsn == 100
+    store.close()
+    assert _reopen(InventoryManager, tmp_path).get_statistics()["total_items"] == 100
+
+
+def test_api_writes_survive_restart(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import backend.main as main
+    from inventory_core import InventoryManager
+
+    store = DurableInventory(InventoryManager(), tmp_path, fsync="manual")
+    monkeypatch.setattr(main, "inventory", store)
+    monkeypatch.setattr(main, "_etag_source", ("restart", store))
+    client = TestClient(main.app)
+    item_id = client.post(
+        "/items/", json={"name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18}
+    ).json()["id"]
+    assert client.put(f"/items/{item_id}", json={"quantity": 3}).status_code == 200
+    assert store.durable_lsn == store.written_lsn == 2
+    store.close()
+
+    recovered = _reopen(InventoryManager, tmp_path)
+    assert recovered.get_item(item_id)["quantity"] == 3
@@ -0,0 +1,135 @@
+import csv
+import importlib.util
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Type
+
+import pytest
+
+from inventory_snapshot import (
+    InventorySnapshot,
+    SnapshotError,
+    export_csv,
+    import_csv,
+    load_snapshot,
+    write_snapshot,
+    write_snapshot_buffer,
+)
+
+ENGINES = [
+    pytest.param("inventory_core", id="core"),
+    pytest.param(
+        "inventory_columnar",
+        id="columnar",
+        marks=pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="numpy not installed"),
+    ),
+]
+
+ITEMS = [
+    {"id": 2, "name": "Hammer", "category": "Hand Tools", "price": 24.99, "quantity": 18},
+    {"id": 5, "name": "Drill 18V", "category": "Power Tools", "price": 149.0, "quantity": 9},
+    {"id": 9, "name": "Säge", "category": "Hand Tools", "price": 19.5, "quantity": 0},
+]
+
+
+@pytest.fixture(params=ENGINES)
+def manager_cls(request: pytest.FixtureRequest) -> Type[Any]:
+    return import_module(request.param).InventoryManager
+
+
+def test_snapshot_round_trips_items(tmp_path: Path) -> None:
+    path = tmp_path / "inventory.snap"
+    assert write_snapshot(path, ITEMS, next_id=12, lsn=7) == 3
+
+    snapshot = InventorySnapshot(path)
+    assert (snapshot.count, snapshot.next_id, snapshot.lsn) == (3, 12, 7)
+    assert snapshot.categories == ["Hand Tools", "Power Tools"]
+    assert snapshot.names[2] == "Säge"
+    assert list(snapshot.iter_items()) == ITEMS
+
+    empty = tmp_path / "empty.snap"
+    write_snapshot(empty, [], next_id=1)
+    assert list(InventorySnapshot(empty).iter_items()) == []
+
+
+def test_in_memory_snapshots_are_read_without_copying(tmp_path: Path) -> None:
+    path = tmp_path / "inventory.snap"
+    write_snapshot(path, ITEMS, next_id=12, lsn=7)
+    data = path.read_bytes()
+
+    snapshot = InventorySnapshot.from_buffer(data)
+    assert snapshot.path is None and snapshot.ids.readonly
+    assert list(snapshot.iter_items()) == ITEMS
+    assert snapshot.item(2) == ITEMS[2]
+
+    view = snapshot.as_view(3, {"total_items": 3, "total_value": 0.0, "tree_height": 0, "unique_categories": 2})
+    assert view.get_item(5) == ITEMS[1] and view.get_item(6) is None
+    assert view.get_items_page(5, after_id=2) == ITEMS[1:]
+
+    copy = tmp_path / "copy.snap"
+    assert write_snapshot_buffer(copy, data) == 3
+    assert copy.read_bytes() == data
+    with pytest.raises(SnapshotError):
+        InventorySnapshot.from_buffer(data[:40])
+
+
+def test_compiled_core_columns_match_its_items() -> None:
+    inventory_core = import_module("inventory_core")
+    if not hasattr(inventory_core.InventoryManager, "get_columns"):
+        pytest.skip("needs the compiled inventory_core extension")
+    inventory = inventory_core.InventoryManager()
+    inventory.restore(ITEMS, 12)
+
+    columns = InventorySnapshot.from_buffer(inventory.get_columns(lsn=4))
+    assert (columns.count, columns.next_id, columns.lsn) == (3, 12, 4)
+    assert list(columns.iter_items()) == inventory.get_all_items() == ITEMS
+
+
+def test_engines_load_snapshots_and_keep_the_file_intact(manager_cls: Type[Any], tmp_path: Path) -> None:
+    path = tmp_path / "inventory.snap"
+    write_snapshot(path, ITEMS, next_id=12)
+
+    # The compiled core has no consistency checks to turn on
+    checked = {"check_consistency": True} if hasattr(manager_cls, "verify_consistency") else {}
+    inventory = manager_cls(**checked)
+    load_snapshot(inventory, path)
+    assert inventory.get_all_items() == ITEMS
+    assert [item["id"] for item in inventory.search_by_name("dri")] == [5]
+    assert [item["id"] for item in inventory.search_by_category("hand tools")] == [2, 9]
+
+    inventory.update_item(2, "Claw Hammer", "Hand Tools", 26.5, 17)
+    inventory.remove_item(5)
+    assert inventory.add_item("Level", "Measuring", 12.0, 6) == 12
+    assert [item["name"] for item in inventory.get_all_items()] == ["Claw Hammer", "Säge", "Level"]
+    assert list(InventorySnapshot(path).iter_items()) == ITEMS
+
+
+def test_csv_import_and_export(tmp_path: Path) -> None:
+    source = tmp_path / "items.csv"
+    source.write_text("name,category,price,quantity\nHammer,Hand Tools,24.99,18\nDrill,Power Tools,149.0,9\n")
+    path = tmp_path / "inventory.snap"
+    assert import_csv(source, path) == 2
+    assert InventorySnapshot(path).next_id == 3
+
+    exported = tmp_path / "out.csv"
+    export_csv(path, exported)
+    with open(exported, newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [(row["id"], row["name"], row["price"]) for row in rows] == [("1", "Hammer", "24.99"), ("2", "Drill", "149.0")]
+
+    source.write_text("name,category,price,quantity\nHammer,Hand Tools,-1,18\n")
+    with pytest.raises(ValueError, match="items.csv:2"):
+        import_csv(source, path)
+
+
+def test_damaged_files_are_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "inventory.snap"
+    write_snapshot(path, ITEMS, next_id=12)
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-4])
+    with pytest.raises(SnapshotError, match="truncated"):
+        InventorySnapshot(path)
+    path.write_bytes(b"NOTASNAP" + data[8:])
+    with pytest.raises(SnapshotError, match="not an inventory snapshot"):
+        InventorySnapshot(path)
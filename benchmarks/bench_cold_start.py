@@ -0,0 +1,69 @@
+"""Compare cold-start time: CSV parse + add_items versus attaching a binary snapshot.
+
+Usage: python benchmarks/bench_cold_start.py [--items 1000000] [--engine columnar]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from importlib import import_module
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from inventory_snapshot import import_csv, load_snapshot  # noqa: E402
+
+ENGINES = {"core": "inventory_core", "columnar": "inventory_columnar"}
+
+
+def _write_csv(path: Path, items: int) -> None:
+    with open(PROJECT_ROOT / "hardware_inventory_10000.csv", newline="") as handle:
+        catalogue = list(csv.DictReader(handle))
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("name", "category", "price", "quantity"))
+        for index in range(items):
+            row = catalogue[index % len(catalogue)]
+            writer.writerow((f"{row['name']} #{index}", row["category"], row["price"], row["quantity"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="columnar")
+    args = parser.parse_args()
+    manager_cls = import_module(ENGINES[args.engine]).InventoryManager
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path, snapshot_path = Path(workdir) / "items.csv", Path(workdir) / "items.snap"
+        _write_csv(csv_path, args.items)
+        import_csv(csv_path, snapshot_path)
+
+        started = time.perf_counter()
+        with open(csv_path, newline="") as handle:
+            rows = [
+                {"name": row["name"], "category": row["category"], "price": float(row["price"]),
+                 "quantity": int(row["quantity"])}
+                for row in csv.DictReader(handle)
+            ]
+        manager_cls().add_items(rows)
+        csv_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        manager = manager_cls()
+        load_snapshot(manager, snapshot_path)
+        snapshot_seconds = time.perf_counter() - started
+        assert manager.get_statistics()["total_items"] == args.items
+
+    print(f"{args.engine}, {args.items:,} items")
+    print(f"  CSV parse + add_items  {csv_seconds * 1000:10.1f} ms")
+    print(f"  snapshot load          {snapshot_seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
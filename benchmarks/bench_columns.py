@@ -0,0 +1,93 @@
+"""Compare reading the compiled core as dicts versus as packed columns.
+
+``get_all_items()`` builds one dict per item while holding the GIL;
+``get_columns()`` packs the items into the snapshot layout with the GIL
+released and Python reads them through ``InventorySnapshot.from_buffer``.
+While each call runs, a second Python thread counts loop iterations to show
+how much of the interpreter stays available.
+
+Requires the compiled extension (see "Building the C++ extension" in the README).
+
+Usage: python benchmarks/bench_columns.py [--sizes 100000 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import inventory_core  # noqa: E402
+from inventory_snapshot import InventorySnapshot  # noqa: E402
+
+
+def _load(count: int) -> Any:
+    manager = inventory_core.InventoryManager()
+    for start in range(0, count, 100_000):
+        manager.add_items(
+            [
+                {"name": f"Item {index}", "category": f"Category {index % 20}", "price": 9.99, "quantity": index % 50}
+                for index in range(start, min(start + 100_000, count))
+            ]
+        )
+    return manager
+
+
+def _timed_with_bystander(read: Callable[[], int]) -> Tuple[float, int, int]:
+    """Run ``read`` while another thread spins; return (seconds, rows, bystander iterations)."""
+    ticks = 0
+    done = threading.Event()
+
+    def bystander() -> None:
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+
+    thread = threading.Thread(target=bystander)
+    thread.start()
+    started = time.perf_counter()
+    rows = read()
+    elapsed = time.perf_counter() - started
+    done.set()
+    thread.join()
+    return elapsed, rows, ticks
+
+
+def _dicts(manager: Any) -> int:
+    items = manager.get_all_items()
+    sum(item["quantity"] for item in items)
+    return len(items)
+
+
+def _columns(manager: Any) -> int:
+    columns = InventorySnapshot.from_buffer(manager.get_columns())
+    sum(columns.quantities)
+    return columns.count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    if not hasattr(inventory_core.InventoryManager, "get_columns"):
+        raise SystemExit("bench_columns needs the compiled inventory_core extension")
+
+    for count in args.sizes:
+        manager = _load(count)
+        for label, read in (("dicts", _dicts), ("columns", _columns)):
+            elapsed, rows, ticks = _timed_with_bystander(lambda: read(manager))
+            print(
+                f"{count:>10,} items  {label:>7}  {elapsed * 1000:9.1f} ms  {rows:>10,} rows"
+                f"  bystander {ticks / elapsed / 1e6:5.2f}M iterations/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
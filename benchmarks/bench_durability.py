@@ -0,0 +1,80 @@
+"""Measure write throughput with the write-ahead log on and off.
+
+Each scenario inserts the same number of items through ``add_item``:
+
+- ``memory``: the bare engine, no durability;
+- ``fsync=always`` with one and with several writer threads, where concurrent
+  writers share fsyncs through group commit;
+- ``fsync=interval``, where a background thread syncs every 10 ms.
+
+The ``fsync=always`` scenarios write a tenth as many items to keep runs short;
+rates are comparable either way.
+
+Usage: python benchmarks/bench_durability.py [--items 20000] [--threads 8] [--engine core]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from inventory_persistence import DurableInventory  # noqa: E402
+
+ENGINES = {"core": "inventory_core", "columnar": "inventory_columnar"}
+
+
+def _write(store: Any, items: int, threads: int) -> float:
+    per_thread = items // threads
+
+    def writer(worker: int) -> None:
+        for i in range(per_thread):
+            store.add_item(f"Bench item {worker}-{i}", "Benchmarks", 9.99, i % 100)
+
+    workers = [threading.Thread(target=writer, args=(worker,)) for worker in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def _scenario(label: str, build: Callable[[str], Any], items: int, threads: int) -> None:
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = build(data_dir)
+        rate = _write(store, items, threads)
+        if hasattr(store, "close"):
+            store.close()
+    print(f"{label:<32} {rate:12,.0f} writes/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="core")
+    args = parser.parse_args()
+    manager_cls = import_module(ENGINES[args.engine]).InventoryManager
+
+    _scenario("memory (durability off)", lambda _: manager_cls(), args.items, 1)
+    _scenario("fsync=always, 1 writer", lambda d: DurableInventory(manager_cls(), d), args.items // 10, 1)
+    _scenario(
+        f"fsync=always, {args.threads} writers",
+        lambda d: DurableInventory(manager_cls(), d),
+        args.items // 10,
+        args.threads,
+    )
+    _scenario("fsync=interval (10 ms)", lambda d: DurableInventory(manager_cls(), d, fsync="interval"), args.items, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Report the resident cost per item of each Python inventory engine.
+
+Rows are generated from the sample hardware catalogue with a fresh string
+object per field, the way CSV parsing or JSON decoding hands them over, so
+category interning shows up in the numbers.
+
+Usage: python benchmarks/bench_memory.py [--sizes 100000 1000000] [--engines core columnar]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gc
+import sys
+import time
+import tracemalloc
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+ENGINES = {"core": "inventory_core", "columnar": "inventory_columnar"}
+
+
+def _catalogue() -> List[Dict[str, str]]:
+    with open(PROJECT_ROOT / "hardware_inventory_10000.csv", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _rows(catalogue: List[Dict[str, str]], start: int, stop: int) -> Iterator[Dict[str, object]]:
+    for index in range(start, stop):
+        source = catalogue[index % len(catalogue)]
+        yield {
+            "name": f"{source['name']} #{index}",
+            "category": "".join(source["category"]),  # distinct object per row
+            "price": float(source["price"]),
+            "quantity": int(source["quantity"]),
+        }
+
+
+def measure(engine: str, count: int, catalogue: List[Dict[str, str]]) -> None:
+    manager_cls = import_module(ENGINES[engine]).InventoryManager
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+
+    manager = manager_cls()
+    # Insert in slices so the input rows never dominate the measurement
+    for start in range(0, count, 50_000):
+        manager.add_items(list(_rows(catalogue, start, min(start + 50_000, count))))
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_item = (current - baseline) / count
+    print(f"{engine:>9} {count:>10,} items  {per_item:8.1f} bytes/item  ({elapsed:.1f}s to load)")
+    del manager
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=["core", "columnar"])
+    args = parser.parse_args()
+
+    catalogue = _catalogue()
+    for engine in args.engines:
+        for count in args.sizes:
+            measure(engine, count, catalogue)
+
+
+if __name__ == "__main__":
+    main()
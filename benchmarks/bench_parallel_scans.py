@@ -0,0 +1,83 @@
+"""Measure the speedup of the compiled core's parallel full-tree scans.
+
+Times ``get_low_stock`` and a two-character ``search_by_name`` (too short for
+the trigram index, so it scans every name) with the scan pool set to each
+thread count, and reports the speedup over a single thread. Both predicates
+match few items so the numbers reflect the scan rather than building results.
+Trees below ``PARALLEL_SCAN_MIN_ITEMS`` are always scanned serially.
+
+Requires the compiled extension (see "Building the C++ extension" in the README).
+10M items need several GB of memory for the name index.
+
+Usage: python benchmarks/bench_parallel_scans.py [--sizes 100000 1000000 10000000] [--threads 1 2 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import inventory_core  # noqa: E402
+
+SCANS: Dict[str, Callable[[Any], List[dict]]] = {
+    "low stock": lambda manager: manager.get_low_stock(0),
+    "name scan": lambda manager: manager.search_by_name("x9"),
+}
+
+
+def _load(count: int) -> Any:
+    manager = inventory_core.InventoryManager()
+    for start in range(0, count, 100_000):
+        manager.add_items(
+            [
+                {"name": f"Item {index}", "category": "Hardware", "price": 4.5, "quantity": index % 1000}
+                for index in range(start, min(start + 100_000, count))
+            ]
+        )
+    return manager
+
+
+def _best_of(runs: int, scan: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        scan()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not hasattr(inventory_core, "set_scan_threads"):
+        raise SystemExit("bench_parallel_scans needs the compiled inventory_core extension")
+
+    print(f"{os.cpu_count()} CPUs; scans below {inventory_core.PARALLEL_SCAN_MIN_ITEMS:,} items stay serial")
+    for count in args.sizes:
+        manager = _load(count)
+        for label, scan in SCANS.items():
+            baseline = None
+            for threads in args.threads:
+                inventory_core.set_scan_threads(threads)
+                elapsed = _best_of(args.runs, lambda: scan(manager))
+                baseline = baseline or elapsed
+                print(
+                    f"{count:>11,} items  {label:<9}  {threads:>2} threads  "
+                    f"{elapsed * 1000:8.2f} ms  {baseline / elapsed:5.2f}x"
+                )
+        del manager
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare ``GET /items/`` latency with and without per-item Pydantic models.
+
+"before" serves the items the way the API used to: one ``ItemResponse`` per
+row, validated and encoded again by FastAPI through ``response_model``.
+"after" is the API's current route, which encodes the engine rows straight
+to JSON bytes (with orjson when it is installed). Both run in-process through
+the test client against the same seeded inventory; the ``after`` numbers
+include the API's conditional-read middleware.
+
+Usage: python benchmarks/bench_serialization.py [--sizes 1000 10000 100000] [--runs 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend import main as api  # noqa: E402
+
+
+def _models_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/", response_model=List[api.ItemResponse])
+    async def get_all_items():  # type: ignore[no-untyped-def]
+        return [api.ItemResponse(**item) for item in api.inventory.get_all_items()]
+
+    return app
+
+
+def _median_ms(client: TestClient, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        # Uncompressed, so both sides measure encoding alone
+        response = client.get("/items/", headers={"Accept-Encoding": "identity"})
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = "orjson" if api.orjson is not None else "json"
+    print(f"engine {type(api.inventory).__module__}, encoder {encoder}")
+    before, after = TestClient(_models_app()), TestClient(api.app)
+    for count in args.sizes:
+        api.rebuild_inventory(count)
+        # Warm the view cache so both sides measure serialization, not the first snapshot
+        after.get("/items/")
+        models = _median_ms(before, args.runs)
+        rows = _median_ms(after, args.runs)
+        print(f"{count:>9,} items  before {models:9.1f} ms  after {rows:8.1f} ms  {models / rows:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Measure API read throughput as the number of uvicorn workers grows.
+
+Starts an inventory owner process (``inventory_owner.py``), seeds it, then for
+each worker count launches ``uvicorn main:app --workers N`` against the owner
+and drives it with several client processes issuing keep-alive
+``GET /items/?limit=50`` requests at random cursors. Throughput only scales on
+a machine with spare cores; the report includes ``os.cpu_count()``.
+
+Usage: python benchmarks/bench_workers.py [--workers 1 2 4] [--items 100000] [--seconds 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from inventory_owner import connect  # noqa: E402
+
+PORT = 8765
+
+
+def _wait_for(check, timeout: float = 30.0) -> None:  # type: ignore[no-untyped-def]
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError("benchmark process did not come up")
+        time.sleep(0.1)
+
+
+def _healthy() -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+    connection.request("GET", "/health")
+    return connection.getresponse().status == 200
+
+
+def _client(items: int, seconds: float, counts: "multiprocessing.Queue[int]") -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", PORT)
+    deadline, done = time.monotonic() + seconds, 0
+    while time.monotonic() < deadline:
+        connection.request("GET", f"/items/?limit=50&after_id={random.randrange(items)}")
+        response = connection.getresponse()
+        response.read()
+        done += 1
+    counts.put(done)
+
+
+def _throughput(workers: int, clients: int, items: int, seconds: float, env: dict) -> float:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=PROJECT_ROOT / "backend",
+        env=env,
+    )
+    try:
+        _wait_for(_healthy)
+        counts: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+        processes: List[multiprocessing.Process] = [
+            multiprocessing.Process(target=_client, args=(items, seconds, counts)) for _ in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return sum(counts.get() for _ in processes) / seconds
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        address = str(Path(workdir) / "inventory.sock")
+        owner = subprocess.Popen([sys.executable, str(PROJECT_ROOT / "inventory_owner.py"), "--socket", address])
+        try:
+            _wait_for(lambda: Path(address).exists())
+            rows = [
+                {"name": f"Bench item {i}", "category": f"Category {i % 20}", "price": 9.99, "quantity": i % 100}
+                for i in range(args.items)
+            ]
+            connect(address).rebuild(rows)
+
+            env = {**os.environ, "INVENTORY_OWNER": address, "PYTHONPATH": str(PROJECT_ROOT)}
+            print(f"{args.items:,} items, {args.clients} client processes, {os.cpu_count()} CPUs")
+            for workers in args.workers:
+                rate = _throughput(workers, args.clients, args.items, args.seconds, env)
+                print(f"  {workers} worker(s): {rate:10,.0f} req/s")
+        finally:
+            owner.terminate()
+            owner.wait()
+
+
+if __name__ == "__main__":
+    main()
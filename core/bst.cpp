@@ -1,25 +1,94 @@
 #include "bst.h"
+#include "parallel.h"
 #include <algorithm>
+#include <cctype>
+#include <climits>
+#include <cmath>
 #include <iostream>
 using namespace std;
-unique_ptr<BSTNode> InventoryBST::insertHelper(unique_ptr<BSTNode> node, const Item& item) {
+
+// A contiguous run of the in-order sequence: a whole subtree, or one node above the cut
+struct ScanSegment {
+    const BSTNode* node;
+    bool wholeSubtree;
+};
+
+// Cut the tree into segments of at most `grain` items, in id order
+static void partitionTree(const BSTNode* node, size_t grain, vector<ScanSegment>& segments) {
+    if (!node) return;
+    if (node->size <= grain) {
+        segments.push_back({node, true});
+        return;
+    }
+    partitionTree(node->left.get(), grain, segments);
+    segments.push_back({node, false});
+    partitionTree(node->right.get(), grain, segments);
+}
+
+template <typename Predicate>
+vector<const BSTNode*> InventoryBST::filterNodes(Predicate predicate) const {
+    vector<const BSTNode*> results;
+    size_t count = getItemCount();
+    shared_ptr<ScanPool> pool = count >= kParallelScanMinItems ? scanPool() : nullptr;
+    if (!pool || pool->threads() == 1) {
+        forEachNodeInSubtree(root.get(), [&](const BSTNode& node) {
+            if (predicate(node)) results.push_back(&node);
+        });
+        return results;
+    }
+
+    // A few segments per thread so an uneven split still keeps every thread busy
+    vector<ScanSegment> segments;
+    partitionTree(root.get(), max<size_t>(count / (pool->threads() * 4), 1), segments);
+    vector<vector<const BSTNode*>> matches(segments.size());
+    pool->run(segments.size(), [&](size_t index) {
+        const ScanSegment& segment = segments[index];
+        if (!segment.wholeSubtree) {
+            if (predicate(*segment.node)) matches[index].push_back(segment.node);
+            return;
+        }
+        forEachNodeInSubtree(segment.node, [&](const BSTNode& node) {
+            if (predicate(node)) matches[index].push_back(&node);
+        });
+    });
+
+    size_t total = 0;
+    for (const auto& part : matches) total += part.size();
+    results.reserve(total);
+    for (const auto& part : matches) {
+        results.insert(results.end(), part.begin(), part.end());
+    }
+    return results;
+}
+
+static vector<Item> nodeItems(const vector<const BSTNode*>& nodes) {
+    vector<Item> items;
+    items.reserve(nodes.size());
+    for (const BSTNode* node : nodes) items.push_back(node->data);
+    return items;
+}
+
+unique_ptr<BSTNode> InventoryBST::insertHelper(unique_ptr<BSTNode> node, const Item& item, const ItemKeys& keys) {
     // Standard BST insert
     if (!node) {
-        return make_unique<BSTNode>(item);
+        return make_unique<BSTNode>(item, keys);
     }
 
     if (item.id < node->data.id) {
-        node->left = insertHelper(move(node->left), item);
+        node->left = insertHelper(move(node->left), item, keys);
     } else if (item.id > node->data.id) {
-        node->right = insertHelper(move(node->right), item);
+        node->right = insertHelper(move(node->right), item, keys);
     } else {
         // equal ids: replace data
         node->data = item;
+        node->nameKey = keys.name;
+        node->categoryKey = keys.category;
+        updateNode(node.get());
         return node;
     }
 
     // Update height and rebalance (AVL)
-    updateHeight(node.get());
+    updateNode(node.get());
     int balance = getBalance(node.get());
 
     // Left Left
@@ -47,8 +116,55 @@ unique_ptr<BSTNode> InventoryBST::insertHelper(unique_ptr<BSTNode> node, const I
     return node;
 }
 
-void InventoryBST::insert(const Item& item) {
-    root = insertHelper(move(root), item);
+void InventoryBST::insert(const Item& item, const ItemKeys& keys) {
+    if (const BSTNode* existing = searchHelper(root.get(), item.id)) {
+        unindexItem(*existing);
+    }
+    root = insertHelper(move(root), item, keys);
+    indexItem(item, keys);
+}
+
+static const size_t kGramSize = 3;
+
+vector<string> InventoryBST::nameGrams(const string& folded) {
+    vector<string> grams;
+    for (size_t i = 0; i + kGramSize <= folded.size(); ++i) {
+        grams.push_back(folded.substr(i, kGramSize));
+    }
+    sort(grams.begin(), grams.end());
+    grams.erase(unique(grams.begin(), grams.end()), grams.end());
+    return grams;
+}
+
+void InventoryBST::indexItem(const Item& item, const ItemKeys& keys) {
+    categoryIndex[keys.category].insert(item.id);
+    ++categoryCounts[item.category];
+    priceIndex.emplace(item.price, item.id);
+    quantityIndex.emplace(static_cast<double>(item.quantity), item.id);
+    for (const auto& gram : nameGrams(keys.name)) {
+        nameGramIndex[gram].insert(item.id);
+    }
+}
+
+void InventoryBST::unindexItem(const BSTNode& node) {
+    const Item& item = node.data;
+    priceIndex.erase({item.price, item.id});
+    quantityIndex.erase({static_cast<double>(item.quantity), item.id});
+
+    auto it = categoryIndex.find(node.categoryKey);
+    if (it != categoryIndex.end()) {
+        it->second.erase(item.id);
+        if (it->second.empty()) categoryIndex.erase(it);
+    }
+    auto count = categoryCounts.find(item.category);
+    if (count != categoryCounts.end() && --count->second == 0) categoryCounts.erase(count);
+
+    for (const auto& gram : nameGrams(node.nameKey)) {
+        auto posting = nameGramIndex.find(gram);
+        if (posting == nameGramIndex.end()) continue;
+        posting->second.erase(item.id);
+        if (posting->second.empty()) nameGramIndex.erase(posting);
+    }
 }
 
 BSTNode* InventoryBST::searchHelper(BSTNode* node, int id) const {
@@ -67,48 +183,279 @@ Item* InventoryBST::search(int id) const {
     return result ? &result->data : nullptr;
 }
 
-void InventoryBST::inOrderHelper(BSTNode* node, function<void(const Item&)> callback) const {
-    if (!node) return;
-    
-    inOrderHelper(node->left.get(), callback);
-    callback(node->data);
-    inOrderHelper(node->right.get(), callback);
-}
-
 vector<Item> InventoryBST::getAllItems() const {
     vector<Item> items;
-    inOrderHelper(root.get(), [&](const Item& item) {
+    forEachInOrder([&](const Item& item) {
         items.push_back(item);
     });
     return items;
 }
 
-vector<Item> InventoryBST::searchByName(const string& name) const {
+void InventoryBST::collectAfter(BSTNode* node, int afterId, size_t limit, vector<Item>& out) const {
+    if (!node || out.size() >= limit) return;
+
+    // Subtrees left of a node at or before the cursor hold only smaller ids: skip them
+    if (node->data.id > afterId) {
+        collectAfter(node->left.get(), afterId, limit, out);
+        if (out.size() >= limit) return;
+        out.push_back(node->data);
+    }
+    collectAfter(node->right.get(), afterId, limit, out);
+}
+
+void InventoryBST::collectRange(const BSTNode* node, int firstId, int lastId, size_t limit,
+                                vector<Item>& out) const {
+    if (!node || out.size() >= limit) return;
+
+    // Only enter subtrees that can hold ids inside [firstId, lastId]
+    int id = node->data.id;
+    if (id > firstId) collectRange(node->left.get(), firstId, lastId, limit, out);
+    if (out.size() >= limit || id > lastId) return;
+    if (id >= firstId) out.push_back(node->data);
+    if (id < lastId) collectRange(node->right.get(), firstId, lastId, limit, out);
+}
+
+void InventoryBST::collectIds(const BSTNode* node, const int* first, const int* last, vector<Item>& out) {
+    if (!node || first == last) return;
+    // Split the span at this node: smaller ids live on the left, larger on the right
+    const int* split = lower_bound(first, last, node->data.id);
+    collectIds(node->left.get(), first, split, out);
+    if (split != last && *split == node->data.id) {
+        out.push_back(node->data);
+        ++split;
+    }
+    collectIds(node->right.get(), split, last, out);
+}
+
+static int clampToId(double value) {
+    if (value <= static_cast<double>(INT_MIN)) return INT_MIN;
+    if (value >= static_cast<double>(INT_MAX)) return INT_MAX;
+    return static_cast<int>(value);
+}
+
+vector<Item> InventoryBST::rangeFromIndex(const set<pair<double, int>>& index, double low, double high,
+                                          size_t limit, const optional<pair<double, int>>& after) const {
     vector<Item> results;
-    inOrderHelper(root.get(), [&](const Item& item) {
-        if (item.name.find(name) != string::npos) {
-            results.push_back(item);
-        }
-    });
+    auto it = index.lower_bound({low, INT_MIN});
+    if (after && *after >= make_pair(low, INT_MIN)) {
+        it = index.upper_bound(*after);
+    }
+    for (; it != index.end() && it->first <= high && results.size() < limit; ++it) {
+        results.push_back(*search(it->second));
+    }
     return results;
 }
 
-vector<Item> InventoryBST::searchByCategory(const string& category) const {
+vector<Item> InventoryBST::getItemsInRange(RangeField field, double low, double high, size_t limit,
+                                           const optional<pair<double, int>>& after) const {
+    if (field == RangeField::Price) return rangeFromIndex(priceIndex, low, high, limit, after);
+    if (field == RangeField::Quantity) return rangeFromIndex(quantityIndex, low, high, limit, after);
+
+    int firstId = clampToId(ceil(low));
+    int lastId = clampToId(floor(high));
+    if (after && after->second >= firstId) {
+        if (after->second == INT_MAX) return {};
+        firstId = after->second + 1;
+    }
     vector<Item> results;
-    inOrderHelper(root.get(), [&](const Item& item) {
-        if (item.category == category) {
-            results.push_back(item);
+    if (firstId > lastId || limit == 0) return results;
+    collectRange(root.get(), firstId, lastId, limit, results);
+    return results;
+}
+
+vector<Item> InventoryBST::getItemsAfter(int afterId, size_t limit) const {
+    vector<Item> items;
+    items.reserve(limit);
+    collectAfter(root.get(), afterId, limit, items);
+    return items;
+}
+
+vector<Item> InventoryBST::searchByName(const string& query) const {
+    vector<Item> results;
+    vector<string> grams = nameGrams(query);
+
+    // Queries shorter than one trigram cannot be narrowed by the index
+    if (grams.empty()) {
+        return nodeItems(filterNodes([&](const BSTNode& node) {
+            return node.nameKey.find(query) != string::npos;
+        }));
+    }
+
+    vector<const unordered_set<int>*> postings;
+    for (const auto& gram : grams) {
+        auto it = nameGramIndex.find(gram);
+        if (it == nameGramIndex.end()) return results;
+        postings.push_back(&it->second);
+    }
+    sort(postings.begin(), postings.end(),
+         [](const unordered_set<int>* a, const unordered_set<int>* b) { return a->size() < b->size(); });
+
+    vector<int> matches;
+    for (int id : *postings.front()) {
+        bool inAll = all_of(postings.begin() + 1, postings.end(),
+                            [id](const unordered_set<int>* posting) { return posting->count(id) > 0; });
+        if (inAll && searchHelper(root.get(), id)->nameKey.find(query) != string::npos) {
+            matches.push_back(id);
         }
-    });
+    }
+    sort(matches.begin(), matches.end());
+
+    results.reserve(matches.size());
+    for (int id : matches) {
+        results.push_back(*search(id));
+    }
+    return results;
+}
+
+// Entries of a (value, id) index with low <= value <= high
+static pair<set<pair<double, int>>::const_iterator, set<pair<double, int>>::const_iterator>
+indexRange(const set<pair<double, int>>& index, double low, double high) {
+    return {index.lower_bound({low, INT_MIN}), index.upper_bound({high, INT_MAX})};
+}
+
+// Size of [first, last), but stop counting once it exceeds `cap`
+template <typename Iterator>
+static size_t countUpTo(Iterator first, Iterator last, size_t cap) {
+    size_t count = 0;
+    for (; first != last && count <= cap; ++first) ++count;
+    return count;
+}
+
+QueryResult InventoryBST::queryItems(const ItemQuery& query) const {
+    QueryResult result;
+    const optional<string>& nameQuery = query.name;
+    const optional<string>& categoryKey = query.category;
+    bool priceBounded = query.minPrice > -HUGE_VAL || query.maxPrice < HUGE_VAL;
+    bool quantityBounded = query.minQuantity > -HUGE_VAL || query.maxQuantity < HUGE_VAL;
+
+    // Each index offers exact candidate ids; the smallest drives the scan and the
+    // hashed ones are probed for membership before a record is looked at
+    enum class Driver { Scan, Name, Category, Price, Quantity } driver = Driver::Scan;
+    size_t best = getItemCount();
+    vector<const unordered_set<int>*> postings;
+    if (nameQuery) {
+        for (const auto& gram : nameGrams(*nameQuery)) {
+            auto it = nameGramIndex.find(gram);
+            if (it == nameGramIndex.end()) return result;
+            postings.push_back(&it->second);
+        }
+        sort(postings.begin(), postings.end(),
+             [](const unordered_set<int>* a, const unordered_set<int>* b) { return a->size() < b->size(); });
+        if (!postings.empty() && postings.front()->size() < best) {
+            driver = Driver::Name;
+            best = postings.front()->size();
+        }
+    }
+    const set<int>* categoryIds = nullptr;
+    if (categoryKey) {
+        auto it = categoryIndex.find(*categoryKey);
+        if (it == categoryIndex.end()) return result;
+        categoryIds = &it->second;
+        if (categoryIds->size() < best) {
+            driver = Driver::Category;
+            best = categoryIds->size();
+        }
+    }
+    // Ordered indexes have no cheap size, so count only while they could still win
+    auto priceRange = indexRange(priceIndex, query.minPrice, query.maxPrice);
+    auto quantityRange = indexRange(quantityIndex, query.minQuantity, query.maxQuantity);
+    if (priceBounded) {
+        size_t count = countUpTo(priceRange.first, priceRange.second, best);
+        if (count < best) {
+            driver = Driver::Price;
+            best = count;
+        }
+    }
+    if (quantityBounded) {
+        size_t count = countUpTo(quantityRange.first, quantityRange.second, best);
+        if (count < best) {
+            driver = Driver::Quantity;
+            best = count;
+        }
+    }
+
+    auto matches = [&](const BSTNode& node) {
+        const Item& item = node.data;
+        if (nameQuery && node.nameKey.find(*nameQuery) == string::npos) return false;
+        if (categoryKey && node.categoryKey != *categoryKey) return false;
+        return item.price >= query.minPrice && item.price <= query.maxPrice &&
+               item.quantity >= query.minQuantity && item.quantity <= query.maxQuantity;
+    };
+    vector<const BSTNode*> found;
+    auto consider = [&](int id) {
+        for (size_t i = driver == Driver::Name ? 1 : 0; i < postings.size(); ++i) {
+            if (!postings[i]->count(id)) return;
+        }
+        if (categoryIds && driver != Driver::Category && !categoryIds->count(id)) return;
+        const BSTNode* node = searchHelper(root.get(), id);
+        if (matches(*node)) found.push_back(node);
+    };
+    switch (driver) {
+        case Driver::Scan:
+            found = filterNodes(matches);
+            break;
+        case Driver::Name:
+            for (int id : *postings.front()) consider(id);
+            break;
+        case Driver::Category:
+            for (int id : *categoryIds) consider(id);
+            break;
+        case Driver::Price:
+            for (auto it = priceRange.first; it != priceRange.second; ++it) consider(it->second);
+            break;
+        case Driver::Quantity:
+            for (auto it = quantityRange.first; it != quantityRange.second; ++it) consider(it->second);
+            break;
+    }
+
+    result.total = found.size();
+    if (query.offset >= found.size() || query.limit == 0) return result;
+    size_t stop = query.offset + min(query.limit, found.size() - query.offset);
+    // Names are compared by their folded keys
+    vector<size_t> order(found.size());
+    for (size_t i = 0; i < order.size(); ++i) order[i] = i;
+    auto before = [&](size_t a, size_t b) {
+        const Item& x = found[a]->data;
+        const Item& y = found[b]->data;
+        switch (query.sort) {
+            case QuerySort::Name:
+                if (found[a]->nameKey != found[b]->nameKey) return found[a]->nameKey < found[b]->nameKey;
+                break;
+            case QuerySort::Price:
+                if (x.price != y.price) return x.price < y.price;
+                break;
+            case QuerySort::Quantity:
+                if (x.quantity != y.quantity) return x.quantity < y.quantity;
+                break;
+            case QuerySort::Id:
+                break;
+        }
+        return x.id < y.id;
+    };
+    if (query.descending) {
+        partial_sort(order.begin(), order.begin() + stop, order.end(), [&](size_t a, size_t b) { return before(b, a); });
+    } else {
+        partial_sort(order.begin(), order.begin() + stop, order.end(), before);
+    }
+    result.items.reserve(stop - query.offset);
+    for (size_t i = query.offset; i < stop; ++i) result.items.push_back(found[order[i]]->data);
+    return result;
+}
+
+vector<Item> InventoryBST::searchByCategory(const string& categoryKey) const {
+    vector<Item> results;
+    auto it = categoryIndex.find(categoryKey);
+    if (it == categoryIndex.end()) return results;
+
+    // The id set is sorted, so one walk pruned to those ids fetches every item
+    vector<int> ids(it->second.begin(), it->second.end());
+    results.reserve(ids.size());
+    collectIds(root.get(), ids.data(), ids.data() + ids.size(), results);
     return results;
 }
 
 double InventoryBST::getTotalValue() const {
-    double total = 0.0;
-    inOrderHelper(root.get(), [&](const Item& item) {
-        total += item.price * item.quantity;
-    });
-    return total;
+    return root ? root->valueSum : 0.0;
 }
 
 int InventoryBST::getTreeHeight() const {
@@ -116,9 +463,99 @@ int InventoryBST::getTreeHeight() const {
 }
 
 size_t InventoryBST::getItemCount() const {
-    size_t count = 0;
-    inOrderHelper(root.get(), [&](const Item&) { count++; });
-    return count;
+    return root ? root->size : 0;
+}
+
+size_t InventoryBST::getCategoryCount() const {
+    return categoryCounts.size();
+}
+
+size_t InventoryBST::getTotalDepth() const {
+    return root ? root->depthSum : 0;
+}
+
+size_t InventoryBST::getBalancedNodeCount() const {
+    return root ? root->balancedCount : 0;
+}
+
+static size_t subtreeSize(const BSTNode* node) {
+    return node ? node->size : 0;
+}
+
+static double subtreeValue(const BSTNode* node) {
+    return node ? node->valueSum : 0.0;
+}
+
+size_t InventoryBST::rank(int id) const {
+    size_t smaller = 0;
+    const BSTNode* node = root.get();
+    while (node) {
+        if (id <= node->data.id) {
+            node = node->left.get();
+        } else {
+            smaller += subtreeSize(node->left.get()) + 1;
+            node = node->right.get();
+        }
+    }
+    return smaller;
+}
+
+const Item* InventoryBST::select(size_t index) const {
+    const BSTNode* node = root.get();
+    while (node) {
+        size_t leftSize = subtreeSize(node->left.get());
+        if (index < leftSize) {
+            node = node->left.get();
+        } else if (index == leftSize) {
+            return &node->data;
+        } else {
+            index -= leftSize + 1;
+            node = node->right.get();
+        }
+    }
+    return nullptr;
+}
+
+RangeTotals InventoryBST::rangeTotals(int lowId, int highId) const {
+    RangeTotals totals;
+    // Descend to the first node inside the range; both boundaries split below it
+    const BSTNode* split = root.get();
+    while (split && (split->data.id < lowId || split->data.id > highId)) {
+        split = split->data.id < lowId ? split->right.get() : split->left.get();
+    }
+    if (!split) return totals;
+
+    auto addNode = [&](const BSTNode* node) {
+        totals.count += 1;
+        totals.value += node->data.price * node->data.quantity;
+    };
+    auto addSubtree = [&](const BSTNode* node) {
+        totals.count += subtreeSize(node);
+        totals.value += subtreeValue(node);
+    };
+
+    addNode(split);
+    // Left boundary: every node at or above lowId brings its whole right subtree along
+    for (const BSTNode* node = split->left.get(); node;) {
+        if (node->data.id >= lowId) {
+            addNode(node);
+            addSubtree(node->right.get());
+            node = node->left.get();
+        } else {
+            node = node->right.get();
+        }
+    }
+    // Right boundary, mirrored
+    for (const BSTNode* node = split->right.get(); node;) {
+        if (node->data.id <= highId) {
+            addNode(node);
+            addSubtree(node->left.get());
+            node = node->right.get();
+        } else {
+            node = node->left.get();
+        }
+    }
+    return totals;
 }
 
 unique_ptr<BSTNode> InventoryBST::deleteHelper(unique_ptr<BSTNode> node, int id) {
@@ -134,10 +571,12 @@ unique_ptr<BSTNode> InventoryBST::deleteHelper(unique_ptr<BSTNode> node, int id)
         
         BSTNode* minNode = findMin(node->right.get());
         node->data = minNode->data;
+        node->nameKey = minNode->nameKey;
+        node->categoryKey = minNode->categoryKey;
         node->right = deleteHelper(move(node->right), minNode->data.id);
     }
     // Update height and rebalance
-    updateHeight(node.get());
+    updateNode(node.get());
     int balance = getBalance(node.get());
 
     // Left Left
@@ -174,11 +613,22 @@ int InventoryBST::getHeight(BSTNode* node) const {
     return node ? node->height : 0;
 }
 
-void InventoryBST::updateHeight(BSTNode* node) const {
+void InventoryBST::updateNode(BSTNode* node) const {
     if (!node) return;
     int lh = node->left ? node->left->height : 0;
     int rh = node->right ? node->right->height : 0;
     node->height = 1 + max(lh, rh);
+    node->size = 1 + subtreeSize(node->left.get()) + subtreeSize(node->right.get());
+    node->valueSum = node->data.price * node->data.quantity +
+                     subtreeValue(node->left.get()) + subtreeValue(node->right.get());
+    // Every node below sits one level deeper than it does in its child's subtree
+    node->depthSum = 0;
+    node->balancedCount = abs(lh - rh) <= 1 ? 1 : 0;
+    for (const BSTNode* child : {node->left.get(), node->right.get()}) {
+        if (!child) continue;
+        node->depthSum += child->depthSum + child->size;
+        node->balancedCount += child->balancedCount;
+    }
 }
 
 int InventoryBST::getBalance(BSTNode* node) const {
@@ -197,9 +647,9 @@ unique_ptr<BSTNode> InventoryBST::rightRotate(unique_ptr<BSTNode> y) {
     x->right = move(y);
     x->right->left = move(T2);
 
-    // Update heights
-    updateHeight(x->right.get());
-    updateHeight(x.get());
+    // Update heights and aggregates, child first
+    updateNode(x->right.get());
+    updateNode(x.get());
 
     return x;
 }
@@ -213,32 +663,66 @@ unique_ptr<BSTNode> InventoryBST::leftRotate(unique_ptr<BSTNode> x) {
     y->left = move(x);
     y->left->right = move(T2);
 
-    // Update heights
-    updateHeight(y->left.get());
-    updateHeight(y.get());
+    // Update heights and aggregates, child first
+    updateNode(y->left.get());
+    updateNode(y.get());
 
     return y;
 }
 
 bool InventoryBST::remove(int id) {
-    if (!search(id)) return false;
+    const BSTNode* existing = searchHelper(root.get(), id);
+    if (!existing) return false;
+    unindexItem(*existing);
     root = deleteHelper(move(root), id);
     return true;
 }
 
-bool InventoryBST::update(const Item& newData) {
-    Item* existing = search(newData.id);
-    if (!existing) return false;
-    *existing = newData;
+bool InventoryBST::update(const Item& newData, const ItemKeys& keys) {
+    // Remember the path so the value sums above the item can be refreshed
+    vector<BSTNode*> path;
+    BSTNode* node = root.get();
+    while (node && node->data.id != newData.id) {
+        path.push_back(node);
+        node = newData.id < node->data.id ? node->left.get() : node->right.get();
+    }
+    if (!node) return false;
+    unindexItem(*node);
+    node->data = newData;
+    node->nameKey = keys.name;
+    node->categoryKey = keys.category;
+    indexItem(newData, keys);
+
+    updateNode(node);
+    for (auto it = path.rbegin(); it != path.rend(); ++it) {
+        updateNode(*it);
+    }
     return true;
 }
 
 vector<Item> InventoryBST::getLowStockItems(int threshold) const {
-    vector<Item> results;
-    inOrderHelper(root.get(), [&](const Item& item) {
-        if (item.quantity <= threshold) {
-            results.push_back(item);
+    // The index holds (quantity, id) in order, so each quantity level is an
+    // ascending run of ids; merge the runs pairwise into one id-ordered list
+    vector<int> ids;
+    vector<size_t> runs{0};
+    auto end = quantityIndex.upper_bound({static_cast<double>(threshold), INT_MAX});
+    for (auto it = quantityIndex.begin(); it != end; ++it) {
+        if (!ids.empty() && it->first != prev(it)->first) runs.push_back(ids.size());
+        ids.push_back(it->second);
+    }
+    runs.push_back(ids.size());
+    while (runs.size() > 2) {
+        vector<size_t> merged{0};
+        for (size_t i = 0; i + 2 < runs.size(); i += 2) {
+            inplace_merge(ids.begin() + runs[i], ids.begin() + runs[i + 1], ids.begin() + runs[i + 2]);
+            merged.push_back(runs[i + 2]);
         }
-    });
+        if (runs.size() % 2 == 0) merged.push_back(runs.back());
+        runs = move(merged);
+    }
+
+    vector<Item> results;
+    results.reserve(ids.size());
+    collectIds(root.get(), ids.data(), ids.data() + ids.size(), results);
     return results;
 }
\ No newline at end of file
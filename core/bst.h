@@ -5,6 +5,12 @@
 #include <memory>
 #include <vector>
 #include <functional>
+#include <set>
+#include <unordered_map>
+#include <unordered_set>
+#include <optional>
+#include <utility>
+#include <cmath>
 using namespace std;
 struct Item {
     int id;
@@ -18,48 +24,159 @@ struct Item {
         : id(id), name(name), category(category), price(price), quantity(quantity) {}
 };
 
+// Case-folded name and category of an item. InventoryBST never folds text itself:
+// callers fold stored items and queries the same way (the Python binding uses
+// str.lower(), so non-ASCII text matches exactly as in the Python engines).
+struct ItemKeys {
+    string name;
+    string category;
+};
+
 class BSTNode {
 public:
     Item data;
+    // Folded name and category, kept with the item so scans need not fold them again
+    string nameKey;
+    string categoryKey;
     unique_ptr<BSTNode> left;
     unique_ptr<BSTNode> right;
     int height;
+    // Subtree aggregates, recomputed from the children whenever the height is
+    size_t size;
+    double valueSum;
+    size_t depthSum;       // sum of node depths, counted from this node
+    size_t balancedCount;  // nodes whose balance factor is in [-1, 1]
     
-    BSTNode(const Item& item) 
-        : data(item), left(nullptr), right(nullptr), height(1) {}
+    BSTNode(const Item& item, ItemKeys keys)
+        : data(item), nameKey(move(keys.name)), categoryKey(move(keys.category)), left(nullptr), right(nullptr), height(1),
+          size(1), valueSum(item.price * item.quantity), depthSum(0), balancedCount(1) {}
+};
+
+// Item fields that range queries can filter and order by
+enum class RangeField { Id, Price, Quantity };
+
+// Count and inventory value of the items in an id range
+struct RangeTotals {
+    size_t count = 0;
+    double value = 0.0;
+};
+
+// Orders queryItems can return; ties are broken by id, names compare case-insensitively
+enum class QuerySort { Id, Name, Price, Quantity };
+
+// Combined predicates for queryItems; bounds are inclusive, unset strings match everything
+struct ItemQuery {
+    optional<string> name;      // substring of the folded name; pass it folded (see ItemKeys)
+    optional<string> category;  // exact folded category; pass it folded
+    double minPrice = -HUGE_VAL;
+    double maxPrice = HUGE_VAL;
+    double minQuantity = -HUGE_VAL;
+    double maxQuantity = HUGE_VAL;
+    QuerySort sort = QuerySort::Id;
+    bool descending = false;
+    size_t limit = 100;
+    size_t offset = 0;
+};
+
+// One page of query matches plus how many matched in all
+struct QueryResult {
+    size_t total = 0;
+    vector<Item> items;
 };
 
 class InventoryBST {
 private:
     unique_ptr<BSTNode> root;
+    // Secondary index: folded category -> ids, kept in sync on every mutation
+    unordered_map<string, set<int>> categoryIndex;
+    // Items per category as spelled, so distinct categories are counted like the Python engines do
+    unordered_map<string, size_t> categoryCounts;
+    // Inverted index: byte trigram of the folded name -> ids containing it
+    unordered_map<string, unordered_set<int>> nameGramIndex;
+    // Ordered (value, id) indexes for price and quantity range queries
+    set<pair<double, int>> priceIndex;
+    set<pair<double, int>> quantityIndex;
     
-    unique_ptr<BSTNode> insertHelper(unique_ptr<BSTNode> node, const Item& item);
+    unique_ptr<BSTNode> insertHelper(unique_ptr<BSTNode> node, const Item& item, const ItemKeys& keys);
     BSTNode* searchHelper(BSTNode* node, int id) const;
     unique_ptr<BSTNode> deleteHelper(unique_ptr<BSTNode> node, int id);
     BSTNode* findMin(BSTNode* node) const;
     int getHeight(BSTNode* node) const;
-    void updateHeight(BSTNode* node) const;
+    void updateNode(BSTNode* node) const;
     int getBalance(BSTNode* node) const;
     unique_ptr<BSTNode> rightRotate(unique_ptr<BSTNode> y);
     unique_ptr<BSTNode> leftRotate(unique_ptr<BSTNode> x);
-    void inOrderHelper(BSTNode* node, function<void(const Item&)> callback) const;
+    void collectAfter(BSTNode* node, int afterId, size_t limit, vector<Item>& out) const;
+    void collectRange(const BSTNode* node, int firstId, int lastId, size_t limit, vector<Item>& out) const;
+    // Items whose ids are in the sorted span [first, last), merged against one in-order walk
+    static void collectIds(const BSTNode* node, const int* first, const int* last, vector<Item>& out);
+    vector<Item> rangeFromIndex(const set<pair<double, int>>& index, double low, double high, size_t limit,
+                                const optional<pair<double, int>>& after) const;
+    void indexItem(const Item& item, const ItemKeys& keys);
+    void unindexItem(const BSTNode& node);
+    static vector<string> nameGrams(const string& folded);
+    // Nodes that match `predicate`, in id order; large trees are scanned in parallel
+    template <typename Predicate>
+    vector<const BSTNode*> filterNodes(Predicate predicate) const;
     
 public:
     InventoryBST() = default;
     
-    void insert(const Item& item);
+    void insert(const Item& item, const ItemKeys& keys);
     bool remove(int id);
     Item* search(int id) const;
-    bool update(const Item& newData);
+    bool update(const Item& newData, const ItemKeys& keys);
     
+    // Visit items in id order without copying them (iterative, no std::function per call)
+    template <typename Visitor>
+    void forEachInOrder(Visitor&& visit) const {
+        forEachInSubtree(root.get(), visit);
+    }
+
+    template <typename Visitor>
+    static void forEachInSubtree(const BSTNode* subtree, Visitor&& visit) {
+        forEachNodeInSubtree(subtree, [&](const BSTNode& node) { visit(node.data); });
+    }
+
+    template <typename Visitor>
+    static void forEachNodeInSubtree(const BSTNode* subtree, Visitor&& visit) {
+        vector<const BSTNode*> stack;
+        const BSTNode* node = subtree;
+        while (node || !stack.empty()) {
+            while (node) {
+                stack.push_back(node);
+                node = node->left.get();
+            }
+            node = stack.back();
+            stack.pop_back();
+            visit(*node);
+            node = node->right.get();
+        }
+    }
+
     vector<Item> getAllItems() const;
-    vector<Item> searchByName(const string& name) const;
-    vector<Item> searchByCategory(const string& category) const;
+    vector<Item> getItemsAfter(int afterId, size_t limit) const;
+    // Both take folded text, like ItemQuery
+    vector<Item> searchByName(const string& nameKey) const;
+    vector<Item> searchByCategory(const string& categoryKey) const;
     vector<Item> getLowStockItems(int threshold) const;
+    // Items with low <= field <= high in (value, id) order, resuming after the (value, id) cursor
+    vector<Item> getItemsInRange(RangeField field, double low, double high, size_t limit,
+                                 const optional<pair<double, int>>& after) const;
+    // Items matching every predicate of `query`, driven by the most selective index
+    QueryResult queryItems(const ItemQuery& query) const;
     
     double getTotalValue() const;
     int getTreeHeight() const;
     size_t getItemCount() const;
+    size_t getCategoryCount() const;     // distinct categories, exact spelling
+    size_t getTotalDepth() const;        // sum of every node's depth, the root at 0
+    size_t getBalancedNodeCount() const;
+
+    // Order statistics over ids, O(log n) through the subtree aggregates
+    size_t rank(int id) const;                      // items with a smaller id
+    const Item* select(size_t index) const;         // index-th item in id order, or nullptr
+    RangeTotals rangeTotals(int lowId, int highId) const;  // ids in [lowId, highId]
     BSTNode* getRoot() const { return root.get(); }
 };
 
@@ -0,0 +1,125 @@
+#ifndef PARALLEL_H
+#define PARALLEL_H
+
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <cstddef>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <vector>
+using namespace std;
+
+// Trees smaller than this are always scanned on the calling thread
+static const size_t kParallelScanMinItems = 50000;
+
+// Fixed set of worker threads for data-parallel scans. run() hands task indices
+// to the workers and the calling thread and returns once every task is done;
+// concurrent run() calls take turns.
+class ScanPool {
+public:
+    explicit ScanPool(size_t threads) {
+        for (size_t i = 1; i < max<size_t>(threads, 1); ++i) {
+            workers.emplace_back([this] { workLoop(); });
+        }
+    }
+
+    ~ScanPool() {
+        {
+            lock_guard<mutex> guard(state);
+            stopping = true;
+        }
+        wake.notify_all();
+        for (auto& worker : workers) worker.join();
+    }
+
+    ScanPool(const ScanPool&) = delete;
+    ScanPool& operator=(const ScanPool&) = delete;
+
+    // Including the calling thread
+    size_t threads() const { return workers.size() + 1; }
+
+    void run(size_t tasks, const function<void(size_t)>& task) {
+        lock_guard<mutex> turn(running);
+        {
+            lock_guard<mutex> guard(state);
+            job = &task;
+            taskCount = tasks;
+            nextTask = 0;
+            busyWorkers = workers.size();
+            ++generation;
+        }
+        wake.notify_all();
+        drain();
+
+        unique_lock<mutex> guard(state);
+        finished.wait(guard, [this] { return busyWorkers == 0; });
+        job = nullptr;
+    }
+
+private:
+    vector<thread> workers;
+    mutex running;  // one batch at a time
+    mutex state;
+    condition_variable wake;
+    condition_variable finished;
+    const function<void(size_t)>* job = nullptr;
+    size_t taskCount = 0;
+    atomic<size_t> nextTask{0};
+    size_t busyWorkers = 0;
+    size_t generation = 0;
+    bool stopping = false;
+
+    void drain() {
+        for (size_t index = nextTask++; index < taskCount; index = nextTask++) {
+            (*job)(index);
+        }
+    }
+
+    void workLoop() {
+        size_t seen = 0;
+        while (true) {
+            {
+                unique_lock<mutex> guard(state);
+                wake.wait(guard, [&] { return stopping || generation != seen; });
+                if (stopping) return;
+                seen = generation;
+            }
+            drain();
+            {
+                lock_guard<mutex> guard(state);
+                --busyWorkers;
+            }
+            finished.notify_one();
+        }
+    }
+};
+
+// The process-wide scan pool; sized to the machine unless setScanThreads() says otherwise
+inline mutex& scanPoolLock() {
+    static mutex lock;
+    return lock;
+}
+
+inline shared_ptr<ScanPool>& scanPoolSlot() {
+    static shared_ptr<ScanPool> pool;
+    return pool;
+}
+
+inline shared_ptr<ScanPool> scanPool() {
+    lock_guard<mutex> guard(scanPoolLock());
+    auto& pool = scanPoolSlot();
+    if (!pool) pool = make_shared<ScanPool>(max<size_t>(thread::hardware_concurrency(), 1));
+    return pool;
+}
+
+// Scans already running keep the pool they started with
+inline void setScanThreads(size_t threads) {
+    auto replacement = make_shared<ScanPool>(max<size_t>(threads, 1));
+    lock_guard<mutex> guard(scanPoolLock());
+    scanPoolSlot() = replacement;
+}
+
+#endif
@@ -1,17 +1,207 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <algorithm>
+#include <cctype>
 #include <unordered_set>
+#include <climits>
+#include <cstdint>
+#include <cstring>
+#include <mutex>
+#include <shared_mutex>
+#include <stdexcept>
 #include <cmath>
 #include "bst.h"
+#include "parallel.h"
 using namespace std;
 using namespace pybind11;
 namespace py = pybind11;
 using namespace pybind11::literals;
 
+// Scan results as flat columns plus a string table, gathered without the GIL
+struct PackedItems {
+    vector<int64_t> ids;
+    vector<double> prices;
+    vector<int64_t> quantities;
+    vector<int32_t> categoryCodes;
+    vector<int64_t> nameEnds;   // end offset of each name in `names`
+    string names;               // UTF-8 names, back to back
+    vector<string> categories;  // category table, indexed by categoryCodes
+    unordered_map<string, int32_t> codes;
+
+    void reserve(size_t count) {
+        ids.reserve(count);
+        prices.reserve(count);
+        quantities.reserve(count);
+        categoryCodes.reserve(count);
+        nameEnds.reserve(count);
+    }
+
+    void append(const Item& item) {
+        ids.push_back(item.id);
+        prices.push_back(item.price);
+        quantities.push_back(item.quantity);
+        auto code = codes.find(item.category);
+        if (code == codes.end()) {
+            code = codes.emplace(item.category, static_cast<int32_t>(categories.size())).first;
+            categories.push_back(item.category);
+        }
+        categoryCodes.push_back(code->second);
+        names += item.name;
+        nameEnds.push_back(static_cast<int64_t>(names.size()));
+    }
+
+    size_t size() const { return ids.size(); }
+};
+
+// An owned byte buffer in the inventory_snapshot file layout, handed to Python
+// through the buffer protocol so columns can be read without building dicts.
+// Scan results use the same layout with rows in result order and no next_id/lsn.
+struct ItemColumns {
+    vector<char> data;
+    size_t count = 0;
+};
+
+static const char kSnapshotMagic[8] = {'I', 'N', 'V', 'S', 'N', 'A', 'P', '\0'};
+static const uint32_t kSnapshotFormat = 1;
+static const size_t kSnapshotHeaderSize = 64;
+
+static size_t alignedOffset(size_t offset) {
+    return (offset + 7) & ~static_cast<size_t>(7);
+}
+
+template <typename T>
+static size_t putColumn(vector<char>& data, size_t offset, const vector<T>& column) {
+    if (!column.empty()) memcpy(data.data() + offset, column.data(), column.size() * sizeof(T));
+    return alignedOffset(offset + column.size() * sizeof(T));
+}
+
+// Lay the columns out exactly as inventory_snapshot.write_snapshot does (little-endian hosts)
+static unique_ptr<ItemColumns> serializeColumns(const PackedItems& packed, uint64_t nextId, uint64_t lsn) {
+    string categoryHeap;
+    vector<int64_t> categoryEnds;
+    for (const auto& category : packed.categories) {
+        categoryHeap += category;
+        categoryEnds.push_back(static_cast<int64_t>(packed.names.size() + categoryHeap.size()));
+    }
+
+    size_t count = packed.size();
+    size_t offset = kSnapshotHeaderSize;
+    size_t sectionsEnd = offset;
+    for (size_t bytes : {count * 8, count * 8, count * 8, count * 4, count * 8, categoryEnds.size() * 8}) {
+        sectionsEnd = alignedOffset(sectionsEnd + bytes);
+    }
+
+    auto columns = make_unique<ItemColumns>();
+    columns->count = count;
+    vector<char>& data = columns->data;
+    data.assign(sectionsEnd + packed.names.size() + categoryHeap.size(), 0);
+
+    const uint64_t header[] = {count, nextId, lsn, categoryEnds.size(), packed.names.size() + categoryHeap.size()};
+    memcpy(data.data(), kSnapshotMagic, sizeof(kSnapshotMagic));
+    memcpy(data.data() + 8, &kSnapshotFormat, sizeof(kSnapshotFormat));
+    memcpy(data.data() + 16, header, sizeof(header));
+
+    offset = putColumn(data, offset, packed.ids);
+    offset = putColumn(data, offset, packed.prices);
+    offset = putColumn(data, offset, packed.quantities);
+    offset = putColumn(data, offset, packed.categoryCodes);
+    offset = putColumn(data, offset, packed.nameEnds);
+    offset = putColumn(data, offset, categoryEnds);
+    memcpy(data.data() + offset, packed.names.data(), packed.names.size());
+    memcpy(data.data() + offset + packed.names.size(), categoryHeap.data(), categoryHeap.size());
+    return columns;
+}
+
+static PackedItems packItems(const vector<Item>& items) {
+    PackedItems packed;
+    packed.reserve(items.size());
+    for (const auto& item : items) packed.append(item);
+    return packed;
+}
+
+// Lay scan results out as ItemColumns; the GIL is released while the bytes are copied
+static unique_ptr<ItemColumns> itemColumns(const PackedItems& packed) {
+    py::gil_scoped_release release;
+    return serializeColumns(packed, 0, 0);
+}
+
+// Build the item dicts with the GIL held; each category string object is shared.
+// Only the dict-returning compatibility methods use this; the *_columns ones do not.
+static py::list itemDicts(const PackedItems& packed) {
+    vector<py::str> categories;
+    categories.reserve(packed.categories.size());
+    for (const auto& category : packed.categories) categories.emplace_back(category);
+
+    py::list result(packed.size());
+    int64_t start = 0;
+    for (size_t index = 0; index < packed.size(); ++index) {
+        int64_t end = packed.nameEnds[index];
+        result[index] = py::dict(
+            "id"_a = packed.ids[index],
+            "name"_a = py::str(packed.names.data() + start, static_cast<size_t>(end - start)),
+            "category"_a = categories[packed.categoryCodes[index]],
+            "price"_a = packed.prices[index],
+            "quantity"_a = packed.quantities[index]
+        );
+        start = end;
+    }
+    return result;
+}
+
+// Fold text for case-insensitive matching exactly as inventory_schema.normalize
+// does (str.lower()); ASCII, the common case, is folded without calling into
+// Python. Needs the GIL.
+static string foldCase(const string& text) {
+    if (all_of(text.begin(), text.end(), [](unsigned char c) { return c < 0x80; })) {
+        string folded(text);
+        for (char& c : folded) c = static_cast<char>(tolower(static_cast<unsigned char>(c)));
+        return folded;
+    }
+    return py::str(text).attr("lower")().cast<string>();
+}
+
+static ItemKeys itemKeys(const string& name, const string& category) {
+    return {foldCase(name), foldCase(category)};
+}
+
 class PyInventoryManager {
 private:
     InventoryBST bst;
     int next_id = 1;
+    // Bumped by every change to the items; never goes back
+    uint64_t version = 0;
+    // Guards bst, next_id and version. It is only ever waited on with the GIL released,
+    // so scans can run without the GIL while other Python threads keep going.
+    mutable shared_mutex mutex;
+
+    template <typename Scan>
+    auto readLocked(Scan&& scan) const -> decltype(scan()) {
+        py::gil_scoped_release release;
+        shared_lock<shared_mutex> guard(mutex);
+        return scan();
+    }
+
+    template <typename Mutation>
+    auto writeLocked(Mutation&& mutate) -> decltype(mutate()) {
+        py::gil_scoped_release release;
+        unique_lock<shared_mutex> guard(mutex);
+        return mutate();
+    }
+
+    // For readers that walk nodes while building Python objects
+    shared_lock<shared_mutex> lockShared() const {
+        shared_lock<shared_mutex> guard(mutex, defer_lock);
+        py::gil_scoped_release release;
+        guard.lock();
+        return guard;
+    }
+
+    PackedItems packAll() const {
+        PackedItems packed;
+        packed.reserve(bst.getItemCount());
+        bst.forEachInOrder([&](const Item& item) { packed.append(item); });
+        return packed;
+    }
 
     // Helper to get node information including balance factors
     void inOrderWithBalance(BSTNode* node, vector<dict>& results, int depth) const {
@@ -41,6 +231,7 @@ private:
 public:
     // Add this method to show tree structure
 list get_tree_visualization() const {
+    auto guard = lockShared();
     list result;
     
     // Helper function for level-order traversal
@@ -73,6 +264,7 @@ list get_tree_visualization() const {
 
 // Alternative: Level-order traversal for better tree structure
 dict get_tree_hierarchy() const {
+    auto guard = lockShared();
     if (!bst.getRoot()) return dict();
     
     list levels;
@@ -119,133 +311,391 @@ dict get_tree_hierarchy() const {
 
     int add_item(const string& name, const string& category,
                 double price, int quantity) {
-        Item item(next_id++, name, category, price, quantity);
-        bst.insert(item);
-        return item.id;
+        ItemKeys keys = itemKeys(name, category);
+        return writeLocked([&] {
+            Item item(next_id++, name, category, price, quantity);
+            bst.insert(item, keys);
+            ++version;
+            return item.id;
+        });
     }
     
-    bool remove_item(int id) {
-        return bst.remove(id);
+    // A Python number as T, or nullopt when it does not fit (an int past the C range)
+    template <typename T>
+    static optional<T> fitting(handle value) {
+        try {
+            return value.cast<T>();
+        } catch (const cast_error&) {
+            return nullopt;
+        }
+    }
+
+    // A Python int clamped into the C int range that ids and quantities are stored in
+    static int clampInt(const int_& value) {
+        int overflow = 0;
+        long long number = PyLong_AsLongLongAndOverflow(value.ptr(), &overflow);
+        if (overflow) return overflow > 0 ? INT_MAX : INT_MIN;
+        return static_cast<int>(clamp<long long>(number, INT_MIN, INT_MAX));
+    }
+
+    // The id a Python int names, or nullopt when no stored item could carry it
+    static optional<int> storedId(const int_& value) {
+        int id = clampInt(value);
+        if (id < 1 || value.not_equal(int_(id))) return nullopt;
+        return id;
+    }
+
+    // Validate one bulk row; returns an empty string when the row is insertable
+    static string validate_row(handle row) {
+        if (!isinstance<dict>(row)) return "row must be an object";
+        dict fields = reinterpret_borrow<dict>(row);
+
+        const pair<const char*, size_t> text_fields[] = {{"name", 100}, {"category", 50}};
+        for (const auto& field : text_fields) {
+            if (!fields.contains(field.first) || !isinstance<str>(fields[field.first]) ||
+                len(fields[field.first]) < 1 || len(fields[field.first]) > field.second) {
+                return string(field.first) + " must be a string of 1-" + to_string(field.second) + " characters";
+            }
+        }
+
+        if (!fields.contains("price") || isinstance<bool_>(fields["price"]) ||
+            !(isinstance<float_>(fields["price"]) || isinstance<int_>(fields["price"])) ||
+            !(fitting<double>(fields["price"]).value_or(NAN) > 0)) {
+            return "price must be a number greater than 0";
+        }
+
+        if (!fields.contains("quantity") || isinstance<bool_>(fields["quantity"]) ||
+            !isinstance<int_>(fields["quantity"]) || fitting<long long>(fields["quantity"]).value_or(-1) < 0 ||
+            fitting<long long>(fields["quantity"]).value_or(-1) > INT_MAX) {
+            return "quantity must be an integer greater than or equal to 0";
+        }
+        return "";
+    }
+
+    dict add_items(const list& batch) {
+        list errors;
+        vector<Item> rows;
+        vector<ItemKeys> keys;
+        rows.reserve(batch.size());
+        keys.reserve(batch.size());
+        for (size_t index = 0; index < batch.size(); ++index) {
+            handle row = batch[index];
+            string error = validate_row(row);
+            if (!error.empty()) {
+                errors.append(dict("index"_a = index, "error"_a = error));
+                continue;
+            }
+            dict fields = reinterpret_borrow<dict>(row);
+            keys.push_back(itemKeys(fields["name"].cast<string>(), fields["category"].cast<string>()));
+            rows.emplace_back(0, fields["name"].cast<string>(), fields["category"].cast<string>(),
+                              fields["price"].cast<double>(), fields["quantity"].cast<int>());
+        }
+
+        // Ids are handed out under the lock so the batch stays contiguous
+        int first_id = writeLocked([&] {
+            int first = next_id;
+            for (size_t i = 0; i < rows.size(); ++i) {
+                rows[i].id = next_id++;
+                bst.insert(rows[i], keys[i]);
+            }
+            if (!rows.empty()) ++version;
+            return first;
+        });
+        int inserted = static_cast<int>(rows.size());
+        int last_id = first_id + inserted - 1;
+        return dict(
+            "inserted"_a = inserted,
+            "first_id"_a = inserted ? object(int_(first_id)) : object(none()),
+            "last_id"_a = inserted ? object(int_(last_id)) : object(none()),
+            "errors"_a = errors
+        );
+    }
+
+    // Replace the whole inventory with persisted items, keeping their ids
+    void restore(const list& items, const int_& next) {
+        int restored_next_id = clampInt(next);
+        if (next.not_equal(int_(restored_next_id))) {
+            throw invalid_argument("cannot restore next_id " + str(next).cast<string>() + ": ids stop at " +
+                                   to_string(INT_MAX));
+        }
+        vector<Item> rows;
+        vector<ItemKeys> keys;
+        unordered_set<int> seen;
+        int max_id = 0;
+        for (handle row : items) {
+            string error = validate_row(row);
+            dict fields = reinterpret_borrow<dict>(row);
+            if (error.empty() && (!fields.contains("id") || isinstance<bool_>(fields["id"]) ||
+                                  !isinstance<int_>(fields["id"]) || fitting<long long>(fields["id"]).value_or(0) < 1 ||
+                                  fitting<long long>(fields["id"]).value_or(0) > INT_MAX)) {
+                error = "id must be a positive integer";
+            }
+            if (!error.empty()) {
+                throw invalid_argument("cannot restore item: " + error);
+            }
+            int id = fields["id"].cast<int>();
+            if (!seen.insert(id).second) {
+                throw invalid_argument("cannot restore duplicate item ids");
+            }
+            keys.push_back(itemKeys(fields["name"].cast<string>(), fields["category"].cast<string>()));
+            rows.emplace_back(id, fields["name"].cast<string>(), fields["category"].cast<string>(),
+                              fields["price"].cast<double>(), fields["quantity"].cast<int>());
+            max_id = max(max_id, id);
+        }
+
+        // Build the new tree off to the side, then swap it in
+        py::gil_scoped_release release;
+        InventoryBST restored;
+        for (size_t i = 0; i < rows.size(); ++i) restored.insert(rows[i], keys[i]);
+        unique_lock<shared_mutex> guard(mutex);
+        bst = std::move(restored);
+        next_id = max(restored_next_id, max_id + 1);
+        ++version;
+    }
+
+    int get_next_id() const {
+        return readLocked([&] { return next_id; });
+    }
+
+    uint64_t get_version() const {
+        return readLocked([&] { return version; });
+    }
+
+    bool remove_item(const int_& item_id) {
+        optional<int> id = storedId(item_id);
+        if (!id) return false;
+        return writeLocked([&] {
+            bool removed = bst.remove(*id);
+            if (removed) ++version;
+            return removed;
+        });
     }
     
-    dict get_item(int id) const {
-        Item* item = bst.search(id);
-        if (item) {
-            return dict(
-                "id"_a = item->id,
-                "name"_a = item->name,
-                "category"_a = item->category,
-                "price"_a = item->price,
-                "quantity"_a = item->quantity
-            );
+    dict get_item(const int_& item_id) const {
+        optional<int> id = storedId(item_id);
+        if (!id) return dict();
+        PackedItems found = readLocked([&] {
+            PackedItems packed;
+            if (Item* item = bst.search(*id)) packed.append(*item);
+            return packed;
+        });
+        if (found.size()) {
+            return itemDicts(found)[0].cast<dict>();
         }
         return dict();
     }
     
     list get_all_items() const {
-        auto items = bst.getAllItems();
-        list result;
-        for (const auto& item : items) {
-            result.append(dict(
-                "id"_a = item.id,
-                "name"_a = item.name,
-                "category"_a = item.category,
-                "price"_a = item.price,
-                "quantity"_a = item.quantity
-            ));
-        }
-        return result;
+        return itemDicts(readLocked([&] { return packAll(); }));
+    }
+
+    // The whole inventory in the inventory_snapshot layout (see ItemColumns)
+    unique_ptr<ItemColumns> get_columns(uint64_t lsn) const {
+        return readLocked([&] {
+            return serializeColumns(packAll(), static_cast<uint64_t>(next_id), lsn);
+        });
+    }
+    
+    // Ids stop at INT_MAX, so clamping the cursor keeps every page exact
+    PackedItems scanPage(int limit, const int_& after_id) const {
+        if (limit <= 0) return PackedItems();
+        int after = clampInt(after_id);
+        return readLocked([&] { return packItems(bst.getItemsAfter(after, static_cast<size_t>(limit))); });
+    }
+
+    list get_items_page(int limit, const int_& after_id) const {
+        return itemDicts(scanPage(limit, after_id));
+    }
+
+    unique_ptr<ItemColumns> get_items_page_columns(int limit, const int_& after_id) const {
+        return itemColumns(scanPage(limit, after_id));
     }
     
     dict get_statistics() const {
-        auto items = bst.getAllItems();
-        unordered_set<string> cats;
-        for (const auto &it : items) cats.insert(it.category);
-        
-        // Calculate actual tree statistics
-        double total_value = bst.getTotalValue();
-        int tree_height = bst.getTreeHeight();
-        size_t item_count = bst.getItemCount();
-        
-        // Calculate balance quality (percentage of nodes with balance factor in [-1, 1])
-        vector<dict> balanced_nodes;
-        inOrderWithBalance(bst.getRoot(), balanced_nodes, 0);
-        
-        int well_balanced = 0;
-        double total_depth = 0;
-        for (const auto& node : balanced_nodes) {
-            int balance = node["balance"].cast<int>();
-            if (abs(balance) <= 1) well_balanced++;
-            total_depth += node["depth"].cast<int>();
-        }
-        
-        double balance_quality = balanced_nodes.empty() ? 100.0 : 
-            (well_balanced * 100.0) / balanced_nodes.size();
-        double avg_depth = balanced_nodes.empty() ? 0.0 : total_depth / balanced_nodes.size();
+        struct Totals {
+            size_t item_count = 0;
+            double total_value = 0.0;
+            int tree_height = 0;
+            size_t unique_categories = 0;
+            size_t well_balanced = 0;
+            double total_depth = 0;
+        };
+
+        // All read off the root's aggregates and the category counts, O(1) under the lock
+        Totals totals = readLocked([&] {
+            Totals result;
+            result.unique_categories = bst.getCategoryCount();
+            result.total_value = bst.getTotalValue();
+            result.tree_height = bst.getTreeHeight();
+            result.item_count = bst.getItemCount();
+            // Balance quality: percentage of nodes with balance factor in [-1, 1]
+            result.well_balanced = bst.getBalancedNodeCount();
+            result.total_depth = static_cast<double>(bst.getTotalDepth());
+            return result;
+        });
+
+        double balance_quality = totals.item_count == 0 ? 100.0 :
+            (totals.well_balanced * 100.0) / totals.item_count;
+        double avg_depth = totals.item_count == 0 ? 0.0 : totals.total_depth / totals.item_count;
         
         return dict(
-            "total_items"_a = static_cast<int>(item_count),
-            "total_value"_a = total_value,
-            "tree_height"_a = tree_height,
-            "unique_categories"_a = static_cast<int>(cats.size()),
+            "total_items"_a = static_cast<int>(totals.item_count),
+            "total_value"_a = totals.total_value,
+            "tree_height"_a = totals.tree_height,
+            "unique_categories"_a = static_cast<int>(totals.unique_categories),
             "balance_quality"_a = balance_quality,
             "avg_depth"_a = avg_depth,
             "is_balanced"_a = (balance_quality > 95.0)  // Consider balanced if 95%+ nodes are balanced
         );
     }
 
-    bool update_item(int id, const string &name, const string &category,
+    bool update_item(const int_& item_id, const string &name, const string &category,
                      double price, int quantity) {
-        Item item(id, name, category, price, quantity);
-        return bst.update(item);
-    }
-
-    list search_by_name(const string &name) const {
-        auto results = bst.searchByName(name);
-        list out;
-        for (const auto &item : results) {
-            out.append(dict(
-                "id"_a = item.id,
-                "name"_a = item.name,
-                "category"_a = item.category,
-                "price"_a = item.price,
-                "quantity"_a = item.quantity
-            ));
-        }
-        return out;
-    }
-
-    list search_by_category(const string &category) const {
-        auto results = bst.searchByCategory(category);
-        list out;
-        for (const auto &item : results) {
-            out.append(dict(
-                "id"_a = item.id,
-                "name"_a = item.name,
-                "category"_a = item.category,
-                "price"_a = item.price,
-                "quantity"_a = item.quantity
-            ));
-        }
-        return out;
-    }
-
-    list get_low_stock(int threshold) const {
-        auto results = bst.getLowStockItems(threshold);
-        list out;
-        for (const auto &item : results) {
-            out.append(dict(
-                "id"_a = item.id,
-                "name"_a = item.name,
-                "category"_a = item.category,
-                "price"_a = item.price,
-                "quantity"_a = item.quantity
-            ));
-        }
-        return out;
+        optional<int> id = storedId(item_id);
+        if (!id) return false;
+        Item item(*id, name, category, price, quantity);
+        ItemKeys keys = itemKeys(name, category);
+        return writeLocked([&] {
+            bool updated = bst.update(item, keys);
+            if (updated) ++version;
+            return updated;
+        });
+    }
+
+    // Number of items whose id is smaller than `id`
+    size_t rank(int id) const {
+        return readLocked([&] { return bst.rank(id); });
+    }
+
+    // The item at position `index` in id order, or None
+    object select(long long index) const {
+        PackedItems found = readLocked([&] {
+            PackedItems packed;
+            if (index >= 0) {
+                if (const Item* item = bst.select(static_cast<size_t>(index))) packed.append(*item);
+            }
+            return packed;
+        });
+        if (!found.size()) return none();
+        return itemDicts(found)[0];
+    }
+
+    // Count and total value of the items with low_id <= id <= high_id
+    dict range_totals(int low_id, int high_id) const {
+        RangeTotals totals = readLocked([&] { return bst.rangeTotals(low_id, high_id); });
+        return dict("count"_a = totals.count, "total_value"_a = totals.value);
+    }
+
+    PackedItems scanRange(const string& field, optional<double> low, optional<double> high,
+                          long long limit, const optional<pair<double, int>>& after) const {
+        RangeField parsed;
+        if (field == "id") parsed = RangeField::Id;
+        else if (field == "price") parsed = RangeField::Price;
+        else if (field == "quantity") parsed = RangeField::Quantity;
+        else throw invalid_argument("field must be one of ('id', 'price', 'quantity'), got '" + field + "'");
+        if (limit <= 0) return PackedItems();
+
+        double lowest = low.value_or(-HUGE_VAL);
+        double highest = high.value_or(HUGE_VAL);
+        return readLocked([&] {
+            return packItems(bst.getItemsInRange(parsed, lowest, highest, static_cast<size_t>(limit), after));
+        });
+    }
+
+    // Items with low <= field <= high in (value, id) order; `after` is the last (value, id) seen
+    list get_items_in_range(const string& field, optional<double> low, optional<double> high,
+                            long long limit, optional<pair<double, int>> after) const {
+        return itemDicts(scanRange(field, low, high, limit, after));
+    }
+
+    unique_ptr<ItemColumns> get_items_in_range_columns(const string& field, optional<double> low,
+                                                       optional<double> high, long long limit,
+                                                       optional<pair<double, int>> after) const {
+        return itemColumns(scanRange(field, low, high, limit, after));
+    }
+
+    // Items matching every given predicate, sorted and sliced, plus how many matched
+    dict query_items(optional<string> name, optional<string> category, optional<double> min_price,
+                     optional<double> max_price, optional<double> min_quantity, optional<double> max_quantity,
+                     const string& sort, bool descending, long long limit, long long offset) const {
+        size_t total = 0;
+        PackedItems items = scanQuery(move(name), move(category), min_price, max_price, min_quantity,
+                                      max_quantity, sort, descending, limit, offset, total);
+        return dict("total"_a = total, "items"_a = itemDicts(items));
+    }
+
+    // query_items with the page as ItemColumns
+    dict query_items_columns(optional<string> name, optional<string> category, optional<double> min_price,
+                             optional<double> max_price, optional<double> min_quantity,
+                             optional<double> max_quantity, const string& sort, bool descending,
+                             long long limit, long long offset) const {
+        size_t total = 0;
+        PackedItems items = scanQuery(move(name), move(category), min_price, max_price, min_quantity,
+                                      max_quantity, sort, descending, limit, offset, total);
+        return dict("total"_a = total, "items"_a = py::cast(itemColumns(items)));
+    }
+
+    PackedItems scanQuery(optional<string> name, optional<string> category, optional<double> min_price,
+                          optional<double> max_price, optional<double> min_quantity, optional<double> max_quantity,
+                          const string& sort, bool descending, long long limit, long long offset,
+                          size_t& total) const {
+        ItemQuery query;
+        if (sort == "id") query.sort = QuerySort::Id;
+        else if (sort == "name") query.sort = QuerySort::Name;
+        else if (sort == "price") query.sort = QuerySort::Price;
+        else if (sort == "quantity") query.sort = QuerySort::Quantity;
+        else throw invalid_argument("sort must be one of ('id', 'name', 'price', 'quantity'), got '" + sort + "'");
+        if (name) query.name = foldCase(*name);
+        if (category) query.category = foldCase(*category);
+        query.minPrice = min_price.value_or(-HUGE_VAL);
+        query.maxPrice = max_price.value_or(HUGE_VAL);
+        query.minQuantity = min_quantity.value_or(-HUGE_VAL);
+        query.maxQuantity = max_quantity.value_or(HUGE_VAL);
+        query.descending = descending;
+        query.limit = static_cast<size_t>(max(limit, 0LL));
+        query.offset = static_cast<size_t>(max(offset, 0LL));
+
+        return readLocked([&] {
+            QueryResult result = bst.queryItems(query);
+            total = result.total;
+            return packItems(result.items);
+        });
+    }
+
+    PackedItems scanByName(const string& name) const {
+        string query = foldCase(name);
+        return readLocked([&] { return packItems(bst.searchByName(query)); });
+    }
+
+    PackedItems scanByCategory(const string& category) const {
+        string key = foldCase(category);
+        return readLocked([&] { return packItems(bst.searchByCategory(key)); });
+    }
+
+    // Quantities fit a C int, so a clamped threshold selects the same items
+    PackedItems scanLowStock(const int_& threshold) const {
+        int bound = clampInt(threshold);
+        return readLocked([&] { return packItems(bst.getLowStockItems(bound)); });
+    }
+
+    list search_by_name(const string &name) const { return itemDicts(scanByName(name)); }
+    list search_by_category(const string &category) const { return itemDicts(scanByCategory(category)); }
+    list get_low_stock(const int_& threshold) const { return itemDicts(scanLowStock(threshold)); }
+
+    unique_ptr<ItemColumns> search_by_name_columns(const string& name) const {
+        return itemColumns(scanByName(name));
+    }
+
+    unique_ptr<ItemColumns> search_by_category_columns(const string& category) const {
+        return itemColumns(scanByCategory(category));
+    }
+
+    unique_ptr<ItemColumns> get_low_stock_columns(const int_& threshold) const {
+        return itemColumns(scanLowStock(threshold));
     }
 
     dict get_tree_info() const {
+        auto guard = lockShared();
         vector<dict> nodes_with_balance;
         inOrderWithBalance(bst.getRoot(), nodes_with_balance, 0);
         
@@ -283,18 +733,58 @@ dict get_tree_hierarchy() const {
 
 PYBIND11_MODULE(inventory_core, m) {
     m.doc() = "High-performance Inventory Management Core";
+
+    m.attr("PARALLEL_SCAN_MIN_ITEMS") = kParallelScanMinItems;
+    m.def("scan_threads", [] { return scanPool()->threads(); },
+          "Threads (including the caller) that large scans are split across");
+    m.def("set_scan_threads", [](size_t threads) {
+        py::gil_scoped_release release;
+        setScanThreads(threads);
+    }, "threads"_a, "Resize the scan pool; 1 keeps every scan on the calling thread");
     
+    class_<ItemColumns>(m, "ItemColumns", py::buffer_protocol(),
+                        "Read-only bytes in the inventory_snapshot layout; see inventory_snapshot.InventorySnapshot.from_buffer")
+        .def_buffer([](ItemColumns& columns) {
+            return py::buffer_info(columns.data.data(), 1, py::format_descriptor<uint8_t>::format(), 1,
+                                   {columns.data.size()}, {1}, true);
+        })
+        .def("__len__", [](const ItemColumns& columns) { return columns.count; });
+
     class_<PyInventoryManager>(m, "InventoryManager")
         .def(init<>())
         .def("add_item", &PyInventoryManager::add_item)
+        .def("add_items", &PyInventoryManager::add_items)
         .def("remove_item", &PyInventoryManager::remove_item)
+        .def("restore", &PyInventoryManager::restore, "items"_a, "next_id"_a)
+        .def_property_readonly("next_id", &PyInventoryManager::get_next_id)
+        .def_property_readonly("version", &PyInventoryManager::get_version)
         .def("get_item", &PyInventoryManager::get_item)
         .def("get_all_items", &PyInventoryManager::get_all_items)
+        .def("get_columns", &PyInventoryManager::get_columns, "lsn"_a = 0)
+        .def("get_items_page", &PyInventoryManager::get_items_page, "limit"_a, "after_id"_a = 0)
+        .def("get_items_page_columns", &PyInventoryManager::get_items_page_columns, "limit"_a, "after_id"_a = 0)
         .def("get_statistics", &PyInventoryManager::get_statistics)
         .def("update_item", &PyInventoryManager::update_item)
+        .def("rank", &PyInventoryManager::rank, "item_id"_a)
+        .def("select", &PyInventoryManager::select, "index"_a)
+        .def("range_totals", &PyInventoryManager::range_totals, "low_id"_a, "high_id"_a)
+        .def("get_items_in_range", &PyInventoryManager::get_items_in_range,
+             "field"_a, "low"_a = none(), "high"_a = none(), "limit"_a = 100, "after"_a = none())
+        .def("get_items_in_range_columns", &PyInventoryManager::get_items_in_range_columns,
+             "field"_a, "low"_a = none(), "high"_a = none(), "limit"_a = 100, "after"_a = none())
+        .def("query_items", &PyInventoryManager::query_items, "name"_a = none(), "category"_a = none(),
+             "min_price"_a = none(), "max_price"_a = none(), "min_quantity"_a = none(), "max_quantity"_a = none(),
+             "sort"_a = "id", "descending"_a = false, "limit"_a = 100, "offset"_a = 0)
+        .def("query_items_columns", &PyInventoryManager::query_items_columns, "name"_a = none(),
+             "category"_a = none(), "min_price"_a = none(), "max_price"_a = none(), "min_quantity"_a = none(),
+             "max_quantity"_a = none(), "sort"_a = "id", "descending"_a = false, "limit"_a = 100, "offset"_a = 0)
         .def("search_by_name", &PyInventoryManager::search_by_name)
         .def("search_by_category", &PyInventoryManager::search_by_category)
         .def("get_low_stock", &PyInventoryManager::get_low_stock)
+        // Columnar variants of the scans: the rows come back as ItemColumns, never as dicts
+        .def("search_by_name_columns", &PyInventoryManager::search_by_name_columns, "name"_a)
+        .def("search_by_category_columns", &PyInventoryManager::search_by_category_columns, "category"_a)
+        .def("get_low_stock_columns", &PyInventoryManager::get_low_stock_columns, "threshold"_a)
         .def("get_tree_info", &PyInventoryManager::get_tree_info)
         .def("get_tree_visualization", &PyInventoryManager::get_tree_visualization)
         .def("get_tree_hierarchy", &PyInventoryManager::get_tree_hierarchy);
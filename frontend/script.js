@@ -5,6 +5,23 @@ const API_BASE = 'http://127.0.0.1:8000';
 let ITEMS = [];
 let PAGE = 1;
 let PAGE_SIZE = 10;
+// Items are fetched with cursor pagination: a small first page for a fast
+// first paint, then larger pages in the background
+const FIRST_PAGE_LIMIT = 100;
+const BACKGROUND_PAGE_LIMIT = 2000;
+// Filter results are rendered in one table, so only this many are fetched
+const FILTER_RESULT_LIMIT = 500;
+// Largest batch POST /items/bulk accepts (MAX_BULK_ITEMS on the server)
+const BULK_BATCH_SIZE = 5000;
+let LOAD_GENERATION = 0;
+// 'loading' while loadAll pages through the items, 'complete' once ITEMS holds
+// all of them, 'partial' while it holds search results or an interrupted load
+let ITEMS_STATE = 'loading';
+// The server's change feed sends item deltas after every write (see
+// connectChangeFeed); deltas arriving mid-load are applied once it finishes
+let CHANGE_FEED = null;
+let FEED_CONNECTED = false;
+let PENDING_CHANGES = [];
 let catChart = null;
 let currentChartType = 'doughnut';
 // currentChartSizePercent controls chart container height as a percent of the table column height
@@ -311,17 +328,97 @@ function showPanel(panelId) {
 
 
 // Data Loading
+async function fetchItemsPage(afterId, limit) {
+    const response = await fetch(`${API_BASE}/items/?limit=${limit}&after_id=${afterId}`);
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    const cursor = response.headers.get('X-Next-Cursor');
+    return { items: await response.json(), nextCursor: cursor === null ? null : parseInt(cursor, 10) };
+}
+
 async function loadAll() {
+    // A newer load (or a search replacing ITEMS) cancels this one's background pages
+    const generation = ++LOAD_GENERATION;
+    ITEMS_STATE = 'loading';
+    PENDING_CHANGES = [];
+    let page;
     try {
         showLoading();
-        ITEMS = await api('/items/');
+        page = await fetchItemsPage(0, FIRST_PAGE_LIMIT);
+        if (generation !== LOAD_GENERATION) return;
+        ITEMS = page.items;
         PAGE = 1;
         renderTable();
         updateStats();
         updateChart();
         showToast('Data loaded successfully', 'success');
     } catch (error) {
+        ITEMS_STATE = 'partial';
         showError();
+        return;
+    }
+
+    try {
+        while (page.nextCursor !== null) {
+            page = await fetchItemsPage(page.nextCursor, BACKGROUND_PAGE_LIMIT);
+            if (generation !== LOAD_GENERATION) return;
+            ITEMS.push(...page.items);
+        }
+        ITEMS_STATE = 'complete';
+        const pending = PENDING_CHANGES.splice(0);
+        if (pending.length > 0) applyItemChanges(pending);
+        renderPagination();
+        updateChart();
+    } catch (error) {
+        ITEMS_STATE = 'partial';
+        showToast('Some items could not be loaded', 'warning');
+    }
+}
+
+// Live updates
+function connectChangeFeed() {
+    if (!window.EventSource || CHANGE_FEED) return;
+    CHANGE_FEED = new EventSource(`${API_BASE}/changes/`);
+    CHANGE_FEED.addEventListener('open', () => {
+        FEED_CONNECTED = true;
+    });
+    CHANGE_FEED.addEventListener('error', () => {
+        // EventSource reconnects by itself and resumes after the last event it saw
+        FEED_CONNECTED = false;
+    });
+    CHANGE_FEED.addEventListener('changes', (event) => {
+        const changes = JSON.parse(event.data).changes;
+        if (ITEMS_STATE === 'complete') {
+            applyItemChanges(changes);
+        } else if (ITEMS_STATE === 'loading') {
+            PENDING_CHANGES.push(...changes);
+        }
+    });
+    // The inventory was replaced, or we missed too much: start over
+    CHANGE_FEED.addEventListener('reset', () => loadAll());
+}
+
+function applyItemChanges(changes) {
+    const byId = new Map(ITEMS.map(item => [item.id, item]));
+    changes.forEach(change => {
+        if (change.type === 'removed') {
+            byId.delete(change.id);
+        } else {
+            byId.set(change.item.id, change.item);
+        }
+    });
+    ITEMS = Array.from(byId.values()).sort((a, b) => a.id - b.id);
+    PAGE = Math.min(PAGE, Math.max(1, Math.ceil(ITEMS.length / PAGE_SIZE)));
+    renderTable();
+    updateStats();
+    updateChart();
+}
+
+async function refreshAfterWrite() {
+    // With the change feed connected the write comes back as a delta
+    if (!FEED_CONNECTED || ITEMS_STATE !== 'complete') {
+        await loadAll();
     }
 }
 
@@ -487,7 +584,7 @@ async function deleteItem(id) {
     try {
         await api(`/items/${id}`, { method: 'DELETE' });
         showToast('Item deleted successfully', 'success');
-        await loadAll();
+        await refreshAfterWrite();
     } catch (error) {
         showToast('Failed to delete item', 'error');
     }
@@ -519,7 +616,7 @@ async function updateItem(id, name, category, price, quantity) {
             body: JSON.stringify({ name, category, price, quantity })
         });
         showToast('Item updated successfully', 'success');
-        await loadAll();
+        await refreshAfterWrite();
     } catch (error) {
         showToast('Failed to update item', 'error');
     }
@@ -552,7 +649,7 @@ function setupAddForm() {
                 
                 form.reset();
                 showToast('Item added successfully', 'success');
-                await loadAll();
+                await refreshAfterWrite();
                 showPanel('dashboard');
             } catch (error) {
                 showToast('Failed to add item', 'error');
@@ -604,6 +701,8 @@ async function quickSearch() {
     }
 
     try {
+        LOAD_GENERATION++;
+        ITEMS_STATE = 'partial';
         ITEMS = await api(`/items/search/name/?name=${encodeURIComponent(query)}`);
         PAGE = 1;
         renderTable();
@@ -618,28 +717,18 @@ async function applyFilters() {
     const category = $('#searchCategory').value.trim();
     const minQty = $('#filterMinQty').value;
 
+    // The server combines the filters and returns one page plus the total match count
+    const params = new URLSearchParams({ limit: FILTER_RESULT_LIMIT });
+    if (name) params.set('name', name);
+    if (category) params.set('category', category);
+    if (minQty) params.set('min_quantity', parseInt(minQty, 10));
+
     try {
-        let results = await api('/items/');
-        
-        if (name) {
-            results = results.filter(i => 
-                i.name.toLowerCase().includes(name.toLowerCase())
-            );
-        }
-        
-        if (category) {
-            results = results.filter(i => 
-                i.category.toLowerCase().includes(category.toLowerCase())
-            );
-        }
-        
-        if (minQty) {
-            results = results.filter(i => i.quantity >= parseInt(minQty, 10));
-        }
-        
+        const results = await api(`/items/query?${params}`);
+
         // Show filtered results in the Search panel below the filters
-        renderFilterResults(results);
-        showToast(`Applied filters: ${results.length} items found`, 'success');
+        renderFilterResults(results.items, results.total);
+        showToast(`Applied filters: ${results.total} items found`, 'success');
     } catch (error) {
         showToast('Filter failed', 'error');
     }
@@ -655,7 +744,7 @@ function clearFilters() {
     loadAll();
 }
 
-function renderFilterResults(results) {
+function renderFilterResults(results, total = results ? results.length : 0) {
     const container = $('#filterResults');
     if (!container) return;
 
@@ -695,7 +784,9 @@ function renderFilterResults(results) {
     container.innerHTML = '';
     const summary = document.createElement('div');
     summary.className = 'mb-2 small text-muted';
-    summary.textContent = `${results.length} item(s) found`;
+    summary.textContent = total > results.length
+        ? `${total} item(s) found, showing the first ${results.length}`
+        : `${results.length} item(s) found`;
     container.appendChild(summary);
     container.appendChild(table);
 
@@ -1041,23 +1132,15 @@ function exportCSV() {
         return;
     }
 
-    // Export a sequential row number (No.) that matches the current UI ordering
-    const headers = ['no', 'name', 'category', 'price', 'quantity'];
-    const csv = [headers, ...ITEMS.map((item, idx) => [idx + 1, item.name, item.category, item.price, item.quantity])]
-        .map(row => row.map(cell => `"${String(cell).replace(/"/g, '""')}"`).join(','))
-        .join('\n');
-
-    const blob = new Blob([csv], { type: 'text/csv' });
-    const url = URL.createObjectURL(blob);
+    // The server streams the export, so the browser never holds the whole inventory
     const a = document.createElement('a');
-    a.href = url;
+    a.href = `${API_BASE}/items/export?format=csv`;
     a.download = `inventory_${new Date().toISOString().split('T')[0]}.csv`;
     document.body.appendChild(a);
     a.click();
     document.body.removeChild(a);
-    URL.revokeObjectURL(url);
 
-    showToast('CSV exported successfully', 'success');
+    showToast('CSV export started', 'success');
 }
 
 async function importCSV() {
@@ -1071,51 +1154,93 @@ async function importCSV() {
 
     try {
         const text = await file.text();
-        const lines = text.split('\n').filter(line => line.trim());
+        const lines = parseCSV(text).filter(fields => fields.some(field => field.trim()));
         
         if (lines.length <= 1) {
             showToast('CSV file is empty', 'warning');
             return;
         }
 
-        // Skip header row
-        const dataLines = lines.slice(1);
+        // Locate columns by header (exports lead with an id column) and send
+        // the rows in as few bulk requests as the server's batch limit allows
+        const parse = fields => fields.map(field => field.trim());
+        const header = parse(lines[0]).map(field => field.toLowerCase());
+        const column = (field, fallback) => header.includes(field) ? header.indexOf(field) : fallback;
+        const [nameCol, categoryCol, priceCol, quantityCol] =
+            ['name', 'category', 'price', 'quantity'].map((field, idx) => column(field, idx));
+
+        const rows = lines.slice(1)
+            .map(parse)
+            .filter(fields => fields[nameCol])
+            .map(fields => ({
+                name: fields[nameCol],
+                category: fields[categoryCol],
+                price: parseFloat(fields[priceCol]) || 0,
+                quantity: parseInt(fields[quantityCol], 10) || 0
+            }));
+
         let imported = 0;
         let errors = 0;
-
-        for (const line of dataLines) {
-            const [name, category, price, quantity] = line.split(',').map(field => 
-                field.replace(/^"|"$/g, '').trim()
-            );
-
-            if (!name) continue;
-
-            try {
-                await api('/items/', {
-                    method: 'POST',
-                    body: JSON.stringify({
-                        name,
-                        category,
-                        price: parseFloat(price) || 0,
-                        quantity: parseInt(quantity, 10) || 0
-                    })
-                });
-                imported++;
-            } catch (error) {
-                errors++;
-            }
+        for (let start = 0; start < rows.length; start += BULK_BATCH_SIZE) {
+            const result = await api('/items/bulk', {
+                method: 'POST',
+                body: JSON.stringify(rows.slice(start, start + BULK_BATCH_SIZE))
+            });
+            imported += result.inserted;
+            errors += result.errors.length;
         }
 
         fileInput.value = '';
         showToast(`Imported ${imported} items${errors > 0 ? `, ${errors} failed` : ''}`, 
                   errors > 0 ? 'warning' : 'success');
-        await loadAll();
+        await refreshAfterWrite();
     } catch (error) {
         showToast('Import failed', 'error');
     }
 }
 
 // Utility Functions
+
+// Split CSV text into rows of fields (RFC 4180): quoted fields may hold
+// commas, line breaks and doubled quotes, as in the server's CSV export
+function parseCSV(text) {
+    const rows = [];
+    let row = [];
+    let field = '';
+    let quoted = false;
+    for (let i = 0; i < text.length; i++) {
+        const char = text[i];
+        if (quoted) {
+            if (char === '"' && text[i + 1] === '"') {
+                field += '"';
+                i++;
+            } else if (char === '"') {
+                quoted = false;
+            } else {
+                field += char;
+            }
+        } else if (char === '"') {
+            quoted = true;
+        } else if (char === ',') {
+            row.push(field);
+            field = '';
+        } else if (char === '\n' || char === '\r') {
+            if (char === '\r' && text[i + 1] === '\n') i++;
+            row.push(field);
+            rows.push(row);
+            row = [];
+            field = '';
+        } else {
+            field += char;
+        }
+    }
+    if (field || row.length) {
+        row.push(field);
+        rows.push(row);
+    }
+    return rows;
+}
+
 function escapeHtml(text) {
     const div = document.createElement('div');
     div.textContent = text;
@@ -1232,6 +1357,7 @@ function initApp() {
     setupEventListeners();
     setupChartControls();
     setupChartsPanelToggle();
+    connectChangeFeed();
     loadAll();
 }
 
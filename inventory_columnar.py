@@ -0,0 +1,589 @@
+"""Columnar inventory engine backed by NumPy arrays.
+
+Items are stored column-wise: id, price, quantity and a dictionary-encoded
+category code live in contiguous NumPy arrays, names in a plain list. Rows are
+appended in id order and deletions only clear an ``alive`` flag, so the id
+column stays sorted (``searchsorted`` finds any row) and statistics, low-stock,
+category filters and total value are single vectorized passes. Tombstoned rows
+are compacted away once they outnumber the live ones.
+
+Exposes the same ``InventoryManager`` interface as ``inventory_core``; select it
+with ``INVENTORY_ENGINE=columnar``.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from inventory_schema import (
+    BulkInsertResult,
+    BulkRowError,
+    InventoryItem,
+    InventoryStats,
+    InventoryView,
+    MAX_ID,
+    QUERY_SORT_FIELDS,
+    QueryResult,
+    RANGE_FIELDS,
+    RangeCursor,
+    normalize,
+    validate_row,
+    validate_stored_row,
+)
+
+if TYPE_CHECKING:
+    from inventory_snapshot import InventorySnapshot
+
+_INITIAL_CAPACITY = 1024
+_PAGE_SCAN_ROWS = 4096
+
+
+def _subtree_height(size: int) -> int:
+    # Height of the implicit tree that splits a sorted range at its midpoint
+    return size.bit_length()
+
+
+class InventoryManager:
+    """Column-oriented inventory with vectorized analytical reads.
+
+    There is no physical tree; tree endpoints describe the perfectly balanced
+    BST implied by the id-sorted rows (the shape an AVL tree converges to).
+    """
+
+    def __init__(self, check_consistency: bool = False) -> None:
+        self._check_consistency = check_consistency
+        self._size = 0  # rows in use, tombstones included
+        self._live = 0
+        self._ids = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._prices = np.zeros(_INITIAL_CAPACITY, dtype=np.float64)
+        self._quantities = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._category_codes = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self._alive = np.zeros(_INITIAL_CAPACITY, dtype=np.bool_)
+        # Names may be a lazily decoded snapshot heap until the first write; name
+        # keys are built on the first name search after a snapshot is attached
+        self._names: Sequence[str] = []
+        self._name_keys: Optional[List[str]] = []
+        self._categories: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+        self._category_refs: List[int] = []
+        self._used_categories = 0
+        self._next_id = 1
+        self._version = 0
+        self._view: Optional[InventoryView[InventoryItem]] = None
+
+    # -- storage -------------------------------------------------------------------
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._ids)
+        if self._size + rows <= capacity:
+            return
+        while capacity < self._size + rows:
+            capacity = max(capacity * 2, _INITIAL_CAPACITY)
+        for column in ("_ids", "_prices", "_quantities", "_category_codes", "_alive"):
+            old = getattr(self, column)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, column, grown)
+
+    def _category_code(self, category: str) -> int:
+        code = self._category_lookup.get(category)
+        if code is None:
+            code = self._category_lookup[category] = len(self._categories)
+            self._categories.append(category)
+            self._category_refs.append(0)
+        return code
+
+    def _ref_category(self, code: int) -> None:
+        if self._category_refs[code] == 0:
+            self._used_categories += 1
+        self._category_refs[code] += 1
+
+    def _unref_category(self, code: int) -> None:
+        self._category_refs[code] -= 1
+        if self._category_refs[code] == 0:
+            self._used_categories -= 1
+
+    def _append_rows(self, rows: List[Tuple[str, str, float, int]], ids: Optional[List[int]] = None) -> int:
+        """Append rows after the last stored row; ``ids`` (ascending, above every stored id) defaults to fresh ones."""
+        count = len(rows)
+        if not count:
+            return self._next_id
+        first_id = self._next_id if ids is None else ids[0]
+
+        self._reserve(count)
+        start, stop = self._size, self._size + count
+        codes = [self._category_code(category) for _, category, _, _ in rows]
+        for code in codes:
+            self._ref_category(code)
+        self._ids[start:stop] = np.arange(first_id, first_id + count, dtype=np.int64) if ids is None else ids
+        self._prices[start:stop] = [price for _, _, price, _ in rows]
+        self._quantities[start:stop] = [quantity for _, _, _, quantity in rows]
+        self._category_codes[start:stop] = codes
+        self._alive[start:stop] = True
+        self._own_names().extend(name for name, _, _, _ in rows)
+        if self._name_keys is not None:
+            self._name_keys.extend(normalize(name) for name, _, _, _ in rows)
+
+        self._size = stop
+        self._live += count
+        self._next_id = max(self._next_id, int(self._ids[stop - 1]) + 1)
+        return first_id
+
+    def _own_names(self) -> List[str]:
+        if not isinstance(self._names, list):
+            self._names = list(self._names)
+        return self._names
+
+    def _keys(self) -> List[str]:
+        if self._name_keys is None:
+            self._name_keys = [normalize(name) for name in self._names]
+        return self._name_keys
+
+    def _row(self, item_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self._ids[: self._size], item_id))
+        if row < self._size and self._ids[row] == item_id and self._alive[row]:
+            return row
+        return None
+
+    def _compact(self) -> None:
+        keep = self._alive[: self._size]
+        rows = np.flatnonzero(keep)
+        live = len(rows)
+        for column in ("_ids", "_prices", "_quantities", "_category_codes", "_alive"):
+            old = getattr(self, column)
+            compacted = np.zeros(max(_INITIAL_CAPACITY, len(old)), dtype=old.dtype)
+            compacted[:live] = old[rows]
+            setattr(self, column, compacted)
+        positions = rows.tolist()
+        names, keys = self._names, self._name_keys
+        self._names = [names[row] for row in positions]
+        self._name_keys = None if keys is None else [keys[row] for row in positions]
+        self._size = live
+
+    def _materialize(self, rows: np.ndarray) -> List[InventoryItem]:
+        names, categories = self._names, self._categories
+        return [
+            {"id": item_id, "name": names[row], "category": categories[code], "price": price, "quantity": quantity}
+            for row, item_id, code, price, quantity in zip(
+                rows.tolist(),
+                self._ids[rows].tolist(),
+                self._category_codes[rows].tolist(),
+                self._prices[rows].tolist(),
+                self._quantities[rows].tolist(),
+            )
+        ]
+
+    def _live_rows(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        alive = self._alive[: self._size]
+        return np.flatnonzero(alive if mask is None else alive & mask)
+
+    def _mutated(self) -> None:
+        self._version += 1
+        if self._check_consistency:
+            self.verify_consistency()
+
+    def verify_consistency(self) -> None:
+        """Check the column invariants from scratch and raise if any drifted."""
+        size = self._size
+        ids = self._ids[:size]
+        if size and not np.all(ids[1:] > ids[:-1]):
+            raise RuntimeError("id column is no longer sorted")
+        if int(np.count_nonzero(self._alive[:size])) != self._live:
+            raise RuntimeError("live row count drifted from the alive column")
+        if len(self._names) != size or (
+            self._name_keys is not None and self._name_keys != [normalize(name) for name in self._names]
+        ):
+            raise RuntimeError("name columns drifted from the numeric columns")
+        refs = np.bincount(self._category_codes[:size][self._alive[:size]], minlength=len(self._categories))
+        if refs.tolist() != self._category_refs or self._used_categories != int(np.count_nonzero(refs)):
+            raise RuntimeError("category reference counts drifted from stored rows")
+
+    # -- mutations -----------------------------------------------------------------
+
+    def add_item(self, name: str, category: str, price: float, quantity: int) -> int:
+        item_id = self._append_rows([(name, category, price, quantity)])
+        self._mutated()
+        return item_id
+
+    def add_items(self, batch: Iterable[Mapping[str, Any]]) -> BulkInsertResult:
+        """Validate a batch and append all valid rows with one write per column."""
+        errors: List[BulkRowError] = []
+        rows: List[Tuple[str, str, float, int]] = []
+        for index, row in enumerate(batch):
+            error = validate_row(row)
+            if error is not None:
+                errors.append({"index": index, "error": error})
+                continue
+            rows.append((row["name"], row["category"], float(row["price"]), row["quantity"]))
+
+        first_id = self._append_rows(rows)
+        if rows:
+            self._mutated()
+        return {
+            "inserted": len(rows),
+            "first_id": first_id if rows else None,
+            "last_id": first_id + len(rows) - 1 if rows else None,
+            "errors": errors,
+        }
+
+    def restore(self, items: Iterable[Mapping[str, Any]], next_id: int) -> None:
+        """Replace the whole inventory with ``items``, keeping their ids; numbering continues at ``next_id``."""
+        rows: List[Tuple[int, str, str, float, int]] = []
+        for row in items:
+            error = validate_stored_row(row)
+            if error is not None:
+                raise ValueError(f"cannot restore item {row!r}: {error}")
+            rows.append((row["id"], row["name"], row["category"], float(row["price"]), row["quantity"]))
+        if next_id > MAX_ID + 1:
+            raise ValueError(f"cannot restore next_id {next_id}: ids stop at {MAX_ID}")
+        rows.sort()
+        ids = [row[0] for row in rows]
+        if any(earlier == later for earlier, later in zip(ids, ids[1:])):
+            raise ValueError("cannot restore duplicate item ids")
+
+        version = self._version
+        self.__init__(self._check_consistency)  # type: ignore[misc]
+        self._version = version
+        self._append_rows([row[1:] for row in rows], ids)
+        self._next_id = max(next_id, self._next_id)
+        self._mutated()
+
+    def attach_snapshot(self, snapshot: "InventorySnapshot") -> None:
+        """Adopt a memory-mapped binary snapshot in place of the current contents.
+
+        The numeric columns become copy-on-write views of the mapping instead of
+        copies, names are decoded on access and the name keys are built by the
+        first name search, so attaching costs the same for any inventory size.
+        """
+        version = self._version
+        self.__init__(self._check_consistency)  # type: ignore[misc]
+        self._version = version
+
+        count = snapshot.count
+        self._ids = np.asarray(snapshot.ids)
+        self._prices = np.asarray(snapshot.prices)
+        self._quantities = np.asarray(snapshot.quantities)
+        self._category_codes = np.asarray(snapshot.category_codes)
+        self._alive = np.ones(count, dtype=np.bool_)
+        self._names = snapshot.names
+        self._name_keys = None
+        self._categories = list(snapshot.categories)
+        self._category_lookup = {category: code for code, category in enumerate(self._categories)}
+        refs = np.bincount(self._category_codes, minlength=len(self._categories))
+        self._category_refs = refs.tolist()
+        self._used_categories = int(np.count_nonzero(refs))
+        self._size = self._live = count
+        self._next_id = snapshot.next_id
+        self._mutated()
+
+    @property
+    def version(self) -> int:
+        """Mutation counter: grows with every change to the items and never goes back."""
+        return self._version
+
+    @property
+    def next_id(self) -> int:
+        """Id the next inserted item will receive."""
+        return self._next_id
+
+    def remove_item(self, item_id: int) -> bool:
+        row = self._row(item_id)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._live -= 1
+        self._unref_category(int(self._category_codes[row]))
+        if self._size - self._live > max(self._live, _INITIAL_CAPACITY):
+            self._compact()
+        self._mutated()
+        return True
+
+    def update_item(
+        self,
+        item_id: int,
+        name: str,
+        category: str,
+        price: float,
+        quantity: int,
+    ) -> bool:
+        row = self._row(item_id)
+        if row is None:
+            return False
+        code = self._category_code(category)
+        self._unref_category(int(self._category_codes[row]))
+        self._ref_category(code)
+        self._category_codes[row] = code
+        self._prices[row] = price
+        self._quantities[row] = quantity
+        self._own_names()[row] = name
+        if self._name_keys is not None:
+            self._name_keys[row] = normalize(name)
+        self._mutated()
+        return True
+
+    # -- reads ---------------------------------------------------------------------
+
+    def get_item(self, item_id: int) -> Optional[InventoryItem]:
+        row = self._row(item_id)
+        if row is None:
+            return None
+        return self._materialize(np.array([row]))[0]
+
+    def get_all_items(self) -> List[InventoryItem]:
+        """Return every item in id order as fresh dicts, copied from the cached view."""
+        return self.snapshot().get_all_items()
+
+    def snapshot(self) -> InventoryView[InventoryItem]:
+        """Return an immutable view of the current state, cached until the next mutation."""
+        if self._view is None or self._view.version != self._version:
+            self._view = InventoryView(
+                self._version,
+                tuple(self._materialize(self._live_rows())),
+                self._ids[self._live_rows()].tolist(),
+                self.get_statistics(),
+                dict,  # type: ignore[arg-type]
+            )
+        return self._view
+
+    def get_items_page(self, limit: int, after_id: int = 0) -> List[InventoryItem]:
+        """Return up to ``limit`` items with ids greater than ``after_id``, in id order."""
+        page: List[InventoryItem] = []
+        start = int(np.searchsorted(self._ids[: self._size], after_id, side="right"))
+        while len(page) < limit and start < self._size:
+            stop = min(self._size, start + max(limit, _PAGE_SCAN_ROWS))
+            rows = np.flatnonzero(self._alive[start:stop])[: limit - len(page)] + start
+            page.extend(self._materialize(rows))
+            start = stop
+        return page
+
+    def iter_items(self) -> Iterator[InventoryItem]:
+        """Lazily yield items in id order, re-locating the cursor by id for every chunk."""
+        after_id = 0
+        while True:
+            page = self.get_items_page(_PAGE_SCAN_ROWS, after_id)
+            yield from page
+            if len(page) < _PAGE_SCAN_ROWS:
+                return
+            after_id = page[-1]["id"]
+
+    def get_statistics(self) -> InventoryStats:
+        size = self._size
+        values = self._prices[:size] * self._quantities[:size]
+        return {
+            "total_items": self._live,
+            "total_value": float(np.sum(values, where=self._alive[:size])),
+            "tree_height": _subtree_height(self._live),
+            "unique_categories": self._used_categories,
+        }
+
+    def search_by_name(self, name: str) -> List[InventoryItem]:
+        query = normalize(name)
+        alive = self._alive
+        rows = [row for row, key in enumerate(self._keys()) if query in key and alive[row]]
+        return self._materialize(np.array(rows, dtype=np.int64))
+
+    def search_by_category(self, category: str) -> List[InventoryItem]:
+        query = normalize(category)
+        codes = [code for code, value in enumerate(self._categories) if normalize(value) == query]
+        if not codes:
+            return []
+        return self._materialize(self._live_rows(np.isin(self._category_codes[: self._size], codes)))
+
+    def get_low_stock(self, threshold: int) -> List[InventoryItem]:
+        return self._materialize(self._live_rows(self._quantities[: self._size] <= threshold))
+
+    def get_items_in_range(
+        self,
+        field: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        limit: int = 100,
+        after: Optional[RangeCursor] = None,
+    ) -> List[InventoryItem]:
+        """Return up to ``limit`` items whose ``field`` lies in ``[low, high]`` (either bound optional).
+
+        Items come in (value, id) order; pass the (value, id) of the last item as
+        ``after`` for the next page. Id ranges are located with ``searchsorted``;
+        price and quantity ranges are one vectorized filter plus a sort of the matches.
+        """
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"field must be one of {RANGE_FIELDS}, got {field!r}")
+        if limit <= 0:
+            return []
+        size = self._size
+        ids = self._ids[:size]
+        if field == "id":
+            start = 0 if low is None else int(np.searchsorted(ids, low, side="left"))
+            if after is not None:
+                start = max(start, int(np.searchsorted(ids, after[1], side="right")))
+            stop = size if high is None else int(np.searchsorted(ids, high, side="right"))
+            rows = np.flatnonzero(self._alive[start:stop])[:limit] + start
+            return self._materialize(rows)
+
+        values = (self._prices if field == "price" else self._quantities)[:size]
+        mask = self._alive[:size].copy()
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        if after is not None:
+            mask &= (values > after[0]) | ((values == after[0]) & (ids > after[1]))
+        rows = np.flatnonzero(mask)
+        if len(rows) > limit:
+            # Only the first ``limit`` in (value, id) order need sorting
+            keys = values[rows]
+            nearest = np.argpartition(keys, limit - 1)[:limit]
+            rows = rows[nearest]
+            # Ties at the cut-off value must be resolved by id, not partition order
+            cutoff = keys[nearest].max()
+            tied = np.flatnonzero(mask & (values == cutoff))
+            rows = np.union1d(rows[values[rows] < cutoff], tied)
+        order = np.lexsort((ids[rows], values[rows]))
+        return self._materialize(rows[order][:limit])
+
+    def query_items(
+        self,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        sort: str = "id",
+        descending: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> QueryResult:
+        """Return the items matching every given predicate, sorted and sliced, plus how many matched.
+
+        Category, price and quantity predicates are combined into one vectorized
+        mask first; the name substring, the only per-row Python check, then runs
+        on the surviving rows alone.
+        """
+        if sort not in QUERY_SORT_FIELDS:
+            raise ValueError(f"sort must be one of {QUERY_SORT_FIELDS}, got {sort!r}")
+        size = self._size
+        mask = self._alive[:size].copy()
+        if category is not None:
+            query = normalize(category)
+            codes = [code for code, value in enumerate(self._categories) if normalize(value) == query]
+            mask &= np.isin(self._category_codes[:size], codes)
+        for values, low, high in (
+            (self._prices[:size], min_price, max_price),
+            (self._quantities[:size], min_quantity, max_quantity),
+        ):
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        rows = np.flatnonzero(mask)
+        if name is not None:
+            query, keys = normalize(name), self._keys()
+            rows = np.array([row for row in rows.tolist() if query in keys[row]], dtype=np.int64)
+
+        if sort == "name":
+            keys = self._keys()
+            rows = np.array(sorted(rows.tolist(), key=lambda row: (keys[row], row)), dtype=np.int64)
+        elif sort != "id":
+            values = (self._prices if sort == "price" else self._quantities)[rows]
+            rows = rows[np.lexsort((rows, values))]
+        if descending:
+            rows = rows[::-1]
+        stop = offset + max(limit, 0)
+        return {"total": len(rows), "items": self._materialize(rows[offset:stop])}
+
+    # -- implicit tree -------------------------------------------------------------
+
+    def get_tree_info(self) -> Dict[str, Any]:
+        items = self.get_all_items()
+        nodes: List[Dict[str, Any]] = []
+        # In-order walk over (lo, hi, depth) ranges; each range's root is its midpoint
+        stack: List[Tuple[int, int, int]] = []
+        lo, hi, depth = 0, len(items), 0
+        while stack or lo < hi:
+            while lo < hi:
+                stack.append((lo, hi, depth))
+                lo, hi, depth = lo, (lo + hi) // 2, depth + 1
+            lo, hi, depth = stack.pop()
+            mid = (lo + hi) // 2
+            item = items[mid]
+            nodes.append(
+                {
+                    **item,
+                    "balance": _subtree_height(mid - lo) - _subtree_height(hi - mid - 1),
+                    "depth": depth,
+                    "height": _subtree_height(hi - lo),
+                }
+            )
+            lo, hi, depth = mid + 1, hi, depth + 1
+
+        count = len(nodes)
+        return {
+            "nodes": nodes,
+            "count": count,
+            "height": _subtree_height(count),
+            "balance_quality": 100.0,
+            "avg_balance": (sum(abs(node["balance"]) for node in nodes) / count) if count else 0.0,
+            "well_balanced_nodes": count,
+            "is_avl_balanced": True,
+            "total_value": self.get_statistics()["total_value"],
+        }
+
+    def get_tree_visualization(self) -> List[str]:
+        items = self.get_all_items()
+        if not items:
+            return ["Tree is empty"]
+
+        lines: List[str] = []
+        stack: List[Tuple[int, int, str, bool, bool]] = [(0, len(items), "", True, True)]
+        while stack:
+            lo, hi, prefix, is_left, is_root = stack.pop()
+            mid = (lo + hi) // 2
+            balance = _subtree_height(mid - lo) - _subtree_height(hi - mid - 1)
+            node_label = f"[{items[mid]['id']}] {items[mid]['name']} (H:{_subtree_height(hi - lo)}, B:{balance})"
+            if is_root:
+                lines.append(node_label)
+            else:
+                branch = "├── " if is_left else "└── "
+                lines.append(prefix + branch + node_label)
+
+            next_prefix = "" if is_root else prefix + ("│   " if is_left else "    ")
+            if mid + 1 < hi:
+                stack.append((mid + 1, hi, next_prefix, False, False))
+            if lo < mid:
+                stack.append((lo, mid, next_prefix, True, False))
+        return lines
+
+    def get_tree_hierarchy(self) -> Dict[str, List[List[Dict[str, Any]]]]:
+        items = self.get_all_items()
+        levels: List[List[Dict[str, Any]]] = []
+        queue: List[Optional[Tuple[int, int]]] = [(0, len(items))] if items else []
+        while any(bounds is not None for bounds in queue):
+            next_queue: List[Optional[Tuple[int, int]]] = []
+            level: List[Dict[str, Any]] = []
+            for bounds in queue:
+                if bounds is None:
+                    level.append({})
+                    next_queue.extend([None, None])
+                    continue
+                lo, hi = bounds
+                mid = (lo + hi) // 2
+                level.append(
+                    {
+                        "id": items[mid]["id"],
+                        "name": items[mid]["name"],
+                        "height": _subtree_height(hi - lo),
+                        "balance": _subtree_height(mid - lo) - _subtree_height(hi - mid - 1),
+                        "has_left": lo < mid,
+                        "has_right": mid + 1 < hi,
+                        "depth": None,
+                    }
+                )
+                next_queue.append((lo, mid) if lo < mid else None)
+                next_queue.append((mid + 1, hi) if mid + 1 < hi else None)
+            levels.append(level)
+            queue = next_queue
+
+        return {"levels": levels}
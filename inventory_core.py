@@ -1,68 +1,689 @@
 from __future__ import annotations
 
-from math import ceil, log2
-from typing import Any, Dict, List, Optional, TypedDict
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge, nlargest, nsmallest
+from itertools import islice
+from math import ceil, floor, fsum
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from inventory_schema import (
+    BulkInsertResult,
+    BulkRowError,
+    InventoryItem,
+    InventoryStats,
+    InventoryView,
+    MAX_ID,
+    QUERY_SORT_FIELDS,
+    QueryResult,
+    RANGE_FIELDS,
+    RangeCursor,
+    normalize,
+    validate_row,
+    validate_stored_row,
+)
+
+
+class _RunningSum:
+    """Exact float accumulator supporting removals (Shewchuk partials, as in ``math.fsum``)."""
+
+    __slots__ = ("_partials",)
 
+    def __init__(self) -> None:
+        self._partials: List[float] = []
 
-class InventoryItem(TypedDict):
-    id: int
-    name: str
-    category: str
-    price: float
-    quantity: int
+    def add(self, value: float) -> None:
+        partials = self._partials
+        i = 0
+        for other in partials:
+            if abs(value) < abs(other):
+                value, other = other, value
+            high = value + other
+            low = other - (high - value)
+            if low:
+                partials[i] = low
+                i += 1
+            value = high
+        partials[i:] = [value]
 
+    def subtract(self, value: float) -> None:
+        self.add(-value)
 
-class InventoryStats(TypedDict):
-    total_items: int
-    total_value: float
-    tree_height: int
-    unique_categories: int
+    @property
+    def value(self) -> float:
+        return fsum(self._partials)
 
 
-class InventoryManager:
-    """In-memory inventory backed by a dictionary keyed by auto-incrementing IDs."""
+class _SortedList:
+    """Sorted multiset split into bounded buckets so inserts and removals stay cheap at scale."""
+
+    __slots__ = ("_buckets", "_maxes", "_len")
+
+    _LOAD = 512
+
+    def __init__(self) -> None:
+        self._buckets: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, value: Any) -> None:
+        buckets, maxes = self._buckets, self._maxes
+        self._len += 1
+        if not buckets:
+            buckets.append([value])
+            maxes.append(value)
+            return
+
+        pos = bisect_left(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            buckets[pos].append(value)
+            maxes[pos] = value
+        else:
+            insort(buckets[pos], value)
+
+        bucket = buckets[pos]
+        if len(bucket) > 2 * self._LOAD:
+            tail = bucket[self._LOAD:]
+            del bucket[self._LOAD:]
+            buckets.insert(pos + 1, tail)
+            maxes[pos] = bucket[-1]
+            maxes.insert(pos + 1, tail[-1])
+
+    def remove(self, value: Any) -> None:
+        buckets, maxes = self._buckets, self._maxes
+        pos = bisect_left(maxes, value)
+        if pos == len(maxes):
+            raise ValueError(f"{value!r} not in sorted list")
+        bucket = buckets[pos]
+        idx = bisect_left(bucket, value)
+        if bucket[idx] != value:
+            raise ValueError(f"{value!r} not in sorted list")
+
+        del bucket[idx]
+        self._len -= 1
+        if not bucket:
+            del buckets[pos]
+            del maxes[pos]
+        elif idx == len(bucket):
+            maxes[pos] = bucket[-1]
+
+    def irange(self, minimum: Any = None, maximum: Any = None) -> Iterator[Any]:
+        """Yield values in ``[minimum, maximum]`` (either bound may be omitted) in order."""
+        buckets, maxes = self._buckets, self._maxes
+        pos = 0 if minimum is None else bisect_left(maxes, minimum)
+        for bucket in buckets[pos:]:
+            start = 0 if minimum is None else bisect_left(bucket, minimum)
+            if maximum is not None and bucket[-1] > maximum:
+                yield from bucket[start : bisect_right(bucket, maximum)]
+                return
+            yield from bucket[start:]
+            minimum = None
+
+    def count(self, minimum: Any = None, maximum: Any = None) -> int:
+        """Number of values in ``[minimum, maximum]``, found per bucket without visiting the values."""
+        buckets, maxes = self._buckets, self._maxes
+        below = 0
+        if minimum is not None:
+            pos = bisect_left(maxes, minimum)
+            below = sum(map(len, buckets[:pos])) + (bisect_left(buckets[pos], minimum) if pos < len(buckets) else 0)
+        upto = self._len
+        if maximum is not None:
+            pos = bisect_right(maxes, maximum)
+            upto = sum(map(len, buckets[:pos])) + (bisect_right(buckets[pos], maximum) if pos < len(buckets) else 0)
+        return max(upto - below, 0)
+
+
+class _ItemRecord:
+    """Stored form of an item: a slotted record instead of a five-key dict.
+
+    Category strings are interned so every item in a category shares one
+    object. Records are never modified once stored (updates replace them), so
+    read views can share them. Callers get ``InventoryItem`` dicts built by
+    ``as_item``.
+    """
+
+    __slots__ = ("id", "name", "category", "price", "quantity")
+
+    def __init__(self, item_id: int, name: str, category: str, price: float, quantity: int) -> None:
+        self.id = item_id
+        self.name = name
+        self.category = sys.intern(category)
+        self.price = price
+        self.quantity = quantity
+
+    def as_item(self) -> InventoryItem:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "category": self.category,
+            "price": self.price,
+            "quantity": self.quantity,
+        }
+
+
+class _AVLNode:
+    __slots__ = ("item", "left", "right", "height")
+
+    def __init__(self, item: _ItemRecord) -> None:
+        self.item: _ItemRecord = item
+        self.left: Optional[_AVLNode] = None
+        self.right: Optional[_AVLNode] = None
+        self.height: int = 1
+
+
+def _height(node: Optional[_AVLNode]) -> int:
+    return node.height if node else 0
+
+
+def _balance(node: Optional[_AVLNode]) -> int:
+    return _height(node.left) - _height(node.right) if node else 0
+
+
+def _update_height(node: _AVLNode) -> None:
+    node.height = 1 + max(_height(node.left), _height(node.right))
+
+
+def _rotate_right(y: _AVLNode) -> _AVLNode:
+    x = y.left
+    assert x is not None
+    y.left = x.right
+    x.right = y
+    _update_height(y)
+    _update_height(x)
+    return x
+
+
+def _rotate_left(x: _AVLNode) -> _AVLNode:
+    y = x.right
+    assert y is not None
+    x.right = y.left
+    y.left = x
+    _update_height(x)
+    _update_height(y)
+    return y
+
+
+def _rebalance(node: _AVLNode) -> _AVLNode:
+    _update_height(node)
+    balance = _balance(node)
+    if balance > 1:
+        if _balance(node.left) < 0:
+            node.left = _rotate_left(node.left)  # type: ignore[arg-type]
+        return _rotate_right(node)
+    if balance < -1:
+        if _balance(node.right) > 0:
+            node.right = _rotate_right(node.right)  # type: ignore[arg-type]
+        return _rotate_left(node)
+    return node
+
+
+class _AVLTree:
+    """Id-keyed AVL tree kept in step with the item store.
+
+    Mirrors ``InventoryBST`` in the C++ core (same rotations, in-order successor
+    on delete) so both cores report the same shape. Insert and delete walk an
+    explicit path instead of recursing.
+    """
+
+    __slots__ = ("root",)
 
     def __init__(self) -> None:
-        self._items: Dict[int, InventoryItem] = {}
+        self.root: Optional[_AVLNode] = None
+
+    def _find(self, item_id: int, path: List[tuple]) -> Optional[_AVLNode]:
+        node = self.root
+        while node is not None and node.item.id != item_id:
+            went_left = item_id < node.item.id
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+        return node
+
+    def _retrace(self, path: List[tuple], child: Optional[_AVLNode]) -> None:
+        for parent, went_left in reversed(path):
+            if went_left:
+                parent.left = child
+            else:
+                parent.right = child
+            child = _rebalance(parent)
+        self.root = child
+
+    def insert(self, item: _ItemRecord) -> None:
+        path: List[tuple] = []
+        node = self._find(item.id, path)
+        if node is not None:
+            node.item = item
+            return
+        self._retrace(path, _AVLNode(item))
+
+    def replace(self, item: _ItemRecord) -> None:
+        node = self._find(item.id, [])
+        assert node is not None
+        node.item = item
+
+    def delete(self, item_id: int) -> None:
+        path: List[tuple] = []
+        node = self._find(item_id, path)
+        if node is None:
+            return
+        if node.left is not None and node.right is not None:
+            # Pull the in-order successor's item up, then unlink the successor
+            path.append((node, False))
+            successor = node.right
+            while successor.left is not None:
+                path.append((successor, True))
+                successor = successor.left
+            node.item = successor.item
+            node = successor
+        self._retrace(path, node.left if node.left is not None else node.right)
+
+    def in_range(self, low: Optional[int] = None, high: Optional[int] = None) -> Iterator[_ItemRecord]:
+        """Yield items with ``low <= id <= high`` in order, never entering subtrees outside the range."""
+        stack: List[_AVLNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                if low is not None and node.item.id < low:
+                    node = node.right  # this node and its left subtree are below the range
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if high is not None and node.item.id > high:
+                return
+            yield node.item
+            node = node.right
+
+    def in_order(self) -> Iterator[_ItemRecord]:
+        stack: List[_AVLNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.item
+            node = node.right
+
+
+# Items iter_items reads from the tree between seeks
+_ITER_CHUNK_ROWS = 4096
+
+_GRAM = 3
+# Postings hold ids as unsigned 32-bit ints: 4 bytes per entry instead of a set slot
+_POSTING_TYPECODE = "I"
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i : i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+def _posting_add(posting: array, item_id: int) -> None:
+    if not posting or posting[-1] < item_id:
+        posting.append(item_id)
+    else:
+        insort(posting, item_id)
+
+
+def _posting_remove(posting: array, item_id: int) -> None:
+    del posting[bisect_left(posting, item_id)]
+
+
+def _level_add(levels: _SortedList, index: Dict[Any, _SortedList], value: Any, item_id: int) -> None:
+    holders = index.get(value)
+    if holders is None:
+        holders = index[value] = _SortedList()
+        levels.add(value)
+    holders.add(item_id)
+
+
+def _level_remove(levels: _SortedList, index: Dict[Any, _SortedList], value: Any, item_id: int) -> None:
+    holders = index[value]
+    holders.remove(item_id)
+    if not holders:
+        del index[value]
+        levels.remove(value)
+
+
+def _level_range(
+    levels: _SortedList,
+    index: Dict[Any, _SortedList],
+    low: Optional[float],
+    high: Optional[float],
+    limit: int,
+    after: Optional[RangeCursor],
+) -> List[int]:
+    """Ids whose value lies in ``[low, high]`` in (value, id) order, resuming after ``after``."""
+    ids: List[int] = []
+    if limit <= 0:
+        return ids
+    start = low
+    if after is not None and (start is None or after[0] >= start):
+        start = after[0]
+    for value in levels.irange(start, high):
+        holders = index[value]
+        for item_id in holders.irange(after[1] + 1) if after is not None and value == after[0] else holders:
+            ids.append(item_id)
+            if len(ids) == limit:
+                return ids
+    return ids
+
+
+def _level_ids(
+    levels: _SortedList, index: Dict[Any, _SortedList], low: Optional[float], high: Optional[float]
+) -> Iterator[int]:
+    """Every id whose value lies in ``[low, high]``, level by level."""
+    for value in levels.irange(low, high):
+        yield from index[value]
+
+
+def _level_estimate(levels: _SortedList, low: Optional[float], high: Optional[float], total: int) -> int:
+    """Roughly how many of ``total`` items hold a value in ``[low, high]``, assuming even levels."""
+    if not levels:
+        return 0
+    return ceil(levels.count(low, high) * total / len(levels))
+
+
+class InventoryManager:
+    """In-memory inventory backed by a dictionary keyed by auto-incrementing IDs.
+
+    Items are stored as slotted ``_ItemRecord`` objects with interned
+    categories and handed out as fresh ``InventoryItem`` dicts, so callers can
+    never alias the stored state. Aggregates used by ``get_statistics`` and the
+    secondary indexes behind the search helpers are maintained incrementally on
+    every mutation. Pass ``check_consistency=True`` (tests, debugging) to
+    recompute them from scratch after each mutation and fail loudly on any drift.
+    """
+
+    def __init__(self, check_consistency: bool = False) -> None:
+        self._items: Dict[int, _ItemRecord] = {}
         self._next_id: int = 1
+        self._check_consistency = check_consistency
+        # Bumped by every mutation; read views are cached per version
+        self._version = 0
+        self._view: Optional[InventoryView[_ItemRecord]] = None
+        self._total_value = _RunningSum()
+        self._category_counts: Dict[str, int] = {}
+        self._category_index: Dict[str, _SortedList] = {}
+        self._name_keys: Dict[int, str] = {}
+        self._name_grams: Dict[str, array] = {}
+        # Distinct quantities (and prices) in order, each mapped to the ids holding that value
+        self._quantity_levels = _SortedList()
+        self._quantity_index: Dict[int, _SortedList] = {}
+        self._price_levels = _SortedList()
+        self._price_index: Dict[float, _SortedList] = {}
+        self._tree = _AVLTree()
+
+    def _index(self, item: _ItemRecord) -> None:
+        self._total_value.add(item.price * item.quantity)
+        category = item.category
+        self._category_counts[category] = self._category_counts.get(category, 0) + 1
+
+        key = normalize(category)
+        ids = self._category_index.get(key)
+        if ids is None:
+            ids = self._category_index[key] = _SortedList()
+        ids.add(item.id)
+
+        name_key = normalize(item.name)
+        # Share the name itself when it is already lower case
+        self._name_keys[item.id] = item.name if name_key == item.name else name_key
+        for gram in _ngrams(name_key):
+            posting = self._name_grams.get(gram)
+            if posting is None:
+                posting = self._name_grams[gram] = array(_POSTING_TYPECODE)
+            _posting_add(posting, item.id)
+
+        _level_add(self._quantity_levels, self._quantity_index, item.quantity, item.id)
+        _level_add(self._price_levels, self._price_index, item.price, item.id)
+
+    def _unindex(self, item: _ItemRecord) -> None:
+        self._total_value.subtract(item.price * item.quantity)
+        category = item.category
+        remaining = self._category_counts[category] - 1
+        if remaining:
+            self._category_counts[category] = remaining
+        else:
+            del self._category_counts[category]
+
+        key = normalize(category)
+        ids = self._category_index[key]
+        ids.remove(item.id)
+        if not ids:
+            del self._category_index[key]
+
+        for gram in _ngrams(self._name_keys.pop(item.id)):
+            posting = self._name_grams[gram]
+            _posting_remove(posting, item.id)
+            if not posting:
+                del self._name_grams[gram]
+
+        _level_remove(self._quantity_levels, self._quantity_index, item.quantity, item.id)
+        _level_remove(self._price_levels, self._price_index, item.price, item.id)
+
+    def _mutated(self) -> None:
+        self._version += 1
+        if self._check_consistency:
+            self.verify_consistency()
+
+    def verify_consistency(self) -> None:
+        """Recompute every maintained aggregate from scratch and raise if any drifted."""
+        items = list(self._items.values())
+        if any(item_id != item.id for item_id, item in self._items.items()):
+            raise RuntimeError("item storage keys drifted from record ids")
+        if any(earlier.id >= later.id for earlier, later in zip(items, items[1:])):
+            raise RuntimeError("item storage is no longer in id order")
+        expected_value = fsum(item.price * item.quantity for item in items)
+        if self._total_value.value != expected_value:
+            raise RuntimeError(
+                f"total_value drifted: tracked {self._total_value.value!r}, actual {expected_value!r}"
+            )
+        expected_counts: Dict[str, int] = {}
+        for item in items:
+            if item.category is not sys.intern(item.category):
+                raise RuntimeError(f"category of item {item.id} is not interned")
+            expected_counts[item.category] = expected_counts.get(item.category, 0) + 1
+        if self._category_counts != expected_counts:
+            raise RuntimeError("category reference counts drifted from stored items")
 
-    def add_item(self, name: str, category: str, price: float, quantity: int) -> int:
+        expected_categories: Dict[str, List[int]] = {}
+        for item in items:
+            expected_categories.setdefault(normalize(item.category), []).append(item.id)
+        actual_categories = {key: list(ids) for key, ids in self._category_index.items()}
+        if actual_categories != expected_categories:
+            raise RuntimeError("category index drifted from stored items")
+
+        expected_grams: Dict[str, List[int]] = {}
+        for item in items:
+            if self._name_keys.get(item.id) != normalize(item.name):
+                raise RuntimeError(f"normalized name for item {item.id} drifted")
+            for gram in _ngrams(normalize(item.name)):
+                expected_grams.setdefault(gram, []).append(item.id)
+        actual_grams = {gram: posting.tolist() for gram, posting in self._name_grams.items()}
+        if len(self._name_keys) != len(self._items) or actual_grams != expected_grams:
+            raise RuntimeError("name n-gram index drifted from stored items")
+
+        for field, levels, index in (
+            ("quantity", self._quantity_levels, self._quantity_index),
+            ("price", self._price_levels, self._price_index),
+        ):
+            expected_levels: Dict[Any, List[int]] = {}
+            for item in items:
+                expected_levels.setdefault(getattr(item, field), []).append(item.id)
+            actual_levels = {value: list(ids) for value, ids in index.items()}
+            if actual_levels != expected_levels or list(levels) != sorted(expected_levels):
+                raise RuntimeError(f"{field} index drifted from stored items")
+
+        if [item.id for item in self._tree.in_order()] != [item.id for item in items]:
+            raise RuntimeError("AVL tree keys drifted from stored items")
+        if any(self._items[tree_item.id] is not tree_item for tree_item in self._tree.in_order()):
+            raise RuntimeError("AVL tree holds stale item records")
+        self._verify_tree(self._tree.root)
+
+    def _insert(self, name: str, category: str, price: float, quantity: int) -> int:
         item_id = self._next_id
         self._next_id += 1
-        item: InventoryItem = {
-            "id": item_id,
-            "name": name,
-            "category": category,
-            "price": price,
-            "quantity": quantity,
-        }
+        item = _ItemRecord(item_id, name, category, price, quantity)
         self._items[item_id] = item
+        self._index(item)
+        self._tree.insert(item)
+        return item_id
+
+    def _verify_tree(self, node: Optional[_AVLNode]) -> int:
+        if node is None:
+            return 0
+        left, right = self._verify_tree(node.left), self._verify_tree(node.right)
+        if node.height != 1 + max(left, right) or abs(left - right) > 1:
+            raise RuntimeError(f"AVL invariant broken at item {node.item.id}")
+        return node.height
+
+    def add_item(self, name: str, category: str, price: float, quantity: int) -> int:
+        item_id = self._insert(name, category, price, quantity)
+        self._mutated()
         return item_id
 
+    def add_items(self, batch: Iterable[Mapping[str, Any]]) -> BulkInsertResult:
+        """Insert a batch of item payloads in one call.
+
+        Valid rows receive consecutive ids (``first_id``..``last_id``); invalid rows
+        are skipped without consuming an id and reported by their batch index.
+        """
+        errors: List[BulkRowError] = []
+        first_id = self._next_id
+        for index, row in enumerate(batch):
+            error = validate_row(row)
+            if error is not None:
+                errors.append({"index": index, "error": error})
+                continue
+            self._insert(row["name"], row["category"], float(row["price"]), row["quantity"])
+
+        inserted = self._next_id - first_id
+        if inserted:
+            self._mutated()
+        return {
+            "inserted": inserted,
+            "first_id": first_id if inserted else None,
+            "last_id": self._next_id - 1 if inserted else None,
+            "errors": errors,
+        }
+
+    def restore(self, items: Iterable[Mapping[str, Any]], next_id: int) -> None:
+        """Replace the whole inventory with ``items``, keeping their ids.
+
+        Numbering continues at ``next_id`` (or after the largest restored id, if
+        that is higher). Used by crash recovery to load a persisted snapshot.
+        """
+        records: List[_ItemRecord] = []
+        for row in items:
+            error = validate_stored_row(row)
+            if error is not None:
+                raise ValueError(f"cannot restore item {row!r}: {error}")
+            records.append(_ItemRecord(row["id"], row["name"], row["category"], float(row["price"]), row["quantity"]))
+        if next_id > MAX_ID + 1:
+            raise ValueError(f"cannot restore next_id {next_id}: ids stop at {MAX_ID}")
+        # Storage must stay in id order
+        records.sort(key=lambda record: record.id)
+        if any(earlier.id == later.id for earlier, later in zip(records, records[1:])):
+            raise ValueError("cannot restore duplicate item ids")
+
+        version = self._version
+        self.__init__(self._check_consistency)  # type: ignore[misc]
+        self._version = version
+        for record in records:
+            self._items[record.id] = record
+            self._index(record)
+            self._tree.insert(record)
+        self._next_id = max(next_id, records[-1].id + 1 if records else 1)
+        self._mutated()
+
+    @property
+    def version(self) -> int:
+        """Mutation counter: grows with every change to the items and never goes back."""
+        return self._version
+
+    @property
+    def next_id(self) -> int:
+        """Id the next inserted item will receive."""
+        return self._next_id
+
     def remove_item(self, item_id: int) -> bool:
-        if item_id in self._items:
-            del self._items[item_id]
-            return True
-        return False
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return False
+        self._unindex(item)
+        self._tree.delete(item_id)
+        self._mutated()
+        return True
 
     def get_item(self, item_id: int) -> Optional[InventoryItem]:
-        return self._items.get(item_id)
+        item = self._items.get(item_id)
+        return item.as_item() if item is not None else None
 
     def get_all_items(self) -> List[InventoryItem]:
-        # Return items sorted by id to mimic in-order traversal effect from BST
-        return [self._items[key] for key in sorted(self._items.keys())]
+        """Return every item in id order, mimicking an in-order BST traversal.
+
+        Ids only ever grow and updates replace values in place, so dict order is
+        already id order and no sort is needed. Each call builds fresh dicts;
+        caching them would keep a second, dict-shaped copy of the inventory alive.
+        """
+        return [item.as_item() for item in self._items.values()]
+
+    def snapshot(self) -> InventoryView[_ItemRecord]:
+        """Return an immutable view of the current state, cached until the next mutation.
+
+        The view shares the stored records and copies only their id-ordered
+        references, so building one costs a pointer copy per item, not a dict.
+        """
+        if self._view is None or self._view.version != self._version:
+            self._view = InventoryView(
+                self._version,
+                tuple(self._items.values()),
+                tuple(self._items),
+                self.get_statistics(),
+                _ItemRecord.as_item,
+            )
+        return self._view
+
+    def get_items_page(self, limit: int, after_id: int = 0) -> List[InventoryItem]:
+        """Return up to ``limit`` items with ids greater than ``after_id``, in id order.
+
+        Seeks into the AVL tree just past the cursor and walks ``limit`` nodes
+        from there, so the cost is O(log n + limit) however sparse the ids are.
+        """
+        return [item.as_item() for item in islice(self._tree.in_range(after_id + 1), max(limit, 0))]
+
+    def iter_items(self) -> Iterator[InventoryItem]:
+        """Lazily yield items in id order without materialising the whole inventory.
+
+        Items are read from the tree a chunk at a time, seeking past the last id
+        for every chunk, so concurrent mutations never invalidate the generator;
+        items added after it started are not visited.
+        """
+        last_id, after_id = self._next_id - 1, 0
+        while True:
+            chunk = list(islice(self._tree.in_range(after_id + 1, last_id), _ITER_CHUNK_ROWS))
+            for item in chunk:
+                yield item.as_item()
+            if len(chunk) < _ITER_CHUNK_ROWS:
+                return
+            after_id = chunk[-1].id
 
     def get_statistics(self) -> InventoryStats:
-        items = self.get_all_items()
-        total_items = len(items)
-        total_value = sum(item["price"] * item["quantity"] for item in items)
-        tree_height = ceil(log2(total_items + 1)) if total_items > 0 else 0
-        unique_categories = len({item["category"] for item in items})
         return {
-            "total_items": total_items,
-            "total_value": total_value,
-            "tree_height": tree_height,
-            "unique_categories": unique_categories,
+            "total_items": len(self._items),
+            "total_value": self._total_value.value,
+            "tree_height": _height(self._tree.root),
+            "unique_categories": len(self._category_counts),
         }
 
     def update_item(
@@ -73,222 +694,236 @@ class InventoryManager:
         price: float,
         quantity: int,
     ) -> bool:
-        if item_id not in self._items:
+        current = self._items.get(item_id)
+        if current is None:
             return False
-        self._items[item_id] = {
-            "id": item_id,
-            "name": name,
-            "category": category,
-            "price": price,
-            "quantity": quantity,
-        }
+        item = _ItemRecord(item_id, name, category, price, quantity)
+        self._unindex(current)
+        self._items[item_id] = item
+        self._index(item)
+        self._tree.replace(item)
+        self._mutated()
         return True
 
     def search_by_name(self, name: str) -> List[InventoryItem]:
-        query = name.lower()
-        return [item for item in self.get_all_items() if query in item["name"].lower()]
+        query = normalize(name)
+        grams = _ngrams(query)
+        if grams:
+            # Every match appears in the rarest gram's posting; verify those candidates
+            candidates: Iterable[int] = min(
+                (self._name_grams.get(gram, ()) for gram in grams), key=len
+            )
+        else:
+            # Queries shorter than one n-gram cannot be narrowed by the index;
+            # ``_items`` is already in id order, so no sort is needed
+            candidates = self._items
+        name_keys, items = self._name_keys, self._items
+        return [items[item_id].as_item() for item_id in candidates if query in name_keys[item_id]]
 
     def search_by_category(self, category: str) -> List[InventoryItem]:
-        query = category.lower()
-        return [item for item in self.get_all_items() if item["category"].lower() == query]
+        ids = self._category_index.get(normalize(category))
+        if ids is None:
+            return []
+        items = self._items
+        return [items[item_id].as_item() for item_id in ids]
 
     def get_low_stock(self, threshold: int) -> List[InventoryItem]:
-        return [item for item in self.get_all_items() if item["quantity"] <= threshold]
+        """Return the items with ``quantity <= threshold`` in id order.
+
+        The quantity levels up to the threshold are found by bisection, and
+        their id lists (each already sorted) are merged, so the cost is
+        O(k log levels) for k results and nothing is re-sorted per call.
+        """
+        index = self._quantity_index
+        ids = merge(*(index[quantity] for quantity in self._quantity_levels.irange(maximum=threshold)))
+        items = self._items
+        return [items[item_id].as_item() for item_id in ids]
+
+    def get_items_in_range(
+        self,
+        field: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        limit: int = 100,
+        after: Optional[RangeCursor] = None,
+    ) -> List[InventoryItem]:
+        """Return up to ``limit`` items whose ``field`` lies in ``[low, high]`` (either bound optional).
+
+        Items come in (value, id) order; pass the (value, id) of the last item as
+        ``after`` for the next page. Id ranges walk only the matching part of the
+        AVL tree; price and quantity ranges read their ordered indexes.
+        """
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"field must be one of {RANGE_FIELDS}, got {field!r}")
+        items = self._items
+        if field == "id":
+            first = None if low is None else ceil(low)
+            if after is not None:
+                first = max(first or 0, int(after[1]) + 1)
+            matches = islice(self._tree.in_range(first, None if high is None else floor(high)), max(limit, 0))
+            return [item.as_item() for item in matches]
+        if field == "price":
+            ids = _level_range(self._price_levels, self._price_index, low, high, limit, after)
+        else:
+            ids = _level_range(self._quantity_levels, self._quantity_index, low, high, limit, after)
+        return [items[item_id].as_item() for item_id in ids]
+
+    def query_items(
+        self,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        sort: str = "id",
+        descending: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> QueryResult:
+        """Return the items matching every given predicate, sorted and sliced, plus how many matched.
+
+        ``name`` is a case-insensitive substring and ``category`` a case-insensitive
+        exact match, as in the search helpers; price and quantity bounds are
+        inclusive. Each predicate with an index offers a candidate id set with a
+        size estimate: the rarest name gram's posting, the category's ids, the
+        ids on the price or quantity levels in range. Evaluation starts from the
+        smallest, intersects the next set only while it is no larger than the
+        candidates left, and checks the remaining predicates on the records.
+        """
+        if sort not in QUERY_SORT_FIELDS:
+            raise ValueError(f"sort must be one of {QUERY_SORT_FIELDS}, got {sort!r}")
+        items, name_keys = self._items, self._name_keys
+        # (size estimate, candidate ids, predicate those ids satisfy exactly or "")
+        sources: List[Tuple[int, Callable[[], Iterable[int]], str]] = []
+        checks: Dict[str, Callable[[_ItemRecord], bool]] = {}
+
+        if name is not None:
+            query = normalize(name)
+            checks["name"] = lambda item: query in name_keys[item.id]
+            grams = _ngrams(query)
+            if grams:
+                rarest = min((self._name_grams.get(gram, ()) for gram in grams), key=len)
+                # A gram posting is a superset of the matches, so the substring is still checked
+                sources.append((len(rarest), lambda: rarest, ""))
+        if category is not None:
+            key = normalize(category)
+            category_ids = self._category_index.get(key, ())
+            checks["category"] = lambda item: normalize(item.category) == key
+            sources.append((len(category_ids), lambda: category_ids, "category"))
+        if min_price is not None or max_price is not None:
+            low_price = -float("inf") if min_price is None else min_price
+            high_price = float("inf") if max_price is None else max_price
+            checks["price"] = lambda item: low_price <= item.price <= high_price
+            sources.append(
+                (
+                    _level_estimate(self._price_levels, min_price, max_price, len(items)),
+                    lambda: _level_ids(self._price_levels, self._price_index, min_price, max_price),
+                    "price",
+                )
+            )
+        if min_quantity is not None or max_quantity is not None:
+            low_quantity = -float("inf") if min_quantity is None else min_quantity
+            high_quantity = float("inf") if max_quantity is None else max_quantity
+            checks["quantity"] = lambda item: low_quantity <= item.quantity <= high_quantity
+            sources.append(
+                (
+                    _level_estimate(self._quantity_levels, min_quantity, max_quantity, len(items)),
+                    lambda: _level_ids(self._quantity_levels, self._quantity_index, min_quantity, max_quantity),
+                    "quantity",
+                )
+            )
+
+        candidates: Iterable[int]
+        if sources:
+            sources.sort(key=lambda source: source[0])
+            _, ids, satisfied = sources[0]
+            found = set(ids())
+            checks.pop(satisfied, None)
+            for estimate, ids, satisfied in sources[1:]:
+                if not found or estimate > len(found):
+                    break  # cheaper to check the remaining predicates per record
+                found.intersection_update(ids())
+                checks.pop(satisfied, None)
+            candidates = found
+        else:
+            candidates = items
+        remaining = list(checks.values())
+        matches = [item for item in map(items.__getitem__, candidates) if all(check(item) for check in remaining)]
+
+        sort_keys: Dict[str, Callable[[_ItemRecord], Any]] = {
+            "id": lambda item: item.id,
+            "name": lambda item: (name_keys[item.id], item.id),
+            "price": lambda item: (item.price, item.id),
+            "quantity": lambda item: (item.quantity, item.id),
+        }
+        sort_key = sort_keys[sort]
+        stop = offset + max(limit, 0)
+        if stop < len(matches):
+            # Only the leading ``stop`` matches need ordering
+            page = (nlargest if descending else nsmallest)(stop, matches, key=sort_key)
+        else:
+            page = sorted(matches, key=sort_key, reverse=descending)
+        return {"total": len(matches), "items": [item.as_item() for item in page[offset:stop]]}
 
     def get_tree_info(self) -> Dict[str, Any]:
-        items = self.get_all_items()
+        nodes: List[Dict[str, Any]] = []
+        stack: List[tuple] = []
+        node, depth = self._tree.root, 0
+        while stack or node is not None:
+            while node is not None:
+                stack.append((node, depth))
+                node, depth = node.left, depth + 1
+            node, depth = stack.pop()
+            nodes.append(
+                {**node.item.as_item(), "balance": _balance(node), "depth": depth, "height": node.height}
+            )
+            node, depth = node.right, depth + 1
+
+        count = len(nodes)
+        well_balanced = sum(1 for entry in nodes if abs(entry["balance"]) <= 1)
+        balance_quality = (well_balanced * 100.0 / count) if count else 100.0
         return {
-            "nodes": items,
-            "count": len(items),
-            "height": ceil(log2(len(items) + 1)) if items else 0,
+            "nodes": nodes,
+            "count": count,
+            "height": _height(self._tree.root),
+            "balance_quality": balance_quality,
+            "avg_balance": (sum(abs(entry["balance"]) for entry in nodes) / count) if count else 0.0,
+            "well_balanced_nodes": well_balanced,
+            "is_avl_balanced": balance_quality > 95.0,
+            "total_value": self._total_value.value,
         }
 
     def get_tree_visualization(self) -> List[str]:
-        """Produce a deterministic AVL-inspired ASCII visualization of the inventory."""
-        items = self.get_all_items()
-        if not items:
+        """Produce a deterministic ASCII rendering of the id-keyed AVL tree."""
+        root = self._tree.root
+        if root is None:
             return ["Tree is empty"]
 
-        class Node:
-            __slots__ = ("item", "left", "right", "height")
-
-            def __init__(self, item: InventoryItem) -> None:
-                self.item: InventoryItem = item
-                self.left: Optional["Node"] = None
-                self.right: Optional["Node"] = None
-                self.height: int = 1
-
-        def height(node: Optional[Node]) -> int:
-            return node.height if node else 0
-
-        def update_height(node: Optional[Node]) -> None:
-            if node:
-                node.height = 1 + max(height(node.left), height(node.right))
-
-        def get_balance(node: Optional[Node]) -> int:
-            return height(node.left) - height(node.right) if node else 0
-
-        def right_rotate(y: Node) -> Node:
-            x = y.left
-            assert x is not None
-            t2 = x.right
-            x.right = y
-            y.left = t2
-            update_height(y)
-            update_height(x)
-            return x
-
-        def left_rotate(x: Node) -> Node:
-            y = x.right
-            assert y is not None
-            t2 = y.left
-            y.left = x
-            x.right = t2
-            update_height(x)
-            update_height(y)
-            return y
-
-        def avl_insert(node: Optional[Node], item: InventoryItem) -> Node:
-            if node is None:
-                return Node(item)
-
-            if item["id"] < node.item["id"]:
-                node.left = avl_insert(node.left, item)
-            elif item["id"] > node.item["id"]:
-                node.right = avl_insert(node.right, item)
+        lines: List[str] = []
+        # (node, prefix, is_left, is_root); right child pushed first so left renders first
+        stack: List[tuple] = [(root, "", True, True)]
+        while stack:
+            node, prefix, is_left, is_root = stack.pop()
+            node_label = f"[{node.item.id}] {node.item.name} (H:{node.height}, B:{_balance(node)})"
+            if is_root:
+                lines.append(node_label)
             else:
-                node.item = item
-                return node
-
-            update_height(node)
-            balance = get_balance(node)
-
-            if balance > 1 and item["id"] < node.left.item["id"]:  # type: ignore[union-attr]
-                return right_rotate(node)
-            if balance < -1 and item["id"] > node.right.item["id"]:  # type: ignore[union-attr]
-                return left_rotate(node)
-            if balance > 1 and item["id"] > node.left.item["id"]:  # type: ignore[union-attr]
-                assert node.left is not None
-                node.left = left_rotate(node.left)
-                return right_rotate(node)
-            if balance < -1 and item["id"] < node.right.item["id"]:  # type: ignore[union-attr]
-                assert node.right is not None
-                node.right = right_rotate(node.right)
-                return left_rotate(node)
-
-            return node
-
-        root: Optional[Node] = None
-        for item in items:
-            root = avl_insert(root, item)
-
-        def ascii_lines(node: Optional[Node]) -> List[str]:
-            lines: List[str] = []
-
-            def _helper(cur: Optional[Node], prefix: str = "", is_left: bool = True, is_root: bool = False) -> None:
-                if cur is None:
-                    return
+                branch = "├── " if is_left else "└── "
+                lines.append(prefix + branch + node_label)
 
-                balance = get_balance(cur)
-                node_label = f"[{cur.item['id']}] {cur.item['name']} (H:{cur.height}, B:{balance})"
-                if is_root:
-                    lines.append(node_label)
-                else:
-                    branch = "├── " if is_left else "└── "
-                    lines.append(prefix + branch + node_label)
-
-                next_prefix = "" if is_root else prefix + ("│   " if is_left else "    ")
-                _helper(cur.left, next_prefix, True, False)
-                _helper(cur.right, next_prefix, False, False)
-
-            _helper(node, is_root=True)
-            return lines
-
-        return ascii_lines(root)
+            next_prefix = "" if is_root else prefix + ("│   " if is_left else "    ")
+            if node.right is not None:
+                stack.append((node.right, next_prefix, False, False))
+            if node.left is not None:
+                stack.append((node.left, next_prefix, True, False))
+        return lines
 
     def get_tree_hierarchy(self) -> Dict[str, List[List[Dict[str, Any]]]]:
-        items = self.get_all_items()
         levels: List[List[Dict[str, Any]]] = []
-
-        if not items:
-            return {"levels": levels}
-
-        class Node:
-            __slots__ = ("item", "left", "right", "height")
-
-            def __init__(self, item: InventoryItem) -> None:
-                self.item: InventoryItem = item
-                self.left: Optional["Node"] = None
-                self.right: Optional["Node"] = None
-                self.height: int = 1
-
-        def height(node: Optional[Node]) -> int:
-            return node.height if node else 0
-
-        def update_height(node: Optional[Node]) -> None:
-            if node:
-                node.height = 1 + max(height(node.left), height(node.right))
-
-        def get_balance(node: Optional[Node]) -> int:
-            return height(node.left) - height(node.right) if node else 0
-
-        def right_rotate(y: Node) -> Node:
-            x = y.left
-            assert x is not None
-            t2 = x.right
-            x.right = y
-            y.left = t2
-            update_height(y)
-            update_height(x)
-            return x
-
-        def left_rotate(x: Node) -> Node:
-            y = x.right
-            assert y is not None
-            t2 = y.left
-            y.left = x
-            x.right = t2
-            update_height(x)
-            update_height(y)
-            return y
-
-        def avl_insert(node: Optional[Node], item: InventoryItem) -> Node:
-            if node is None:
-                return Node(item)
-
-            if item["id"] < node.item["id"]:
-                node.left = avl_insert(node.left, item)
-            elif item["id"] > node.item["id"]:
-                node.right = avl_insert(node.right, item)
-            else:
-                node.item = item
-                return node
-
-            update_height(node)
-            balance = get_balance(node)
-
-            if balance > 1 and item["id"] < node.left.item["id"]:  # type: ignore[union-attr]
-                return right_rotate(node)
-            if balance < -1 and item["id"] > node.right.item["id"]:  # type: ignore[union-attr]
-                return left_rotate(node)
-            if balance > 1 and item["id"] > node.left.item["id"]:  # type: ignore[union-attr]
-                assert node.left is not None
-                node.left = left_rotate(node.left)
-                return right_rotate(node)
-            if balance < -1 and item["id"] < node.right.item["id"]:  # type: ignore[union-attr]
-                assert node.right is not None
-                node.right = right_rotate(node.right)
-                return left_rotate(node)
-
-            return node
-
-        root: Optional[Node] = None
-        for item in items:
-            root = avl_insert(root, item)
-
-        queue: List[Optional[Node]] = [root]
+        queue: List[Optional[_AVLNode]] = [self._tree.root]
         while any(node is not None for node in queue):
-            next_queue: List[Optional[Node]] = []
+            next_queue: List[Optional[_AVLNode]] = []
             level: List[Dict[str, Any]] = []
             for node in queue:
                 if node is None:
@@ -297,10 +932,10 @@ class InventoryManager:
                 else:
                     level.append(
                         {
-                            "id": node.item["id"],
-                            "name": node.item["name"],
+                            "id": node.item.id,
+                            "name": node.item.name,
                             "height": node.height,
-                            "balance": get_balance(node),
+                            "balance": _balance(node),
                             "has_left": node.left is not None,
                             "has_right": node.right is not None,
                             "depth": None,
@@ -0,0 +1,256 @@
+"""Single-owner inventory process shared by several API workers over local IPC.
+
+One process owns the engine (and its write-ahead log, when persistence is on);
+uvicorn worker processes reach it through a ``multiprocessing`` manager on a
+Unix socket. The owner runs each connection in its own thread and funnels all
+calls through one lock, so writes from different workers are applied in a
+single order and reads never observe a half-applied write. Workers spend their
+time on HTTP parsing, validation and response encoding, which is where the
+parallelism comes from.
+
+Start the owner, then point the API at it::
+
+    python inventory_owner.py --socket /tmp/inventory.sock --engine core
+    INVENTORY_OWNER=/tmp/inventory.sock INVENTORY_WORKERS=4 python backend/main.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+from importlib import import_module
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from inventory_persistence import DurableInventory
+from inventory_snapshot import load_snapshot
+
+ENGINES = {"core": "inventory_core", "columnar": "inventory_columnar"}
+DEFAULT_AUTHKEY = b"inventory"
+
+# Everything a worker may call; generators (iter_items) cannot cross the process boundary
+EXPOSED = (
+    "add_item",
+    "add_items",
+    "update_item",
+    "remove_item",
+    "get_item",
+    "get_all_items",
+    "get_items_page",
+    "get_statistics",
+    "search_by_name",
+    "search_by_category",
+    "get_low_stock",
+    "get_items_in_range",
+    "query_items",
+    "get_tree_info",
+    "get_tree_visualization",
+    "get_tree_hierarchy",
+    "get_version",
+    "rebuild",
+)
+
+
+class OwnedInventory:
+    """Serializes every call from every worker onto one engine.
+
+    With a ``DurableInventory`` in ``"manual"`` fsync mode, mutations are applied
+    and logged under the lock but synced after releasing it, so concurrent
+    writers from different workers share fsyncs.
+    """
+
+    def __init__(self, inventory: Any, manager_factory: Callable[[], Any], fresh: bool = True) -> None:
+        self._inventory = inventory
+        self._manager_factory = manager_factory
+        self._lock = threading.Lock()
+        self._fresh = fresh
+        self._epoch = os.urandom(4).hex()
+
+    def _read(self, method: str, *args: Any) -> Any:
+        with self._lock:
+            return getattr(self._inventory, method)(*args)
+
+    def _write(self, method: str, *args: Any) -> Any:
+        with self._lock:
+            self._fresh = False
+            result = getattr(self._inventory, method)(*args)
+            lsn = getattr(self._inventory, "written_lsn", None)
+        if lsn is not None and self._inventory.fsync_policy == "manual":
+            self._inventory.sync(lsn)
+        return result
+
+    def add_item(self, name: str, category: str, price: float, quantity: int) -> int:
+        return self._write("add_item", name, category, price, quantity)
+
+    def add_items(self, batch: List[Mapping[str, Any]]) -> Dict[str, Any]:
+        return self._write("add_items", batch)
+
+    def update_item(self, item_id: int, name: str, category: str, price: float, quantity: int) -> bool:
+        return self._write("update_item", item_id, name, category, price, quantity)
+
+    def remove_item(self, item_id: int) -> bool:
+        return self._write("remove_item", item_id)
+
+    def get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self._read("get_item", item_id)
+
+    def get_all_items(self) -> List[Dict[str, Any]]:
+        return self._read("get_all_items")
+
+    def get_items_page(self, limit: int, after_id: int = 0) -> List[Dict[str, Any]]:
+        return self._read("get_items_page", limit, after_id)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return self._read("get_statistics")
+
+    def search_by_name(self, name: str) -> List[Dict[str, Any]]:
+        return self._read("search_by_name", name)
+
+    def search_by_category(self, category: str) -> List[Dict[str, Any]]:
+        return self._read("search_by_category", category)
+
+    def get_low_stock(self, threshold: int) -> List[Dict[str, Any]]:
+        return self._read("get_low_stock", threshold)
+
+    def get_items_in_range(
+        self,
+        field: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        limit: int = 100,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._read("get_items_in_range", field, low, high, limit, after)
+
+    def query_items(
+        self,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        sort: str = "id",
+        descending: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        return self._read(
+            "query_items",
+            name,
+            category,
+            min_price,
+            max_price,
+            min_quantity,
+            max_quantity,
+            sort,
+            descending,
+            limit,
+            offset,
+        )
+
+    def get_tree_info(self) -> Dict[str, Any]:
+        return self._read("get_tree_info")
+
+    def get_tree_visualization(self) -> List[str]:
+        return self._read("get_tree_visualization")
+
+    def get_tree_hierarchy(self) -> Dict[str, Any]:
+        return self._read("get_tree_hierarchy")
+
+    def get_version(self) -> Tuple[str, int]:
+        """Return ``(epoch, version)`` for the current contents.
+
+        ``version`` is the engine's mutation counter; ``epoch`` changes whenever
+        this owner starts or swaps in a new engine, so the pair never repeats.
+        """
+        with self._lock:
+            return self._epoch, self._inventory.version
+
+    def rebuild(self, rows: Iterable[Mapping[str, Any]], only_if_fresh: bool = False) -> Optional[int]:
+        """Replace the inventory with ``rows`` and return how many were inserted.
+
+        With ``only_if_fresh`` the call is a no-op (returning ``None``) unless the
+        owner started empty and nobody has written yet, so every worker can
+        request startup seeding and only the first one takes effect.
+        """
+        with self._lock:
+            if only_if_fresh and not self._fresh:
+                return None
+            self._fresh = False
+            manager = self._manager_factory()
+            inserted = manager.add_items(list(rows))["inserted"]
+            if isinstance(self._inventory, DurableInventory):
+                self._inventory.reset(manager)
+            else:
+                self._inventory = manager
+                self._epoch = os.urandom(4).hex()
+            return inserted
+
+
+class _OwnerServer(BaseManager):
+    pass
+
+
+class _OwnerClient(BaseManager):
+    pass
+
+
+_OwnerClient.register("inventory", exposed=EXPOSED)
+
+
+def serve(owned: OwnedInventory, address: str, authkey: bytes = DEFAULT_AUTHKEY) -> None:
+    """Serve ``owned`` on the Unix socket ``address`` until the process is stopped."""
+    if os.path.exists(address):
+        os.unlink(address)  # left behind by a previous owner
+    _OwnerServer.register("inventory", callable=lambda: owned, exposed=EXPOSED)
+    server = _OwnerServer(address=address, authkey=authkey).get_server()
+    print(f"inventory owner listening on {address}")
+    server.serve_forever()
+
+
+def connect(address: str, authkey: bytes = DEFAULT_AUTHKEY) -> Any:
+    """Return a proxy to the owner at ``address`` offering the ``InventoryManager`` calls in ``EXPOSED``."""
+    client = _OwnerClient(address=address, authkey=authkey)
+    client.connect()
+    return client.inventory()  # type: ignore[attr-defined]
+
+
+def open_owned_inventory(
+    engine: str = "core",
+    data_dir: Optional[str] = None,
+    snapshot: Optional[str] = None,
+) -> OwnedInventory:
+    """Build the owner's engine, loading ``snapshot`` and recovering ``data_dir`` when given."""
+    manager_cls = import_module(ENGINES[engine]).InventoryManager
+    inventory = manager_cls()
+    loaded = False
+    if snapshot:
+        load_snapshot(inventory, snapshot)
+        loaded = True
+    if data_dir:
+        durable = DurableInventory(inventory, Path(data_dir), fsync="manual")
+        if not durable.recovery["fresh"]:
+            loaded = True
+        elif loaded:
+            durable.checkpoint()
+        inventory = durable
+    return OwnedInventory(inventory, manager_cls, fresh=not loaded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Own the inventory and serve it to API workers over a Unix socket.")
+    parser.add_argument("--socket", required=True, help="Unix socket path workers connect to (INVENTORY_OWNER)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="core")
+    parser.add_argument("--data-dir", help="persist through a write-ahead log in this directory")
+    parser.add_argument("--snapshot", help="start from this binary snapshot")
+    args = parser.parse_args()
+
+    authkey = os.environ.get("INVENTORY_OWNER_KEY", DEFAULT_AUTHKEY.decode()).encode()
+    serve(open_owned_inventory(args.engine, args.data_dir, args.snapshot), args.socket, authkey)
+
+
+if __name__ == "__main__":
+    main()
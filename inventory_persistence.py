@@ -0,0 +1,470 @@
+"""Write-ahead log and snapshot persistence for any inventory engine.
+
+``DurableInventory`` wraps an ``InventoryManager`` (pure Python, columnar or the
+compiled core) and appends every successful mutation to an operation log;
+reads are forwarded untouched. The data directory holds two files:
+
+``snapshot.bin``
+    The compacted state of the inventory at some log position, in the
+    memory-mappable format of ``inventory_snapshot``.
+``wal.log``
+    Operations recorded after the snapshot, one per line as
+    ``<crc32 hex> <json>``. A torn or corrupt tail (crash mid-write) fails the
+    checksum and is truncated away during recovery.
+
+Recovery loads the snapshot with ``inventory_snapshot.load_snapshot`` (the
+columnar engine maps it without copying) and replays the log tail. Every ``snapshot_every`` operations a background thread writes
+the state to a new snapshot and drops the log records it covers, so recovery
+time stays bounded; writers wait only while the state is captured and while the
+log file is swapped, never for the snapshot write itself.
+
+Each operation is logged before it is applied to the engine, so the in-memory
+state is never ahead of the log: a record that cannot be written fails the
+mutation untouched, and one the engine then refuses is cut off the log again.
+
+The ``fsync`` policy controls when appended records reach the disk:
+
+``"always"``
+    Each mutation returns only once its record is synced. Concurrent writers
+    share fsyncs: whoever syncs flushes everything appended so far (group commit).
+``"interval"``
+    A background thread syncs every ``fsync_interval`` seconds. A crash can lose
+    at most that window of acknowledged writes.
+``"manual"``
+    Mutations only append; the caller decides when to ``sync()``. The API uses
+    this to await a shared fsync off the event loop before acknowledging.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple, Union
+
+from inventory_schema import BulkInsertResult, InventoryItem, validate_row
+from inventory_snapshot import load_snapshot, write_snapshot, write_snapshot_buffer
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOG_FILE = "wal.log"
+FSYNC_POLICIES = ("always", "interval", "manual")
+
+_ITEM_FIELDS = ("id", "name", "category", "price", "quantity")
+_PAGE_ROWS = 4096
+
+
+def _iter_manager_items(manager: Any) -> Iterator[InventoryItem]:
+    if hasattr(manager, "iter_items"):
+        yield from manager.iter_items()
+        return
+    after_id = 0
+    while True:
+        page = manager.get_items_page(_PAGE_ROWS, after_id)
+        yield from page
+        if len(page) < _PAGE_ROWS:
+            return
+        after_id = page[-1]["id"]
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """Return the record stored on ``line``, or ``None`` if it is torn or corrupt."""
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def _fsync_directory(path: Path) -> None:
+    if os.name != "posix":  # pragma: no cover - directories cannot be opened elsewhere
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DurableInventory:
+    """Inventory manager wrapper that logs mutations and recovers them on startup.
+
+    Construction recovers whatever state ``data_dir`` holds into ``manager``
+    (replacing its contents when a snapshot exists). ``recovery`` reports what
+    was loaded; ``recovery["fresh"]`` is true when the directory held no state.
+    Mutations are serialized by an internal lock, so the wrapper may be shared
+    between threads as long as reads do not race with them.
+    """
+
+    def __init__(
+        self,
+        manager: Any,
+        data_dir: Union[str, os.PathLike],
+        *,
+        fsync: str = "always",
+        fsync_interval: float = 0.01,
+        snapshot_every: int = 100_000,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self._manager = manager
+        # Added to the engine's version so it keeps growing across reset()
+        self._version_base = 0
+        self._dir = Path(data_dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._fsync = fsync
+        self._snapshot_every = snapshot_every
+        # _lock orders appends; _sync_lock elects the thread that runs the next fsync;
+        # _checkpoint_lock lets one snapshot be written at a time. Locks are taken
+        # in that order: _sync_lock or _checkpoint_lock first, then _lock.
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._snapshot_lsn = 0
+        self._written_lsn = 0
+        self._durable_lsn = 0
+        # Bumped whenever a record is cut off the log, so an fsync that started
+        # before the cut does not vouch for the record appended in its place
+        self._log_generation = 0
+        self.recovery = self._recover()
+        # Unbuffered, so a record that cannot be written fails its own mutation
+        self._log = open(self._dir / LOG_FILE, "ab", buffering=0)
+        self._log_size = os.fstat(self._log.fileno()).st_size
+
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if fsync == "interval":
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, args=(fsync_interval,), name="inventory-wal-flush", daemon=True
+            )
+            self._flusher.start()
+        # Set once snapshot_every operations have piled up since the last snapshot
+        self._checkpoint_due = threading.Event()
+        self.checkpoint_error: Optional[BaseException] = None
+        self._checkpointer = threading.Thread(
+            target=self._checkpoint_when_due, name="inventory-wal-checkpoint", daemon=True
+        )
+        self._checkpointer.start()
+
+    @property
+    def manager(self) -> Any:
+        return self._manager
+
+    @property
+    def version(self) -> int:
+        """The engine's mutation counter, still increasing after ``reset()`` swaps the engine."""
+        return self._version_base + self._manager.version
+
+    @property
+    def fsync_policy(self) -> str:
+        return self._fsync
+
+    @property
+    def written_lsn(self) -> int:
+        """Log position of the last appended operation."""
+        return self._written_lsn
+
+    @property
+    def durable_lsn(self) -> int:
+        """Log position up to which every operation is known to be on disk."""
+        return self._durable_lsn
+
+    def __getattr__(self, name: str) -> Any:
+        # Reads (and anything else not intercepted below) go straight to the engine
+        return getattr(self._manager, name)
+
+    # -- recovery ------------------------------------------------------------------
+
+    def _recover(self) -> Dict[str, Any]:
+        snapshot_items = 0
+        snapshot_path = self._dir / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            snapshot = load_snapshot(self._manager, snapshot_path)
+            self._snapshot_lsn = snapshot.lsn
+            snapshot_items = snapshot.count
+
+        replayed, truncated = 0, 0
+        lsn = self._snapshot_lsn
+        log_path = self._dir / LOG_FILE
+        fresh = not snapshot_path.exists() and (not log_path.exists() or log_path.stat().st_size == 0)
+        if log_path.exists():
+            with open(log_path, "r+b") as handle:
+                valid_end = 0
+                for line in handle:
+                    record = _decode_record(line)
+                    if record is None:
+                        break
+                    valid_end += len(line)
+                    if record["lsn"] <= self._snapshot_lsn:
+                        continue  # already folded into the snapshot
+                    if record["lsn"] != lsn + 1:
+                        raise RuntimeError(f"{log_path} skips from lsn {lsn} to {record['lsn']}")
+                    self._apply(record)
+                    lsn = record["lsn"]
+                    replayed += 1
+                truncated = handle.seek(0, os.SEEK_END) - valid_end
+                if truncated:
+                    handle.truncate(valid_end)
+                    os.fsync(handle.fileno())
+
+        self._written_lsn = self._durable_lsn = lsn
+        return {
+            "fresh": fresh,
+            "snapshot_items": snapshot_items,
+            "replayed": replayed,
+            "truncated_bytes": truncated,
+        }
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        manager, op = self._manager, record["op"]
+        if op == "add":
+            item = record["item"]
+            item_id = manager.add_item(item["name"], item["category"], item["price"], item["quantity"])
+            expected = item["id"]
+        elif op == "add_items":
+            item_id = manager.add_items(record["rows"])["first_id"]
+            expected = record["first_id"]
+        elif op == "update":
+            item = record["item"]
+            if not manager.update_item(item["id"], item["name"], item["category"], item["price"], item["quantity"]):
+                raise RuntimeError(f"log replay diverged: lsn {record['lsn']} updates missing item {item['id']}")
+            return
+        elif op == "remove":
+            if not manager.remove_item(record["id"]):
+                raise RuntimeError(f"log replay diverged: lsn {record['lsn']} removes missing item {record['id']}")
+            return
+        else:
+            raise RuntimeError(f"unknown log operation {op!r} at lsn {record['lsn']}")
+        if item_id != expected:
+            raise RuntimeError(f"log replay diverged: lsn {record['lsn']} produced id {item_id}, logged {expected}")
+
+    # -- logging -------------------------------------------------------------------
+
+    def _write_log(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            view = view[self._log.write(view) :]
+        self._log_size += len(data)
+
+    def _cut_log(self, size: int) -> None:
+        self._log.truncate(size)
+        self._log_size = size
+        self._log_generation += 1
+
+    @contextmanager
+    def _logged(self, record: Dict[str, Any]) -> Iterator[int]:
+        """Log ``record`` and let the ``with`` block apply it; the caller must hold ``_lock``.
+
+        The record is on the log (though not yet synced) before the engine
+        changes. If writing it fails nothing was applied; if the block raises,
+        the record is cut off the log again.
+        """
+        lsn = self._written_lsn + 1
+        line = _encode_record({**record, "lsn": lsn})
+        start = self._log_size
+        try:
+            self._write_log(line)
+        except BaseException:
+            self._cut_log(start)
+            raise
+        self._written_lsn = lsn
+        try:
+            yield lsn
+        except BaseException:
+            self._written_lsn = lsn - 1
+            self._cut_log(start)
+            raise
+        if lsn - self._snapshot_lsn >= self._snapshot_every:
+            self._checkpoint_due.set()
+
+    def _commit(self, lsn: int) -> None:
+        if self._fsync == "always":
+            self.sync(lsn)
+
+    def sync(self, lsn: Optional[int] = None) -> None:
+        """Block until the log is on disk up to ``lsn`` (default: everything appended so far).
+
+        Callers arriving while another thread is inside ``fsync`` wait for it and
+        then usually find their records already covered, so one fsync serves a
+        whole group of writers.
+        """
+        target = self._written_lsn if lsn is None else lsn
+        if self._durable_lsn >= target:
+            return
+        with self._sync_lock:
+            if self._durable_lsn >= target:
+                return
+            with self._lock:
+                covered, generation = self._written_lsn, self._log_generation
+                # A checkpoint may swap the log file meanwhile; the old one still holds these records
+                fd = os.dup(self._log.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._lock:
+                if generation == self._log_generation:
+                    self._durable_lsn = max(self._durable_lsn, covered)
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            self.sync()
+
+    def _checkpoint_when_due(self) -> None:
+        while True:
+            self._checkpoint_due.wait()
+            if self._closed.is_set():
+                return
+            self._checkpoint_due.clear()
+            try:
+                self.checkpoint()
+            except Exception as error:  # e.g. a full disk; the log keeps everything meanwhile
+                self.checkpoint_error = error
+
+    def checkpoint(self) -> None:
+        """Write a compacted snapshot of the current state and drop the log records it covers.
+
+        Writers are held up only while the state is captured and while the log
+        is swapped; the snapshot itself is written without the lock.
+        """
+        with self._checkpoint_lock:
+            with self._lock:
+                lsn, offset, write = self._capture()
+            write(self._dir / SNAPSHOT_FILE)
+            _fsync_directory(self._dir)
+            with self._lock:
+                self._drop_log_through(lsn, offset)
+
+    def _capture(self) -> Tuple[int, int, Callable[[Path], int]]:
+        """Freeze the state at the current log position; the caller must hold ``_lock``.
+
+        Returns that position, the log size at it, and a function writing the
+        frozen state to a snapshot file, which is safe to call without the lock.
+        """
+        manager, lsn = self._manager, self._written_lsn
+        if hasattr(manager, "get_columns"):
+            # The compiled core packs its items into the snapshot layout itself
+            return lsn, self._log_size, partial(write_snapshot_buffer, buffer=manager.get_columns(lsn))
+        if hasattr(manager, "snapshot"):
+            items: Iterable[InventoryItem] = manager.snapshot().iter_items()
+        else:
+            items = list(_iter_manager_items(manager))
+        return lsn, self._log_size, partial(write_snapshot, items=items, next_id=manager.next_id, lsn=lsn)
+
+    def _drop_log_through(self, lsn: int, offset: int) -> None:
+        """Replace the log with its records after ``lsn``, which start at byte ``offset``; hold ``_lock``.
+
+        The snapshot at ``lsn`` must already be durable. The remaining records
+        are copied to a new file that is synced and renamed over the log, so a
+        crash leaves either the old log (whose covered records recovery skips)
+        or the new one.
+        """
+        log_path = self._dir / LOG_FILE
+        staging = log_path.with_name(LOG_FILE + ".tmp")
+        with open(log_path, "rb") as current, open(staging, "wb") as handle:
+            current.seek(offset)
+            handle.write(current.read(self._log_size - offset))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(staging, log_path)
+        _fsync_directory(self._dir)
+        self._log.close()
+        self._log = open(log_path, "ab", buffering=0)
+        self._log_size -= offset
+        self._snapshot_lsn = lsn
+        self._durable_lsn = self._written_lsn
+
+    def _checkpoint_locked(self) -> None:
+        """Checkpoint while holding ``_checkpoint_lock`` and ``_lock`` throughout, for whole-state swaps."""
+        lsn, offset, write = self._capture()
+        write(self._dir / SNAPSHOT_FILE)
+        _fsync_directory(self._dir)
+        self._drop_log_through(lsn, offset)
+
+    def close(self) -> None:
+        """Stop the background threads and sync the log."""
+        self._closed.set()
+        self._checkpoint_due.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._checkpointer.join()
+        with self._lock:
+            if self._log.closed:
+                return
+            os.fsync(self._log.fileno())
+            self._durable_lsn = self._written_lsn
+            self._log.close()
+
+    # -- mutations -----------------------------------------------------------------
+
+    def add_item(self, name: str, category: str, price: float, quantity: int) -> int:
+        with self._lock:
+            item_id = self._manager.next_id
+            record = {
+                "op": "add",
+                "item": {"id": item_id, "name": name, "category": category, "price": price, "quantity": quantity},
+            }
+            with self._logged(record) as lsn:
+                self._manager.add_item(name, category, price, quantity)
+        self._commit(lsn)
+        return item_id
+
+    def add_items(self, batch: Iterable[Mapping[str, Any]]) -> BulkInsertResult:
+        rows = list(batch)
+        with self._lock:
+            # The engines validate rows with the same rules, so these are exactly the rows they insert
+            valid = [{field: row[field] for field in _ITEM_FIELDS[1:]} for row in rows if validate_row(row) is None]
+            if not valid:
+                return self._manager.add_items(rows)
+            with self._logged({"op": "add_items", "first_id": self._manager.next_id, "rows": valid}) as lsn:
+                result = self._manager.add_items(rows)
+        self._commit(lsn)
+        return result
+
+    def update_item(self, item_id: int, name: str, category: str, price: float, quantity: int) -> bool:
+        with self._lock:
+            if not self._manager.get_item(item_id):
+                return False
+            record = {
+                "op": "update",
+                "item": {"id": item_id, "name": name, "category": category, "price": price, "quantity": quantity},
+            }
+            with self._logged(record) as lsn:
+                if not self._manager.update_item(item_id, name, category, price, quantity):
+                    raise RuntimeError(f"item {item_id} disappeared while being updated")
+        self._commit(lsn)
+        return True
+
+    def remove_item(self, item_id: int) -> bool:
+        with self._lock:
+            if not self._manager.get_item(item_id):
+                return False
+            with self._logged({"op": "remove", "id": item_id}) as lsn:
+                if not self._manager.remove_item(item_id):
+                    raise RuntimeError(f"item {item_id} disappeared while being removed")
+        self._commit(lsn)
+        return True
+
+    def reset(self, manager: Any) -> None:
+        """Replace the wrapped engine with ``manager`` and persist its state as the new snapshot."""
+        with self._checkpoint_lock, self._lock:
+            self._version_base = self.version + 1
+            self._manager = manager
+            self._checkpoint_locked()
+
+    def restore(self, items: Iterable[Mapping[str, Any]], next_id: int) -> None:
+        with self._checkpoint_lock, self._lock:
+            self._manager.restore(items, next_id)
+            self._checkpoint_locked()
@@ -0,0 +1,153 @@
+"""Item schema shared by the pure-Python inventory engines.
+
+The compiled extension replaces ``inventory_core`` wholesale, so anything the
+alternative engines need from each other lives here rather than in that module.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Generic, Iterator, List, Mapping, Optional, Sequence, Tuple, TypedDict, TypeVar
+
+Row = TypeVar("Row")
+
+
+class InventoryItem(TypedDict):
+    id: int
+    name: str
+    category: str
+    price: float
+    quantity: int
+
+
+class InventoryStats(TypedDict):
+    total_items: int
+    total_value: float
+    tree_height: int
+    unique_categories: int
+
+
+class BulkRowError(TypedDict):
+    index: int
+    error: str
+
+
+class BulkInsertResult(TypedDict):
+    inserted: int
+    first_id: Optional[int]
+    last_id: Optional[int]
+    errors: List[BulkRowError]
+
+
+class InventoryView(Generic[Row]):
+    """Immutable, id-ordered state of an inventory at one version.
+
+    Engines build views by sharing their (immutable) stored rows rather than
+    copying items; ``to_item`` turns a stored row into a fresh ``InventoryItem``
+    when a reader asks for it. Nothing a reader does can change a view, and
+    later mutations of the engine never show through it. ``rows`` and ``ids``
+    are kept as given (a tuple, a ``range``, a read-only buffer...), so callers
+    must hand over sequences nothing else will modify.
+    """
+
+    __slots__ = ("version", "_rows", "_ids", "_statistics", "_to_item")
+
+    def __init__(
+        self,
+        version: int,
+        rows: Sequence[Row],
+        ids: Sequence[int],
+        statistics: InventoryStats,
+        to_item: Callable[[Row], InventoryItem],
+    ) -> None:
+        self.version = version
+        self._rows = rows
+        self._ids = ids
+        self._statistics = statistics
+        self._to_item = to_item
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_statistics(self) -> InventoryStats:
+        return dict(self._statistics)  # type: ignore[return-value]
+
+    def get_item(self, item_id: int) -> Optional[InventoryItem]:
+        index = bisect_left(self._ids, item_id)
+        if index < len(self._ids) and self._ids[index] == item_id:
+            return self._to_item(self._rows[index])
+        return None
+
+    def get_all_items(self) -> List[InventoryItem]:
+        return [self._to_item(row) for row in self._rows]
+
+    def get_items_page(self, limit: int, after_id: int = 0) -> List[InventoryItem]:
+        start = bisect_right(self._ids, after_id)
+        return [self._to_item(row) for row in self._rows[start : start + limit]]
+
+    def iter_items(self) -> Iterator[InventoryItem]:
+        to_item = self._to_item
+        for row in self._rows:
+            yield to_item(row)
+
+
+# Fields ``get_items_in_range`` can filter and order by. Results are ordered by
+# (field value, id), and a page continues after the (value, id) of its last item.
+RANGE_FIELDS = ("id", "price", "quantity")
+RangeCursor = Tuple[float, int]
+
+# Orders ``query_items`` can return; ties are broken by id. Names sort case-insensitively.
+QUERY_SORT_FIELDS = ("id", "name", "price", "quantity")
+
+
+class QueryResult(TypedDict):
+    total: int
+    items: List[InventoryItem]
+
+MAX_NAME_LENGTH = 100
+MAX_CATEGORY_LENGTH = 50
+# The compiled core stores quantities as C ints; every engine enforces its bound
+MAX_QUANTITY = 2**31 - 1
+# Ids too: the compiled core keys items by C int, the Python core's postings by 32-bit ints
+MAX_ID = 2**31 - 1
+
+
+def _as_float(value: float) -> float:
+    """``float(value)``, or NaN for an int too large to be stored as a float."""
+    try:
+        return float(value)
+    except OverflowError:
+        return float("nan")
+
+
+def validate_row(row: Any) -> Optional[str]:
+    """Return why ``row`` cannot be inserted, or ``None`` when it is a valid item payload."""
+    if not isinstance(row, Mapping):
+        return "row must be an object"
+    for field, limit in (("name", MAX_NAME_LENGTH), ("category", MAX_CATEGORY_LENGTH)):
+        value = row.get(field)
+        if not isinstance(value, str) or not 1 <= len(value) <= limit:
+            return f"{field} must be a string of 1-{limit} characters"
+    price = row.get("price")
+    if isinstance(price, bool) or not isinstance(price, (int, float)) or not _as_float(price) > 0:
+        return "price must be a number greater than 0"
+    quantity = row.get("quantity")
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or not 0 <= quantity <= MAX_QUANTITY:
+        return "quantity must be an integer greater than or equal to 0"
+    return None
+
+
+def validate_stored_row(row: Any) -> Optional[str]:
+    """Like ``validate_row``, for a persisted item that must also carry its positive ``id``."""
+    error = validate_row(row)
+    if error is not None:
+        return error
+    item_id = row.get("id")
+    if isinstance(item_id, bool) or not isinstance(item_id, int) or not 1 <= item_id <= MAX_ID:
+        return "id must be a positive integer"
+    return None
+
+
+def normalize(text: str) -> str:
+    """Case-fold a name or category for case-insensitive matching and indexing."""
+    return text.lower()
@@ -0,0 +1,333 @@
+"""Fixed-layout binary inventory snapshots that can be memory-mapped.
+
+A snapshot is a 64-byte header followed by 8-byte aligned sections::
+
+    ids          int64[count]      ascending item ids
+    prices       float64[count]
+    quantities   int64[count]
+    categories   int32[count]      index into the category table
+    name_ends    int64[count]      end offset of each name in the string heap
+    category_ends int64[categories]  end offsets of the category table entries
+    heap         UTF-8 names, then the category table
+
+All numbers are little-endian. ``InventorySnapshot`` maps the file
+copy-on-write and exposes each numeric section as a zero-copy ``memoryview``;
+names are only decoded when read. Engines that store columns (the columnar
+engine's ``attach_snapshot``) adopt those buffers directly, so opening a
+snapshot costs the same at 1M items as at 10. Other engines load it through
+``restore``; ``load_snapshot`` picks the right path.
+
+The compiled core's ``get_columns()`` returns the same layout as an in-memory
+buffer, which ``InventorySnapshot.from_buffer`` reads without copying. So do its
+``*_columns`` scan variants (``search_by_name_columns`` and friends), with the
+rows in result order rather than id order.
+
+Command line::
+
+    python inventory_snapshot.py import hardware_inventory_10000.csv inventory.snap
+    python inventory_snapshot.py export inventory.snap inventory.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+from inventory_schema import InventoryItem, InventoryStats, InventoryView, validate_row, validate_stored_row
+
+MAGIC = b"INVSNAP\x00"
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, count, next_id, lsn, category count, heap size
+_HEADER = struct.Struct("<8sIIQQQQQ")
+_HEADER_SIZE = 64
+_FIELDS = ("id", "name", "category", "price", "quantity")
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+_SECTIONS = (
+    ("ids", "q", "count"),
+    ("prices", "d", "count"),
+    ("quantities", "q", "count"),
+    ("categories", "i", "count"),
+    ("name_ends", "q", "count"),
+    ("category_ends", "q", "categories"),
+)
+_ITEM_SIZES = {"q": 8, "d": 8, "i": 4}
+
+
+def _layout(count: int, category_count: int, heap_size: int) -> Dict[str, int]:
+    offsets: Dict[str, int] = {}
+    offset = _HEADER_SIZE
+    for name, typecode, length in _SECTIONS:
+        offsets[name] = offset
+        offset = _aligned(offset + (count if length == "count" else category_count) * _ITEM_SIZES[typecode])
+    offsets["heap"] = offset
+    offsets["end"] = offset + heap_size
+    return offsets
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a readable inventory snapshot."""
+
+
+class _HeapStrings(Sequence[str]):
+    """Read-only list of strings decoded from the heap on access."""
+
+    __slots__ = ("_heap", "_ends", "_base")
+
+    def __init__(self, heap: memoryview, ends: memoryview, base: int = 0) -> None:
+        self._heap = heap
+        self._ends = ends
+        self._base = base
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index: int) -> str:  # type: ignore[override]
+        if index < 0:
+            index += len(self)
+        start = self._ends[index - 1] if index else self._base
+        return str(self._heap[start : self._ends[index]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        heap, start = self._heap, self._base
+        for end in self._ends:
+            yield str(heap[start:end], "utf-8")
+            start = end
+
+
+class InventorySnapshot:
+    """A snapshot file mapped into memory.
+
+    The mapping is private (copy-on-write): buffers handed out are writable,
+    but writes never reach the file, so a running engine may mutate adopted
+    columns freely while the file stays a consistent snapshot.
+    """
+
+    path: Optional[Path]
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size < _HEADER_SIZE:
+                raise SnapshotError(f"{self.path} is too short to be an inventory snapshot")
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._parse(memoryview(self._map), str(self.path))
+
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> "InventorySnapshot":
+        """Read a snapshot held in memory (any bytes-like object) without copying it.
+
+        Columns are views of ``buffer``; a read-only buffer gives read-only columns.
+        """
+        snapshot = cls.__new__(cls)
+        snapshot.path = None
+        view = memoryview(buffer).cast("B")
+        if len(view) < _HEADER_SIZE:
+            raise SnapshotError("buffer is too short to be an inventory snapshot")
+        snapshot._map = buffer
+        snapshot._parse(view, "buffer")
+        return snapshot
+
+    def _parse(self, view: memoryview, source: str) -> None:
+        magic, version, _, count, next_id, lsn, category_count, heap_size = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotError(f"{source} is not an inventory snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{source} uses snapshot format {version}, expected {FORMAT_VERSION}")
+        if sys.byteorder != "little":  # pragma: no cover - no big-endian CI
+            raise SnapshotError("memory-mapped snapshots require a little-endian host")
+
+        self.count: int = count
+        self.next_id: int = next_id
+        self.lsn: int = lsn
+        layout = _layout(count, category_count, heap_size)
+        if layout["end"] > len(view):
+            raise SnapshotError(f"{source} is truncated")
+
+        columns: Dict[str, memoryview] = {}
+        for name, typecode, length in _SECTIONS:
+            offset = layout[name]
+            items = count if length == "count" else category_count
+            columns[name] = view[offset : offset + items * _ITEM_SIZES[typecode]].cast(typecode)
+        self.ids = columns["ids"]
+        self.prices = columns["prices"]
+        self.quantities = columns["quantities"]
+        self.category_codes = columns["categories"]
+        heap = view[layout["heap"] : layout["heap"] + heap_size]
+        self.names: Sequence[str] = _HeapStrings(heap, columns["name_ends"])
+        name_bytes = columns["name_ends"][-1] if count else 0
+        self.categories: List[str] = list(_HeapStrings(heap, columns["category_ends"], name_bytes))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def item(self, index: int) -> InventoryItem:
+        """Return the item in row ``index`` (rows are in ascending id order)."""
+        return {
+            "id": self.ids[index],
+            "name": self.names[index],
+            "category": self.categories[self.category_codes[index]],
+            "price": self.prices[index],
+            "quantity": self.quantities[index],
+        }
+
+    def iter_items(self) -> Iterator[InventoryItem]:
+        categories = self.categories
+        for item_id, name, code, price, quantity in zip(
+            self.ids, self.names, self.category_codes, self.prices, self.quantities
+        ):
+            yield {"id": item_id, "name": name, "category": categories[code], "price": price, "quantity": quantity}
+
+    def as_view(self, version: int, statistics: InventoryStats) -> InventoryView[int]:
+        """Wrap the snapshot as a read view whose rows are decoded only when read."""
+        return InventoryView(version, range(self.count), self.ids, statistics, self.item)
+
+
+def write_snapshot(path: PathLike, items: Iterable[Mapping[str, Any]], next_id: int, lsn: int = 0) -> int:
+    """Write ``items`` (ascending ids) to ``path`` atomically and return how many were written.
+
+    ``next_id`` is the id the restored inventory should hand out next; ``lsn``
+    records the write-ahead log position the snapshot covers.
+    """
+    ids, prices, quantities, codes = array("q"), array("d"), array("q"), array("i")
+    name_ends, category_ends = array("q"), array("q")
+    heap = bytearray()
+    category_codes: Dict[str, int] = {}
+    for item in items:
+        error = validate_stored_row(item)
+        if error is not None:
+            raise ValueError(f"cannot snapshot item {item!r}: {error}")
+        if ids and item["id"] <= ids[-1]:
+            raise ValueError("snapshot items must be in ascending id order")
+        ids.append(item["id"])
+        prices.append(float(item["price"]))
+        quantities.append(item["quantity"])
+        code = category_codes.get(item["category"])
+        if code is None:
+            code = category_codes[item["category"]] = len(category_codes)
+        codes.append(code)
+        heap += item["name"].encode()
+        name_ends.append(len(heap))
+    for category in category_codes:
+        heap += category.encode()
+        category_ends.append(len(heap))
+
+    count = len(ids)
+    next_id = max(next_id, ids[-1] + 1 if count else 1)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, count, next_id, lsn, len(category_codes), len(heap))
+    layout = _layout(count, len(category_codes), len(heap))
+    with _staged(path) as handle:
+        handle.write(header.ljust(_HEADER_SIZE, b"\0"))
+        for (name, _, _), column in zip(_SECTIONS, (ids, prices, quantities, codes, name_ends, category_ends)):
+            handle.seek(layout[name])
+            handle.write(column.tobytes())
+        handle.seek(layout["heap"])
+        handle.write(heap)
+    return count
+
+
+def write_snapshot_buffer(path: PathLike, buffer: Any) -> int:
+    """Write an in-memory snapshot (e.g. the compiled core's ``get_columns()``) to ``path`` atomically."""
+    snapshot = InventorySnapshot.from_buffer(buffer)
+    with _staged(path) as handle:
+        handle.write(memoryview(buffer))
+    return snapshot.count
+
+
+@contextmanager
+def _staged(path: PathLike) -> Iterator[BinaryIO]:
+    """Write to a temporary sibling of ``path`` and move it into place once it is on disk."""
+    path = Path(path)
+    staging = path.with_name(path.name + ".tmp")
+    with open(staging, "wb") as handle:
+        yield handle
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(staging, path)
+
+
+def load_snapshot(manager: Any, path: PathLike) -> InventorySnapshot:
+    """Replace ``manager``'s contents with the snapshot at ``path``.
+
+    Engines with ``attach_snapshot`` adopt the mapped columns without copying;
+    the rest rebuild themselves through ``restore``.
+    """
+    snapshot = InventorySnapshot(path)
+    if hasattr(manager, "attach_snapshot"):
+        manager.attach_snapshot(snapshot)
+    else:
+        manager.restore(list(snapshot.iter_items()), snapshot.next_id)
+    return snapshot
+
+
+def import_csv(csv_path: PathLike, snapshot_path: PathLike) -> int:
+    """Convert a ``name,category,price,quantity`` CSV (optionally with ``id``) into a snapshot."""
+    items: List[Dict[str, Any]] = []
+    with open(csv_path, newline="") as handle:
+        for line, row in enumerate(csv.DictReader(handle), start=2):
+            try:
+                item: Dict[str, Any] = {
+                    "id": int(row["id"]) if row.get("id") else len(items) + 1,
+                    "name": row["name"],
+                    "category": row["category"],
+                    "price": float(row["price"]),
+                    "quantity": int(row["quantity"]),
+                }
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ValueError(f"{csv_path}:{line}: {exc}") from exc
+            error = validate_row(item)
+            if error is not None:
+                raise ValueError(f"{csv_path}:{line}: {error}")
+            items.append(item)
+    items.sort(key=lambda item: item["id"])
+    return write_snapshot(snapshot_path, items, next_id=items[-1]["id"] + 1 if items else 1)
+
+
+def export_csv(snapshot_path: PathLike, csv_path: PathLike) -> int:
+    """Write a snapshot back out as CSV with an ``id`` column."""
+    snapshot = InventorySnapshot(snapshot_path)
+    with open(csv_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(_FIELDS)
+        for item in snapshot.iter_items():
+            writer.writerow([item[field] for field in _FIELDS])
+    return snapshot.count
+
+
+def main(argv: Sequence[str] = ()) -> None:
+    parser = argparse.ArgumentParser(description="Convert between CSV and binary inventory snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="build a snapshot from a CSV file")
+    import_parser.add_argument("csv_path")
+    import_parser.add_argument("snapshot_path")
+    export_parser = commands.add_parser("export", help="write a snapshot out as CSV")
+    export_parser.add_argument("snapshot_path")
+    export_parser.add_argument("csv_path")
+    args = parser.parse_args(argv or None)
+
+    if args.command == "import":
+        count = import_csv(args.csv_path, args.snapshot_path)
+        print(f"wrote {count} items to {args.snapshot_path}")
+    else:
+        count = export_csv(args.snapshot_path, args.csv_path)
+        print(f"wrote {count} items to {args.csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,7 +32,7 @@ mkdir -p core/build
 cd core/build
 
 # Compile directly
-c++ -O3 -Wall -shared -std=c++17 -fPIC \
+c++ -O3 -Wall -shared -std=c++17 -fPIC -pthread \
     "-I../" \
     "-I$PYTHON_INCLUDE" \
     "-I$PYBIND11_INCLUDE" \